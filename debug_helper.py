@@ -7,6 +7,8 @@
 import sys
 import os
 import argparse
+import subprocess
+from dataclasses import dataclass, fields
 from typing import List, Optional
 
 # 确保能导入项目模块
@@ -15,12 +17,18 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 try:
     from gua_data import ALL_GUAS, GUA_MAP, binary_to_gua, search_gua, init_data
     from gua_data import Yao, Gua, YaoType, TRIGRAMS
+    from gua_data import RELATION_TABLE, RelationKind
 except ImportError as e:
     print(f"错误: 无法导入gua_data模块: {e}")
     print("请确保在项目根目录运行此脚本")
     sys.exit(1)
 
 
+def _trigram_code(lines: str) -> int:
+    """三爻（自下而上的 0/1 字符串）所成经卦的编码"""
+    return sum(int(bit) << i for i, bit in enumerate(lines))
+
+
 class DebugHelper:
     """调试辅助类"""
 
@@ -108,38 +116,45 @@ class DebugHelper:
 
         all_ok = True
 
-        # 测试错卦的对合性
+        # 对关系表做一次整体检查：错、综、反三种关系都应是对合的；
+        # 互卦与上下互卦不用关系表里的位运算，直接由二进制编码的爻重新求出
+        involutions = {
+            RelationKind.CUO: "错卦",
+            RelationKind.ZONG: "综卦",
+            RelationKind.FAN: "反卦",
+        }
+        failures = {kind: [] for kind in involutions}
+        hu_failures = []
+        for code, row in enumerate(RELATION_TABLE):
+            for kind in involutions:
+                if RELATION_TABLE[row[kind]][kind] != code:
+                    failures[kind].append(code)
         for gua in ALL_GUAS:
-            dui = gua.get_dui_gua()
-            dui_dui = dui.get_dui_gua()
-            if dui_dui.binary_code != gua.binary_code:
-                self.errors.append(f"{gua.name}: 错卦对合性失败")
-                all_ok = False
-
-        if all_ok:
-            print("✓ 错卦对合性检查通过")
-
-        # 测试综卦的对合性
-        for gua in ALL_GUAS:
-            zong = gua.get_zong_gua()
-            zong_zong = zong.get_zong_gua()
-            if zong_zong.binary_code != gua.binary_code:
-                self.errors.append(f"{gua.name}: 综卦对合性失败")
-                all_ok = False
-
-        if all_ok:
-            print("✓ 综卦对合性检查通过")
-
-        # 测试反卦的对合性
-        for gua in ALL_GUAS:
-            fan = gua.get_fan_gua()
-            fan_fan = fan.get_fan_gua()
-            if fan_fan.binary_code != gua.binary_code:
-                self.errors.append(f"{gua.name}: 反卦对合性失败")
+            # binary_code 自初爻至上爻：234爻为互卦下卦，345爻为互卦上卦
+            lower = _trigram_code(gua.binary_code[1:4])
+            upper = _trigram_code(gua.binary_code[2:5])
+            row = RELATION_TABLE[gua.code]
+            if (
+                row[RelationKind.HU] != upper << 3 | lower
+                or row[RelationKind.XIA_HU] != lower << 3 | lower
+                or row[RelationKind.SHANG_HU] != upper << 3 | upper
+            ):
+                hu_failures.append(gua.code)
+
+        for kind, label in involutions.items():
+            if failures[kind]:
+                for code in failures[kind]:
+                    self.errors.append(f"{binary_to_gua(code).name}: {label}对合性失败")
                 all_ok = False
+            else:
+                print(f"✓ {label}对合性检查通过")
 
-        if all_ok:
-            print("✓ 反卦对合性检查通过")
+        if hu_failures:
+            for code in hu_failures:
+                self.errors.append(f"{binary_to_gua(code).name}: 互卦与234、345爻不符")
+            all_ok = False
+        else:
+            print("✓ 互卦检查通过")
 
         return all_ok
 
@@ -253,6 +268,154 @@ class DebugHelper:
         return ok1 and ok2 and ok3
 
 
+@dataclass
+class _DictYao:
+    """旧版（带 __dict__ 的可变 dataclass）爻，仅用于内存对比"""
+
+    position: int
+    yao_type: YaoType
+    text: str
+    xiang: str
+
+
+@dataclass
+class _DictGua:
+    """旧版（带 __dict__ 的可变 dataclass）卦，仅用于内存对比"""
+
+    index: int
+    name: str
+    chinese_name: str
+    description: str
+    xiang: str
+    tuan: str
+    yaos: List[_DictYao]
+    upper_gua: str
+    lower_gua: str
+
+
+def _object_size(obj) -> int:
+    """对象本身占用的字节数（含实例 __dict__，不含共享的字段值）"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def print_memory_report():
+    """打印 Yao/Gua 对象的内存占用对比"""
+    init_data()
+    gua = ALL_GUAS[0]
+    yao = gua.yaos[0]
+    old_yao = _DictYao(*(getattr(yao, f.name) for f in fields(yao)))
+    old_yaos = [_DictYao(*(getattr(y, f.name) for f in fields(y))) for y in gua.yaos]
+    old_gua = _DictGua(
+        *(
+            old_yaos if f.name == "yaos" else getattr(gua, f.name)
+            for f in fields(_DictGua)
+        )
+    )
+
+    yao_old, yao_new = _object_size(old_yao), _object_size(yao)
+    gua_old = _object_size(old_gua) + sys.getsizeof(old_gua.yaos)
+    # 现版的文本单独存放在 GuaTexts 中，一并计入
+    gua_new = _object_size(gua) + _object_size(gua.texts) + sys.getsizeof(gua.yaos)
+    total_old = 64 * gua_old + 384 * yao_old
+    total_new = 64 * gua_new + 384 * yao_new
+
+    print("=" * 60)
+    print("对象内存占用（字节，不含共享的字符串）")
+    print("=" * 60)
+    print(f"{'对象':<16}{'旧版(__dict__)':>16}{'现版(__slots__)':>16}")
+    print(f"{'Yao':<16}{yao_old:>16}{yao_new:>16}")
+    print(f"{'Gua(含文本)':<14}{gua_old:>16}{gua_new:>16}")
+    print(f"{'64卦+384爻':<14}{total_old:>16}{total_new:>16}")
+    print(
+        f"\n旧版每次翻转爻都新建 Yao（{yao_old} 字节），现版翻转返回共享实例，不再分配"
+    )
+
+
+# 导入基准：在子进程中计时并读取峰值内存；trace 为真时另行统计 Python 分配量
+_IMPORT_BENCH_SCRIPT = """
+import sys, time, tracemalloc
+if {trace}:
+    tracemalloc.start()
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+traced = tracemalloc.get_traced_memory()[0]
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = rss // 1024 if sys.platform == "darwin" else rss
+except ImportError:
+    rss = -1
+print(elapsed, traced, rss)
+"""
+
+# (标签, 代码)；第一项为基线：导入原始数据模块并复制全部64卦记录（惰性加载之前的做法）
+_IMPORT_BENCH_CASES = [
+    (
+        "基线：导入并复制64卦原始数据",
+        "import copy, yijing_full_data; "
+        "records = copy.deepcopy(yijing_full_data.YIJING_DATA); "
+        "assert len(records) == 64",
+    ),
+    ("import gua_data（文本惰性加载）", "import gua_data"),
+    ("导入并加载全部文本", "import gua_data; gua_data.preload_texts()"),
+]
+
+
+def _run_import_case(code: str, trace: bool) -> List[float]:
+    """在子进程中运行一次导入，返回 [耗时秒数, Python分配字节, 峰值RSS(KB)]"""
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_BENCH_SCRIPT.format(code=code, trace=trace)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return [float(value) for value in output]
+
+
+def run_import_benchmark(repeat: int = 5):
+    """对比基线、惰性加载与全部加载的导入耗时和内存"""
+    print("=" * 60)
+    print(f"导入基准（子进程，各运行{repeat}次取最小值）")
+    print("=" * 60)
+    for label, code in _IMPORT_BENCH_CASES:
+        runs = [_run_import_case(code, trace=False) for _ in range(repeat)]
+        elapsed = min(run[0] for run in runs)
+        peak = min(run[2] for run in runs)
+        traced = _run_import_case(code, trace=True)[1]
+        rss = f"{peak / 1024:.2f} MB" if peak >= 0 else "N/A"
+        print(
+            f"{label:<24} 耗时 {elapsed * 1000:7.2f} ms  "
+            f"Python分配 {traced / 1024:8.1f} KB  峰值RSS {rss}"
+        )
+
+
+def run_simulation(total: int, method: str, workers: Optional[int] = None):
+    """蒙特卡洛检验起卦分布（需要 numpy）"""
+    try:
+        from gua_casting import CastMethod
+        from gua_simulation import DEFAULT_ALPHA, format_report, simulate
+    except ImportError as e:
+        print(f"错误: 模拟需要 numpy: {e}")
+        sys.exit(1)
+
+    init_data()
+    print("=" * 60)
+    print("起卦分布蒙特卡洛检验")
+    print("=" * 60)
+    try:
+        report = simulate(total, CastMethod(method), workers=workers)
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+    print(format_report(report))
+    return all(test.p_value >= DEFAULT_ALPHA for test in report.tests)
+
+
 def print_gua_info(name: str):
     """打印特定卦的详细信息"""
     results = search_gua(name)
@@ -280,8 +443,24 @@ def print_gua_info(name: str):
         print(f"  错卦: {gua.get_dui_gua().name}")
         print(f"  综卦: {gua.get_zong_gua().name}")
         print(f"  反卦: {gua.get_fan_gua().name}")
+        print(f"  互卦: {gua.get_hu_gua().name}")
         print(f"  上互卦: {gua.get_shang_hu_gua().name}")
         print(f"  下互卦: {gua.get_xia_hu_gua().name}")
+        print(f"  伏卦: {gua.get_fu_gua().name}")
+
+        from datetime import date
+
+        from gua_charts import BRANCHES, GENERATION_NAMES, STEMS, get_chart
+        from gua_charts import day_branch, day_stem
+
+        today = date.today()
+        chart = get_chart(gua, day_stem(today))
+        print(
+            f"\n纳甲（{today} {STEMS[day_stem(today)]}{BRANCHES[day_branch(today)]}日）: "
+            f"{chart.palace_name}{GENERATION_NAMES[chart.generation]}"
+        )
+        for position in range(6, 0, -1):
+            print(f"  {position}爻 {chart.line_label(position)}")
 
 
 def main():
@@ -290,6 +469,23 @@ def main():
     parser.add_argument("--report", action="store_true", help="生成调试报告")
     parser.add_argument("--gua", type=str, help="查看特定卦的信息")
     parser.add_argument("--list", action="store_true", help="列出所有卦")
+    parser.add_argument("--memory", action="store_true", help="对比Yao/Gua内存占用")
+    parser.add_argument(
+        "--bench-import", action="store_true", help="对比导入耗时与峰值内存"
+    )
+    parser.add_argument(
+        "--simulate",
+        type=int,
+        metavar="N",
+        help="模拟N次起卦并做卡方检验（需要numpy）",
+    )
+    parser.add_argument(
+        "--method",
+        choices=["coins", "yarrow"],
+        default="yarrow",
+        help="模拟的起卦方式（默认yarrow）",
+    )
+    parser.add_argument("--workers", type=int, help="模拟使用的进程数（默认CPU核数）")
 
     args = parser.parse_args()
 
@@ -297,6 +493,17 @@ def main():
         print_gua_info(args.gua)
         return
 
+    if args.memory:
+        print_memory_report()
+        return
+
+    if args.bench_import:
+        run_import_benchmark()
+        return
+
+    if args.simulate is not None:
+        sys.exit(0 if run_simulation(args.simulate, args.method, args.workers) else 1)
+
     if args.list:
         print("\n所有64卦:")
         print("=" * 60)
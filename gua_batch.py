@@ -0,0 +1,131 @@
+"""
+周易学习程序 - 批量卦象变换
+以 NumPy 数组一次处理大量卦象：输入位编码（uint8，0-63）与变爻掩码，
+输出错、综、反、互、变卦与上下卦的数组，供统计分析使用。
+
+所有变换都由 gua_data 中的查找表生成 64 项的 uint8 数组，
+批量计算只是一次按下标取值（np.take），不经过 Gua 对象。
+本模块依赖 numpy（可选依赖，界面部分不需要）。
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from gua_data import (
+    FULL_MASK,
+    RELATION_TABLE,
+    TRIGRAM_MASK,
+    RelationKind,
+    get_registry,
+)
+
+# 关系表：_RELATIONS[kind][code]
+_RELATIONS = np.array(RELATION_TABLE, dtype=np.uint8).T.copy()
+
+# 位编码 <-> 卦序（1-64），_CODE_BY_KINGWEN[0] 不使用
+_KINGWEN_BY_CODE = np.array(
+    [gua.index for gua in get_registry().by_code], dtype=np.uint8
+)
+_CODE_BY_KINGWEN = np.zeros(65, dtype=np.uint8)
+_CODE_BY_KINGWEN[_KINGWEN_BY_CODE] = np.arange(64, dtype=np.uint8)
+
+
+class BatchTransforms(NamedTuple):
+    """批量变换的结果，每一项都是与输入等长的 uint8 数组"""
+
+    cuo: np.ndarray  # 错卦
+    zong: np.ndarray  # 综卦
+    fan: np.ndarray  # 反卦
+    hu: np.ndarray  # 互卦
+    changed: np.ndarray  # 变卦
+    lower: np.ndarray  # 下卦（经卦编码 0-7）
+    upper: np.ndarray  # 上卦（经卦编码 0-7）
+
+
+def as_codes(values, name: str = "codes") -> np.ndarray:
+    """转为 uint8 数组并检查取值在 0-63 之间
+
+    Raises:
+        ValueError: 含有超出范围的值
+    """
+    array = np.asarray(values)
+    if array.size and (array.min() < 0 or array.max() > FULL_MASK):
+        raise ValueError(f"{name} 的取值必须在 0-{FULL_MASK} 之间")
+    return array.astype(np.uint8, copy=False)
+
+
+def relation(codes, kind: RelationKind) -> np.ndarray:
+    """批量求某一种关系卦的位编码"""
+    return np.take(_RELATIONS[kind], as_codes(codes))
+
+
+def cuo(codes) -> np.ndarray:
+    """批量求错卦"""
+    return relation(codes, RelationKind.CUO)
+
+
+def zong(codes) -> np.ndarray:
+    """批量求综卦"""
+    return relation(codes, RelationKind.ZONG)
+
+
+def fan(codes) -> np.ndarray:
+    """批量求反卦"""
+    return relation(codes, RelationKind.FAN)
+
+
+def hu(codes) -> np.ndarray:
+    """批量求互卦"""
+    return relation(codes, RelationKind.HU)
+
+
+def changed(codes, masks) -> np.ndarray:
+    """批量求变卦：按变爻掩码翻转对应的爻"""
+    return np.bitwise_xor(as_codes(codes), as_codes(masks, "masks"))
+
+
+def trigrams(codes):
+    """批量拆分上下卦，返回 (下卦, 上卦) 两个经卦编码数组"""
+    codes = as_codes(codes)
+    return codes & TRIGRAM_MASK, codes >> 3
+
+
+def transform(codes, masks=None) -> BatchTransforms:
+    """一次求出错、综、反、互、变卦与上下卦
+
+    Args:
+        codes: 卦的位编码数组（0-63）
+        masks: 变爻掩码数组（0-63），与 codes 等长或可广播；省略时变卦即本卦
+
+    Returns:
+        BatchTransforms，每一项都是 uint8 数组
+    """
+    codes = as_codes(codes)
+    lower, upper = trigrams(codes)
+    return BatchTransforms(
+        cuo=np.take(_RELATIONS[RelationKind.CUO], codes),
+        zong=np.take(_RELATIONS[RelationKind.ZONG], codes),
+        fan=np.take(_RELATIONS[RelationKind.FAN], codes),
+        hu=np.take(_RELATIONS[RelationKind.HU], codes),
+        changed=codes.copy() if masks is None else changed(codes, masks),
+        lower=lower,
+        upper=upper,
+    )
+
+
+def to_kingwen(codes) -> np.ndarray:
+    """位编码转为卦序（1-64）"""
+    return np.take(_KINGWEN_BY_CODE, as_codes(codes))
+
+
+def from_kingwen(indices) -> np.ndarray:
+    """卦序（1-64）转为位编码
+
+    Raises:
+        ValueError: 卦序不在 1-64 之间
+    """
+    array = np.asarray(indices)
+    if array.size and (array.min() < 1 or array.max() > 64):
+        raise ValueError("卦序必须在 1-64 之间")
+    return np.take(_CODE_BY_KINGWEN, array)
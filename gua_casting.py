@@ -0,0 +1,199 @@
+"""
+周易学习程序 - 起卦
+三枚铜钱、大衍蓍草与梅花易数（时间起卦、数字起卦），
+结果为 (本卦, 变爻掩码, 之卦) 三元组，之卦由 Gua.get_changed_gua 求得。
+
+单次起卦用标准库 random，供界面使用；批量起卦用 NumPy（可选依赖），
+给定种子时结果可复现，供模拟与统计使用。两条路径共用同一张爻值表。
+
+爻值：6 老阴（变）、7 少阳、8 少阴、9 老阳（变）；奇数为阳。
+"""
+
+import random
+from enum import Enum
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+from gua_data import (
+    NUMBER_TO_TRIGRAM,
+    TRIGRAM_CODES,
+    Gua,
+    NumberingScheme,
+    get_gua_by_numbers,
+    get_registry,
+)
+
+OLD_YIN = 6
+YOUNG_YANG = 7
+YOUNG_YIN = 8
+OLD_YANG = 9
+
+# 三枚铜钱：3个随机位为正反面，字（正面）记3、背记2，三枚之和即爻值
+COIN_TABLE: Tuple[int, ...] = tuple(6 + bin(bits).count("1") for bits in range(8))
+COIN_BITS = 3
+
+# 大衍蓍草：6/7/8/9 的概率为 1/16、5/16、7/16、3/16，以4个随机位查表
+YARROW_TABLE: Tuple[int, ...] = (6,) + (7,) * 5 + (8,) * 7 + (9,) * 3
+YARROW_BITS = 4
+
+
+class CastMethod(Enum):
+    """摇卦方式"""
+
+    COINS = "coins"  # 三枚铜钱
+    YARROW = "yarrow"  # 大衍蓍草
+
+
+# 摇卦方式 -> (爻值表, 每爻所需随机位数)
+_LINE_TABLES = {
+    CastMethod.COINS: (COIN_TABLE, COIN_BITS),
+    CastMethod.YARROW: (YARROW_TABLE, YARROW_BITS),
+}
+
+
+class Cast(NamedTuple):
+    """一次起卦的结果"""
+
+    gua: Gua  # 本卦
+    mask: int  # 变爻掩码（第 i 爻为第 i-1 位）
+    changed: Gua  # 之卦
+
+
+def is_changing(value: int) -> bool:
+    """老阴、老阳为变爻"""
+    return value == OLD_YIN or value == OLD_YANG
+
+
+def lines_to_cast(values: Sequence[int]) -> Cast:
+    """由六个爻值（从初爻到上爻）得到起卦结果
+
+    Raises:
+        ValueError: 爻值个数不是6或不在 6-9 之间
+    """
+    if len(values) != 6 or any(v not in (6, 7, 8, 9) for v in values):
+        raise ValueError(f"需要六个 6-9 之间的爻值: {values}")
+    code = sum((value & 1) << i for i, value in enumerate(values))
+    mask = sum(is_changing(value) << i for i, value in enumerate(values))
+    gua = get_registry().by_code[code]
+    return Cast(gua, mask, gua.get_changed_gua(mask))
+
+
+def cast_lines(
+    method: CastMethod = CastMethod.COINS, rng: Optional[random.Random] = None
+) -> Tuple[int, ...]:
+    """摇出六个爻值（从初爻到上爻）"""
+    table, bits = _LINE_TABLES[method]
+    rng = rng or random
+    return tuple(table[rng.getrandbits(bits)] for _ in range(6))
+
+
+def cast(
+    method: CastMethod = CastMethod.COINS, rng: Optional[random.Random] = None
+) -> Cast:
+    """摇卦一次
+
+    Args:
+        method: 摇卦方式
+        rng: 随机数生成器，省略时使用 random 模块的全局生成器
+    """
+    return lines_to_cast(cast_lines(method, rng))
+
+
+def meihua_numbers(
+    upper_num: int, lower_num: int, moving_num: Optional[int] = None
+) -> Cast:
+    """梅花易数数字起卦
+
+    上卦数、下卦数除以8取余（余0作8）按先天数取卦；
+    动爻数省略时取两数之和，除以6取余（余0作6）。
+    """
+    if moving_num is None:
+        moving_num = upper_num + lower_num
+    gua = get_gua_by_numbers(upper_num, lower_num, NumberingScheme.MOD8)
+    mask = 1 << ((moving_num % 6 or 6) - 1)
+    return Cast(gua, mask, gua.get_changed_gua(mask))
+
+
+def year_branch(year: int) -> int:
+    """公历年份对应的年支数（子1……亥12），以甲子年1984为基准
+
+    按公历年份计，立春或春节之前的日期需由调用方改用上一年。
+    """
+    return (year - 4) % 12 + 1
+
+
+def hour_branch(hour: int) -> int:
+    """钟点（0-23）对应的时支数：子时（23-1点）为1……亥时为12"""
+    return (hour + 1) // 2 % 12 + 1
+
+
+def meihua_time(year_num: int, month: int, day: int, hour_num: int) -> Cast:
+    """梅花易数时间起卦
+
+    年支数 + 农历月 + 农历日 为上卦数，再加时支数为下卦数，亦为动爻数。
+    农历月日由调用方提供（本程序不含历法换算），年支、时支可用
+    year_branch、hour_branch 求得。
+    """
+    upper_num = year_num + month + day
+    lower_num = upper_num + hour_num
+    return meihua_numbers(upper_num, lower_num, lower_num)
+
+
+def cast_batch(n: int, method: CastMethod = CastMethod.COINS, seed=None):
+    """批量摇卦（NumPy）
+
+    每卦取一个 uint32 随机数，按每爻所需的随机位数切开后查爻值表，
+    逐爻拼出本卦编码与变爻掩码。
+
+    Args:
+        n: 摇卦次数
+        method: 摇卦方式
+        seed: 随机种子或 numpy.random.Generator；相同种子结果相同
+
+    Returns:
+        (本卦编码, 变爻掩码, 之卦编码) 三个长度为 n 的 uint8 数组
+    """
+    import numpy as np
+
+    from gua_batch import changed
+
+    table, bits = _LINE_TABLES[method]
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    draws = rng.integers(0, 1 << (bits * 6), size=n, dtype=np.uint32)
+
+    yang = np.array([value & 1 for value in table], dtype=np.uint8)
+    changing = np.array([is_changing(value) for value in table], dtype=np.uint8)
+    codes = np.zeros(n, dtype=np.uint8)
+    masks = np.zeros(n, dtype=np.uint8)
+    low_bits = np.uint32((1 << bits) - 1)
+    for i in range(6):
+        index = (draws >> np.uint32(bits * i)) & low_bits
+        codes |= np.take(yang << i, index)
+        masks |= np.take(changing << i, index)
+    return codes, masks, changed(codes, masks)
+
+
+def meihua_batch(upper_nums, lower_nums, moving_nums=None):
+    """批量梅花易数数字起卦（NumPy），规则同 meihua_numbers
+
+    Returns:
+        (本卦编码, 变爻掩码, 之卦编码) 三个 uint8 数组
+    """
+    import numpy as np
+
+    from gua_batch import changed
+
+    upper_nums = np.asarray(upper_nums, dtype=np.int64)
+    lower_nums = np.asarray(lower_nums, dtype=np.int64)
+    if moving_nums is None:
+        moving_nums = upper_nums + lower_nums
+    moving_nums = np.asarray(moving_nums, dtype=np.int64)
+
+    # 余数 0-7 -> 先天数 8,1,2……7 对应的经卦编码
+    trigram_codes = np.array(
+        [TRIGRAM_CODES[NUMBER_TO_TRIGRAM[r or 8]] for r in range(8)], dtype=np.uint8
+    )
+    codes = np.take(trigram_codes, lower_nums % 8) | (
+        np.take(trigram_codes, upper_nums % 8) << 3
+    )
+    masks = (1 << (moving_nums - 1) % 6).astype(np.uint8)
+    return codes, masks, changed(codes, masks)
@@ -0,0 +1,221 @@
+"""
+周易学习程序 - 纳甲装卦
+为任一卦排出：所属八宫与世数、世应爻位、六爻纳甲（天干地支）、
+五行、六亲，以及按日干所起的六神。
+
+排盘只依赖卦的位编码与日干，全部 64 × 10 种结果首次使用时一次算出，
+之后按 (卦, 日干) 查表；另有 NumPy 批量模式（可选依赖），供生成报表使用。
+"""
+
+import datetime
+import functools
+import threading
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
+
+from gua_data import (
+    PALACE_TABLE,
+    TRIGRAM_BY_CODE,
+    TRIGRAM_MASK,
+    TRIGRAMS,
+    Gua,
+    get_registry,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+STEMS = "甲乙丙丁戊己庚辛壬癸"
+BRANCHES = "子丑寅卯辰巳午未申酉戌亥"
+ELEMENTS = "木火土金水"  # 相邻为相生，隔一为相克
+RELATIVES = ("兄弟", "子孙", "妻财", "官鬼", "父母")
+SPIRITS = ("青龙", "朱雀", "勾陈", "螣蛇", "白虎", "玄武")
+GENERATION_NAMES = ("本宫", "一世", "二世", "三世", "四世", "五世", "游魂", "归魂")
+
+# 地支的五行（ELEMENTS 下标）
+BRANCH_ELEMENTS = (4, 2, 0, 0, 2, 1, 1, 2, 3, 3, 2, 4)
+
+# 八卦的五行：乾兑金，震巽木，坎水，离火，艮坤土
+TRIGRAM_ELEMENTS = {
+    "qian": 3,
+    "dui": 3,
+    "li": 1,
+    "zhen": 0,
+    "xun": 0,
+    "kan": 4,
+    "gen": 2,
+    "kun": 2,
+}
+
+# 纳甲：经卦 -> (内卦天干, 内卦三爻地支, 外卦天干, 外卦三爻地支)，地支自下而上
+NAJIA = {
+    "qian": ("甲", "子寅辰", "壬", "午申戌"),
+    "kun": ("乙", "未巳卯", "癸", "丑亥酉"),
+    "zhen": ("庚", "子寅辰", "庚", "午申戌"),
+    "xun": ("辛", "丑亥酉", "辛", "未巳卯"),
+    "kan": ("戊", "寅辰午", "戊", "申戌子"),
+    "li": ("己", "卯丑亥", "己", "酉未巳"),
+    "gen": ("丙", "辰午申", "丙", "戌子寅"),
+    "dui": ("丁", "巳卯丑", "丁", "亥酉未"),
+}
+
+# 世数 -> 世爻位置：本宫世在上爻，一至五世世在该爻，游魂世在四爻，归魂世在三爻
+SHI_BY_GENERATION = (6, 1, 2, 3, 4, 5, 4, 3)
+
+# 日干 -> 初爻所起六神：甲乙青龙，丙丁朱雀，戊勾陈，己螣蛇，庚辛白虎，壬癸玄武
+_SPIRIT_START = (0, 0, 1, 1, 2, 3, 4, 4, 5, 5)
+
+# 以1949年10月1日（甲子日）为基准推算日干支
+_JDN_OFFSET = datetime.date(1949, 10, 1).toordinal()
+
+
+class Chart(NamedTuple):
+    """一卦的纳甲排盘，六爻各项均自初爻至上爻排列，取值为名称表的下标"""
+
+    gua: Gua
+    palace: int  # 本宫经卦编码
+    generation: int  # 世数，见 GENERATION_NAMES
+    shi: int  # 世爻位置（1-6）
+    ying: int  # 应爻位置（1-6）
+    stems: Tuple[int, ...]  # 天干，STEMS 下标
+    branches: Tuple[int, ...]  # 地支，BRANCHES 下标
+    elements: Tuple[int, ...]  # 五行，ELEMENTS 下标
+    relatives: Tuple[int, ...]  # 六亲，RELATIVES 下标
+    spirits: Tuple[int, ...]  # 六神，SPIRITS 下标
+
+    @property
+    def palace_name(self) -> str:
+        """宫名，如乾宫"""
+        return TRIGRAMS[TRIGRAM_BY_CODE[self.palace]]["name"] + "宫"
+
+    def line_label(self, position: int) -> str:
+        """某爻的排盘文字，如：玄武 父母 壬戌土 世"""
+        i = position - 1
+        mark = " 世" if position == self.shi else " 应" if position == self.ying else ""
+        return (
+            f"{SPIRITS[self.spirits[i]]} {RELATIVES[self.relatives[i]]} "
+            f"{STEMS[self.stems[i]]}{BRANCHES[self.branches[i]]}"
+            f"{ELEMENTS[self.elements[i]]}{mark}"
+        )
+
+
+def day_stem(date: datetime.date) -> int:
+    """某日的日干（STEMS 下标）"""
+    return (date.toordinal() - _JDN_OFFSET) % 10
+
+
+def day_branch(date: datetime.date) -> int:
+    """某日的日支（BRANCHES 下标）"""
+    return (date.toordinal() - _JDN_OFFSET) % 12
+
+
+def _najia(code: int):
+    """六爻的天干、地支下标（自初爻至上爻）"""
+    inner = NAJIA[TRIGRAM_BY_CODE[code & TRIGRAM_MASK]]
+    outer = NAJIA[TRIGRAM_BY_CODE[code >> 3]]
+    stems = (STEMS.index(inner[0]),) * 3 + (STEMS.index(outer[2]),) * 3
+    branches = tuple(BRANCHES.index(b) for b in inner[1] + outer[3])
+    return stems, branches
+
+
+def _build_chart(gua: Gua, stem: int) -> Chart:
+    palace, generation = PALACE_TABLE[gua.code]
+    shi = SHI_BY_GENERATION[generation]
+    stems, branches = _najia(gua.code)
+    elements = tuple(BRANCH_ELEMENTS[b] for b in branches)
+    palace_element = TRIGRAM_ELEMENTS[TRIGRAM_BY_CODE[palace]]
+    return Chart(
+        gua=gua,
+        palace=palace,
+        generation=generation,
+        shi=shi,
+        ying=(shi + 2) % 6 + 1,
+        stems=stems,
+        branches=branches,
+        elements=elements,
+        relatives=tuple((e - palace_element) % 5 for e in elements),
+        spirits=tuple((_SPIRIT_START[stem] + i) % 6 for i in range(6)),
+    )
+
+
+_charts: Optional[Tuple[Chart, ...]] = None
+_charts_lock = threading.Lock()
+
+
+def _get_charts() -> Tuple[Chart, ...]:
+    """全部 64 × 10 种排盘，按 位编码 × 10 + 日干 排列，首次调用时在锁内生成"""
+    global _charts
+    if _charts is None:
+        with _charts_lock:
+            if _charts is None:
+                _charts = tuple(
+                    _build_chart(gua, stem)
+                    for gua in get_registry().by_code
+                    for stem in range(10)
+                )
+    return _charts
+
+
+def get_chart(gua: Gua, stem: int = 0) -> Chart:
+    """取得某卦在某日干下的排盘
+
+    Args:
+        gua: 卦
+        stem: 日干（STEMS 下标，0为甲），可用 day_stem(date) 求得
+
+    Raises:
+        IndexError: 日干不在 0-9 之间
+    """
+    if not 0 <= stem < 10:
+        raise IndexError(f"日干必须在 0-9 之间: {stem}")
+    return _get_charts()[gua.code * 10 + stem]
+
+
+class ChartArrays(NamedTuple):
+    """批量排盘结果（NumPy 数组，每卦一行，六爻各列自初爻至上爻）"""
+
+    palace: "np.ndarray"
+    generation: "np.ndarray"
+    shi: "np.ndarray"
+    ying: "np.ndarray"
+    stems: "np.ndarray"  # 形状 (n, 6)
+    branches: "np.ndarray"
+    elements: "np.ndarray"
+    relatives: "np.ndarray"
+    spirits: "np.ndarray"
+
+
+@functools.lru_cache(maxsize=None)
+def _chart_columns() -> Dict[str, "np.ndarray"]:
+    """把全部排盘按字段转为 NumPy 表，行号为 位编码 × 10 + 日干"""
+    import numpy as np
+
+    charts = _get_charts()
+    return {
+        field: np.array([getattr(c, field) for c in charts], dtype=np.uint8)
+        for field in ChartArrays._fields
+    }
+
+
+def chart_batch(codes, stems) -> ChartArrays:
+    """批量排盘（NumPy）
+
+    Args:
+        codes: 卦的位编码数组（0-63）
+        stems: 日干数组（0-9），与 codes 等长或可广播
+
+    Returns:
+        ChartArrays，各项为 uint8 数组
+    """
+    import numpy as np
+
+    from gua_batch import as_codes
+
+    codes = as_codes(codes)
+    stems = np.asarray(stems)
+    if stems.size and (stems.min() < 0 or stems.max() > 9):
+        raise ValueError("日干必须在 0-9 之间")
+    keys = codes.astype(np.intp) * 10 + stems
+    columns = _chart_columns()
+    return ChartArrays(
+        *(np.take(columns[field], keys, axis=0) for field in ChartArrays._fields)
+    )
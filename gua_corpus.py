@@ -0,0 +1,134 @@
+"""
+周易学习程序 - 二进制文本语料
+将 YIJING_DATA 等文本编译为一个二进制文件，运行时以 mmap 映射，
+只解码实际访问到的文本片段
+
+文件格式（小端）：
+    文件头    magic(4s) 版本(H) 记录数(H) 每条记录的槽数(H) 保留(H) 文本区偏移(I)
+    偏移表    记录数 × 槽数 个 (偏移(I), 字节长度(I))，偏移相对于文本区
+    文本区    所有文本的 UTF-8 编码，依次拼接
+
+周易文本以卦序（1-64）为记录，每卦的槽位见 YIJING_SLOTS。
+用法：python gua_corpus.py  （重新生成 yijing_corpus.bin）
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CORPUS_MAGIC = b"ZYCP"
+CORPUS_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHHHI")
+_ENTRY = struct.Struct("<II")
+
+# 周易文本的槽位：卦辞、彖、象，然后初爻到上爻的爻辞与象曰
+YIJING_SLOTS = ("description", "tuan", "xiang") + tuple(
+    f"yao{pos}_{field}" for pos in range(1, 7) for field in ("text", "xiang")
+)
+
+# 默认的周易语料文件，与本模块放在同一目录
+YIJING_CORPUS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "yijing_corpus.bin"
+)
+
+
+def write_corpus(path: str, records: Sequence[Sequence[str]]) -> None:
+    """将文本记录写入二进制语料文件
+
+    Args:
+        path: 输出文件路径
+        records: 文本记录列表，每条记录的槽数必须相同
+    """
+    slot_count = len(records[0]) if records else 0
+    if any(len(record) != slot_count for record in records):
+        raise ValueError("所有记录的槽数必须相同")
+
+    table = bytearray()
+    blob = bytearray()
+    for record in records:
+        for text in record:
+            encoded = text.encode("utf-8")
+            table += _ENTRY.pack(len(blob), len(encoded))
+            blob += encoded
+
+    blob_offset = _HEADER.size + len(table)
+    header = _HEADER.pack(
+        CORPUS_MAGIC, CORPUS_VERSION, len(records), slot_count, 0, blob_offset
+    )
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(table)
+        f.write(blob)
+
+
+def yijing_records(data: Dict[str, dict]) -> List[List[str]]:
+    """将 YIJING_DATA 按卦序展开为文本记录（槽位顺序见 YIJING_SLOTS）"""
+    records: List[Optional[List[str]]] = [None] * 64
+    for name, gua in data.items():
+        record = [gua["description"], gua["tuan"], gua["xiang"]]
+        for yao in gua["yaos"]:
+            record += [yao["text"], yao["xiang"]]
+        records[gua["index"] - 1] = record
+
+    missing = [i + 1 for i, record in enumerate(records) if record is None]
+    if missing:
+        raise ValueError(f"缺少卦序为 {missing} 的数据")
+    return records
+
+
+def build_yijing_corpus(path: str = YIJING_CORPUS_PATH) -> None:
+    """由 yijing_full_data 生成周易语料文件"""
+    from yijing_full_data import YIJING_DATA
+
+    write_corpus(path, yijing_records(YIJING_DATA))
+
+
+class Corpus:
+    """以 mmap 映射的只读语料，按 (记录, 槽) 解码单段文本"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            records, slots, blob_offset = self._read_header(path)
+        except ValueError:
+            # 先释放 memoryview，否则 mmap 无法关闭
+            self._view.release()
+            self._mmap.close()
+            raise
+
+        self.record_count = records
+        self.slot_count = slots
+        self._blob_offset = blob_offset
+
+    def _read_header(self, path: str) -> Tuple[int, int, int]:
+        """校验文件头，返回 (记录数, 槽数, 文本区偏移)"""
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"语料文件过短: {path}")
+        magic, version, records, slots, _, blob_offset = _HEADER.unpack_from(self._mmap)
+        if magic != CORPUS_MAGIC or version != CORPUS_VERSION:
+            raise ValueError(f"不是受支持的语料文件: {path}")
+        if blob_offset != _HEADER.size + records * slots * _ENTRY.size:
+            raise ValueError(f"语料文件偏移表损坏: {path}")
+        return records, slots, blob_offset
+
+    def get(self, record: int, slot: int) -> str:
+        """解码一段文本（记录与槽均从0开始）"""
+        if not (0 <= record < self.record_count and 0 <= slot < self.slot_count):
+            raise IndexError(f"语料下标越界: ({record}, {slot})")
+        entry = _HEADER.size + (record * self.slot_count + slot) * _ENTRY.size
+        offset, length = _ENTRY.unpack_from(self._mmap, entry)
+        start = self._blob_offset + offset
+        return str(self._view[start : start + length], "utf-8")
+
+    def get_record(self, record: int) -> List[str]:
+        """解码一条记录的全部槽"""
+        return [self.get(record, slot) for slot in range(self.slot_count)]
+
+
+if __name__ == "__main__":
+    build_yijing_corpus()
+    print(f"语料已生成: {YIJING_CORPUS_PATH}")
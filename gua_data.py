@@ -3,9 +3,153 @@
 包含64卦、八卦、以及卦象变换算法
 """
 
+import importlib.util
+import threading
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
-from enum import Enum
+from types import MappingProxyType
+from typing import (
+    List,
+    Dict,
+    Iterable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+from enum import Enum, IntEnum
+
+from gua_corpus import Corpus, YIJING_CORPUS_PATH, YIJING_SLOTS
+
+
+# 卦的位编码：第 i 爻（1-6，从下往上）对应第 i-1 位，阳为1、阴为0
+# 如此下卦为低三位，上卦为高三位，错、综、反、变皆可用位运算完成
+FULL_MASK = 0b111111  # 六爻全部
+TRIGRAM_MASK = 0b111  # 三爻（经卦）
+
+# 位编码 -> 二进制字符串（从下往上），预先生成避免重复拼接
+_CODE_TO_BINARY: Tuple[str, ...] = tuple(
+    "".join("1" if code >> i & 1 else "0" for i in range(6)) for code in range(64)
+)
+
+# 位编码 -> 上下颠倒后的位编码（综卦）
+_REVERSED_CODES: Tuple[int, ...] = tuple(
+    sum(1 << (5 - i) for i in range(6) if code >> i & 1) for code in range(64)
+)
+
+
+def binary_to_code(binary: str) -> int:
+    """二进制字符串（从下往上）转为位编码"""
+    return int(binary[::-1], 2)
+
+
+def code_to_binary(code: int) -> str:
+    """位编码转为二进制字符串（从下往上）"""
+    return _CODE_TO_BINARY[code]
+
+
+def positions_to_mask(positions: Iterable[int]) -> int:
+    """爻位列表（1-6）转为位掩码
+
+    Raises:
+        ValueError: 爻位不在 1-6 之间
+    """
+    mask = 0
+    for position in positions:
+        if not 1 <= position <= 6:
+            raise ValueError(f"爻位必须在 1-6 之间: {position}")
+        mask |= 1 << (position - 1)
+    return mask
+
+
+def changes_to_mask(changes: Union[Iterable[int], int]) -> int:
+    """变爻（爻位列表 1-6，或位掩码 0-63）统一转为位掩码
+
+    Raises:
+        TypeError: 传入布尔值
+        ValueError: 爻位不在 1-6 之间，或掩码不在 0-63 之间
+    """
+    if isinstance(changes, bool):
+        raise TypeError("变爻不能是布尔值")
+    if isinstance(changes, int):
+        if not 0 <= changes <= FULL_MASK:
+            raise ValueError(f"变爻掩码必须在 0-{FULL_MASK} 之间: {changes}")
+        return changes
+    return positions_to_mask(changes)
+
+
+def mask_to_positions(mask: int) -> List[int]:
+    """位掩码转为爻位列表（1-6，从下往上）"""
+    return [i + 1 for i in range(6) if mask >> i & 1]
+
+
+# 变卦表：CHANGE_TABLE[位编码][变爻掩码] -> 变卦的位编码
+CHANGE_TABLE: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(code ^ mask for mask in range(64)) for code in range(64)
+)
+
+
+def _double(trigram: int) -> int:
+    """经卦重叠为纯卦"""
+    return trigram | (trigram << 3)
+
+
+def _build_palace_table() -> Tuple[Tuple[int, int], ...]:
+    """京房八宫：每个位编码所属的(本宫经卦编码, 世数)
+
+    世数 0 为本宫纯卦，1-5 为一世至五世，6 为游魂，7 为归魂。
+    """
+    table: List[Tuple[int, int]] = [(0, 0)] * 64
+    for palace in range(8):
+        code = _double(palace)
+        table[code] = (palace, 0)
+        for generation in range(1, 6):
+            code ^= 1 << (generation - 1)  # 自初爻起逐爻变
+            table[code] = (palace, generation)
+        code ^= 1 << 3  # 游魂：四爻复原
+        table[code] = (palace, 6)
+        code ^= TRIGRAM_MASK  # 归魂：内卦复归本宫
+        table[code] = (palace, 7)
+    return tuple(table)
+
+
+PALACE_TABLE = _build_palace_table()
+
+
+class RelationKind(IntEnum):
+    """卦象关系的种类，用作关系表的列下标"""
+
+    CUO = 0  # 错卦：阴阳全反
+    ZONG = 1  # 综卦：上下颠倒
+    FAN = 2  # 反卦：上下卦互换
+    HU = 3  # 互卦：234爻为下卦，345爻为上卦
+    SHANG_HU = 4  # 上互卦：345爻所成经卦之纯卦
+    XIA_HU = 5  # 下互卦：234爻所成经卦之纯卦
+    FU = 6  # 伏卦：八纯卦伏其错卦，其余伏本宫纯卦
+
+
+def _relation_codes(code: int) -> Tuple[int, ...]:
+    """用位运算求一卦的全部关系卦编码，按 RelationKind 排列"""
+    lower = code & TRIGRAM_MASK
+    upper = code >> 3
+    hu_lower = (code >> 1) & TRIGRAM_MASK
+    hu_upper = (code >> 2) & TRIGRAM_MASK
+    palace, generation = PALACE_TABLE[code]
+    return (
+        code ^ FULL_MASK,
+        _REVERSED_CODES[code],
+        (lower << 3) | upper,
+        hu_lower | (hu_upper << 3),
+        _double(hu_upper),
+        _double(hu_lower),
+        code ^ FULL_MASK if generation == 0 else _double(palace),
+    )
+
+
+# 关系表：RELATION_TABLE[位编码][RelationKind] -> 关系卦的位编码
+RELATION_TABLE: Tuple[Tuple[int, ...], ...] = tuple(
+    _relation_codes(code) for code in range(64)
+)
 
 
 class YaoType(Enum):
@@ -15,9 +159,11 @@ class YaoType(Enum):
     YIN = 0  # 阴爻 - -
 
 
-@dataclass
+@dataclass(frozen=True)
 class Yao:
-    """爻"""
+    """爻（不可变，同一爻在进程内只保留一个实例，可在多个会话间共享）"""
+
+    __slots__ = ("position", "yao_type", "text", "xiang")
 
     position: int  # 位置 1-6 (从下往上)
     yao_type: YaoType
@@ -27,7 +173,7 @@ class Yao:
     def flip(self) -> "Yao":
         """翻转阴阳"""
         new_type = YaoType.YIN if self.yao_type == YaoType.YANG else YaoType.YANG
-        return Yao(self.position, new_type, self.text, self.xiang)
+        return _intern_yao(self.position, new_type, self.text, self.xiang)
 
     @property
     def is_yang(self) -> bool:
@@ -38,89 +184,154 @@ class Yao:
         return "—" if self.is_yang else "- -"
 
 
-@dataclass
+# 爻的享元池：(位置, 阴阳, 爻辞, 象曰) -> 唯一实例
+_YAO_POOL: Dict[Tuple[int, YaoType, str, str], Yao] = {}
+
+
+def _intern_yao(position: int, yao_type: YaoType, text: str, xiang: str) -> Yao:
+    """取得爻的唯一实例，不存在时创建"""
+    key = (position, yao_type, text, xiang)
+    yao = _YAO_POOL.get(key)
+    if yao is None:
+        yao = _YAO_POOL.setdefault(key, Yao(position, yao_type, text, xiang))
+    return yao
+
+
+@dataclass(frozen=True, eq=False)
 class Gua:
-    """卦"""
+    """卦（不可变，每卦只有一个实例，按对象身份比较与哈希）
+
+    卦的结构（卦序、卦名、上下卦、位编码）在初始化时即可用；
+    卦辞、彖、象与爻辞在首次访问时才按卦加载并缓存，见 GuaTexts。
+    """
+
+    __slots__ = ("index", "name", "chinese_name", "upper_gua", "lower_gua", "code")
 
     index: int  # 卦序 1-64
     name: str  # 卦名
     chinese_name: str  # 中文名
-    description: str  # 卦辞
-    xiang: str  # 象曰
-    tuan: str  # 彖曰
-    yaos: List[Yao]  # 六爻
     upper_gua: str  # 上卦（外卦）
     lower_gua: str  # 下卦（内卦）
+    code: int  # 位编码 0-63，第1爻为最低位
+
+    @property
+    def texts(self) -> "GuaTexts":
+        """卦的全部文本（首次访问时加载并缓存）"""
+        return _load_texts(self)
+
+    @property
+    def description(self) -> str:
+        """卦辞"""
+        return _load_texts(self).description
+
+    @property
+    def xiang(self) -> str:
+        """象曰"""
+        return _load_texts(self).xiang
+
+    @property
+    def tuan(self) -> str:
+        """彖曰"""
+        return _load_texts(self).tuan
+
+    @property
+    def yaos(self) -> Tuple[Yao, ...]:
+        """六爻（从初爻到上爻）"""
+        return _load_texts(self).yaos
 
     @property
     def binary_code(self) -> str:
         """返回二进制编码，从下往上"""
-        return "".join(["1" if y.is_yang else "0" for y in self.yaos])
+        return _CODE_TO_BINARY[self.code]
+
+    @property
+    def lower_code(self) -> int:
+        """下卦（内卦）的三位编码"""
+        return self.code & TRIGRAM_MASK
+
+    @property
+    def upper_code(self) -> int:
+        """上卦（外卦）的三位编码"""
+        return self.code >> 3
 
     @property
     def short_names(self) -> List[str]:
         """返回简称列表，用于搜索"""
         names = [self.name, self.chinese_name]
         # 添加卦象组合名称，如"水天需"
-        trigram_names = {
-            "qian": "天",
-            "kun": "地",
-            "zhen": "雷",
-            "gen": "山",
-            "kan": "水",
-            "li": "火",
-            "xun": "风",
-            "dui": "泽",
-        }
-        combo = trigram_names.get(self.upper_gua, "") + trigram_names.get(
-            self.lower_gua, ""
+        combo = (
+            TRIGRAMS[self.upper_gua]["attribute"]
+            + TRIGRAMS[self.lower_gua]["attribute"]
         )
         if combo:
             names.append(combo + self.name)
             names.append(combo)
         return names
 
-    def get_changed_gua(self, changed_positions: List[int]) -> "Gua":
-        """根据变爻位置得到变卦"""
-        new_yaos = []
-        for yao in self.yaos:
-            if yao.position in changed_positions:
-                new_yaos.append(yao.flip())
-            else:
-                new_yaos.append(yao)
+    def get_changed_gua(self, changed_positions: Union[Iterable[int], int]) -> "Gua":
+        """根据变爻得到变卦
+
+        Args:
+            changed_positions: 变爻位置列表（1-6），或变爻位掩码（0-63）
 
-        # 创建新卦（临时，需要查找对应的卦）
-        binary = "".join(["1" if y.is_yang else "0" for y in new_yaos])
-        return binary_to_gua(binary)
+        Raises:
+            TypeError: 传入布尔值
+            ValueError: 变爻位置不在 1-6 之间，或掩码不在 0-63 之间
+        """
+        mask = changes_to_mask(changed_positions)
+        return _get_registry().by_code[CHANGE_TABLE[self.code][mask]]
+
+    def get_hu_gua(self) -> "Gua":
+        """获取互卦（234爻为下卦，345爻为上卦）"""
+        return _get_registry().relations[self.code].hu
 
     def get_shang_hu_gua(self) -> "Gua":
-        """获取上互卦（取345爻为上卦）"""
-        # 345爻对应索引 2, 3, 4
-        binary = "".join(["1" if self.yaos[i].is_yang else "0" for i in range(2, 5)])
-        return binary_to_gua(binary)
+        """获取上互卦（345爻所成经卦，以其纯卦表示）"""
+        return _get_registry().relations[self.code].shang_hu
 
     def get_xia_hu_gua(self) -> "Gua":
-        """获取下互卦（取234爻为下卦）"""
-        # 234爻对应索引 1, 2, 3
-        binary = "".join(["1" if self.yaos[i].is_yang else "0" for i in range(1, 4)])
-        return binary_to_gua(binary)
+        """获取下互卦（234爻所成经卦，以其纯卦表示）"""
+        return _get_registry().relations[self.code].xia_hu
+
+    def get_fu_gua(self) -> "Gua":
+        """获取伏卦"""
+        return _get_registry().relations[self.code].fu
 
     def get_fan_gua(self) -> "Gua":
         """获取反卦（上下卦互换）"""
-        lower_binary = "".join(["1" if y.is_yang else "0" for y in self.yaos[:3]])
-        upper_binary = "".join(["1" if y.is_yang else "0" for y in self.yaos[3:]])
-        binary = upper_binary + lower_binary
-        return binary_to_gua(binary)
+        return _get_registry().relations[self.code].fan
 
     def get_dui_gua(self) -> "Gua":
         """获取对卦（错卦，阴阳全反）"""
-        binary = "".join(["0" if y.is_yang else "1" for y in self.yaos])
-        return binary_to_gua(binary)
+        return _get_registry().relations[self.code].cuo
 
     def get_zong_gua(self) -> "Gua":
         """获取综卦（上下颠倒）"""
-        binary = "".join(["1" if y.is_yang else "0" for y in reversed(self.yaos)])
-        return binary_to_gua(binary)
+        return _get_registry().relations[self.code].zong
+
+
+@dataclass(frozen=True)
+class GuaTexts:
+    """一卦的文本"""
+
+    __slots__ = ("description", "xiang", "tuan", "yaos")
+
+    description: str  # 卦辞
+    xiang: str  # 象曰
+    tuan: str  # 彖曰
+    yaos: Tuple[Yao, ...]  # 六爻
+
+
+class GuaRelations(NamedTuple):
+    """一卦的全部关系卦，字段顺序与 RelationKind 一致"""
+
+    cuo: Gua  # 错卦
+    zong: Gua  # 综卦
+    fan: Gua  # 反卦
+    hu: Gua  # 互卦
+    shang_hu: Gua  # 上互卦
+    xia_hu: Gua  # 下互卦
+    fu: Gua  # 伏卦
 
 
 # 数字到八卦的映射（用于数字定位）
@@ -195,6 +406,54 @@ TRIGRAMS = {
     },
 }
 
+# 八卦名称与三位编码的互查
+TRIGRAM_CODES: Dict[str, int] = {
+    key: binary_to_code(info["binary"]) for key, info in TRIGRAMS.items()
+}
+TRIGRAM_BY_CODE: Tuple[str, ...] = tuple(
+    sorted(TRIGRAM_CODES, key=TRIGRAM_CODES.__getitem__)
+)
+
+# 后天八卦洛书数：一坎二坤三震四巽，五居中宫寄坤，六乾七兑八艮九离
+LUOSHU_TO_TRIGRAM = {
+    1: "kan",  # 坎
+    2: "kun",  # 坤
+    3: "zhen",  # 震
+    4: "xun",  # 巽
+    5: "kun",  # 中五寄坤
+    6: "qian",  # 乾
+    7: "dui",  # 兑
+    8: "gen",  # 艮
+    9: "li",  # 离
+}
+
+
+class NumberingScheme(Enum):
+    """数字定位的编号方式"""
+
+    XIANTIAN = "xiantian"  # 先天数：1乾2兑3离4震5巽6坎7艮8坤
+    HOUTIAN = "houtian"  # 后天洛书数：1-9，五寄坤
+    MOD8 = "mod8"  # 任意整数除以8取余，按先天数取卦，余0作8
+
+
+def _build_number_table(mapping: Dict[int, str]) -> Tuple[Tuple[int, ...], ...]:
+    """数字对照表 -> [上卦数][下卦数] 的位编码表，无效数字为 -1"""
+    codes = [
+        TRIGRAM_CODES[mapping[n]] if n in mapping else -1
+        for n in range(max(mapping) + 1)
+    ]
+    return tuple(
+        tuple(-1 if upper < 0 or lower < 0 else lower | (upper << 3) for lower in codes)
+        for upper in codes
+    )
+
+
+# 按编号方式预先生成的数字 -> 卦位编码表，查卦只需一次下标访问
+_NUMBER_TABLES = {
+    NumberingScheme.XIANTIAN: _build_number_table(NUMBER_TO_TRIGRAM),
+    NumberingScheme.HOUTIAN: _build_number_table(LUOSHU_TO_TRIGRAM),
+}
+
 # 64卦数据
 GUA_DATA = [
     # 乾宫
@@ -377,14 +636,135 @@ GUA_DATA = [
 ]
 
 
-# 尝试导入完整数据
-try:
-    from yijing_full_data import YIJING_DATA
+# 完整数据按需导入：yijing_full_data 体积较大，首次需要文本时才导入
+HAS_FULL_DATA = importlib.util.find_spec("yijing_full_data") is not None
+_full_data: Optional[Dict[str, dict]] = None
+
+
+def _get_full_data() -> Dict[str, dict]:
+    """取得完整数据，首次调用时导入"""
+    global _full_data
+    if _full_data is None:
+        try:
+            from yijing_full_data import YIJING_DATA as data
+        except ImportError:
+            data = {}
+        _full_data = data
+    return _full_data
+
 
-    HAS_FULL_DATA = True
-except ImportError:
-    HAS_FULL_DATA = False
-    YIJING_DATA = {}
+def __getattr__(name: str):
+    """模块级惰性属性
+
+    YIJING_DATA 在访问时才导入完整数据；ALL_GUAS、GUA_MAP 转发到共享的
+    GuaRegistry，任何时候导入得到的都是同一份不可变数据。
+    """
+    if name == "YIJING_DATA":
+        return _get_full_data()
+    if name == "ALL_GUAS":
+        return _get_registry().guas
+    if name == "GUA_MAP":
+        return _get_registry().by_binary
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# 文本缓存：卦序 -> 该卦的文本
+_TEXT_CACHE: Dict[int, GuaTexts] = {}
+
+
+# 编译好的二进制语料（见 gua_corpus.py），首次需要文本时映射；不可用时为 False
+_corpus: Union[Corpus, bool, None] = None
+
+
+def _get_corpus() -> Optional[Corpus]:
+    """取得周易语料，文件缺失或格式不符时返回 None"""
+    global _corpus
+    if _corpus is None:
+        try:
+            corpus = Corpus(YIJING_CORPUS_PATH)
+        except (OSError, ValueError):
+            corpus = None
+        if corpus is not None and (
+            corpus.record_count != 64 or corpus.slot_count != len(YIJING_SLOTS)
+        ):
+            corpus = None
+        _corpus = corpus or False
+    return _corpus or None
+
+
+def _build_texts(gua: Gua) -> GuaTexts:
+    """从语料、完整数据或内置数据中取出一卦的文本"""
+    corpus = _get_corpus()
+    if corpus is not None:
+        # 语料按卦序存放，只解码这一卦的各段文本
+        record = corpus.get_record(gua.index - 1)
+        gua_data = {
+            "description": record[0],
+            "tuan": record[1],
+            "xiang": record[2],
+            "yaos": [
+                {"text": record[3 + 2 * pos], "xiang": record[4 + 2 * pos]}
+                for pos in range(6)
+            ],
+        }
+    else:
+        # 其次从 YIJING_DATA 获取完整数据（卦名用字可能不同，如遁/遯，再按卦序查找）
+        full_data = _get_full_data()
+        gua_data = full_data.get(gua.name)
+        if gua_data is None:
+            for data in full_data.values():
+                if data["index"] == gua.index:
+                    gua_data = data
+                    break
+
+    if gua_data is None:
+        # 从 GUA_DATA 查找
+        for gd in GUA_DATA:
+            if gd["index"] == gua.index:
+                gua_data = gd
+                break
+
+    # 如果没找到，使用默认值
+    if gua_data is None:
+        gua_data = {
+            "description": f"{gua.name}卦辞",
+            "xiang": f"{gua.name}之象",
+            "tuan": f"{gua.name}之彖",
+            "yaos": [
+                {"text": f"{gua.name}第{pos + 1}爻", "xiang": ""} for pos in range(6)
+            ],
+        }
+
+    # 注意：爻辞是从初爻到上爻，pos=0是初爻
+    yaos = tuple(
+        _intern_yao(
+            pos + 1,
+            YaoType.YANG if gua.code >> pos & 1 else YaoType.YIN,
+            gua_data["yaos"][pos]["text"],
+            gua_data["yaos"][pos]["xiang"],
+        )
+        for pos in range(6)
+    )
+    return GuaTexts(
+        description=gua_data["description"],
+        xiang=gua_data["xiang"],
+        tuan=gua_data["tuan"],
+        yaos=yaos,
+    )
+
+
+def _load_texts(gua: Gua) -> GuaTexts:
+    """取得一卦的文本，首次访问时加载并缓存"""
+    texts = _TEXT_CACHE.get(gua.index)
+    if texts is None:
+        texts = _TEXT_CACHE.setdefault(gua.index, _build_texts(gua))
+    return texts
+
+
+def preload_texts():
+    """预先加载全部64卦的文本（如服务启动时预热）"""
+    for gua in _get_registry().guas:
+        _load_texts(gua)
 
 
 # 初始化完整的64卦数据
@@ -462,150 +842,154 @@ def init_gua_data() -> List[Gua]:
         ("010101", "未济", "火水未济", "li", "kan"),
     ]
 
-    # 使用 GUA_DATA 或 YIJING_DATA 中的真实数据
+    # 只创建卦的结构，文本在首次访问时由 _load_texts 加载
     for i, (binary, name, chinese_name, upper, lower) in enumerate(gua_patterns, 1):
-        # 优先从 YIJING_DATA 获取完整数据
-        gua_data = None
-        if HAS_FULL_DATA and name in YIJING_DATA:
-            gua_data = YIJING_DATA[name]
-        else:
-            # 从 GUA_DATA 查找
-            for gd in GUA_DATA:
-                if gd["index"] == i:
-                    gua_data = gd
-                    break
-
-        # 如果没找到，使用默认值
-        if gua_data is None:
-            gua_data = {
-                "description": f"{name}卦辞",
-                "xiang": f"{name}之象",
-                "tuan": f"{name}之彖",
-                "yaos": [
-                    {"text": f"{name}第{pos + 1}爻", "xiang": ""} for pos in range(6)
-                ],
-            }
-
-        yaos = []
-        for pos in range(6):
-            is_yang = binary[pos] == "1"
-            yao_type = YaoType.YANG if is_yang else YaoType.YIN
-
-            # 获取爻辞（注意：GUA_DATA中的爻辞是从初爻到上爻，pos=0是初爻）
-            yao_text = gua_data["yaos"][pos]["text"]
-            yao_xiang = gua_data["yaos"][pos]["xiang"]
-
-            yaos.append(
-                Yao(
-                    position=pos + 1,
-                    yao_type=yao_type,
-                    text=yao_text,
-                    xiang=yao_xiang,
-                )
-            )
-
         gua = Gua(
             index=i,
             name=name,
             chinese_name=chinese_name,
-            description=gua_data["description"],
-            xiang=gua_data["xiang"],
-            tuan=gua_data["tuan"],
-            yaos=yaos,
             upper_gua=upper,
             lower_gua=lower,
+            code=binary_to_code(binary),
         )
         gua_list.append(gua)
 
     return gua_list
 
 
-# 全局卦象数据
-ALL_GUAS: List[Gua] = []
-GUA_MAP: Dict[str, Gua] = {}  # 二进制编码到卦的映射
+@dataclass(frozen=True)
+class GuaRegistry:
+    """64卦数据注册表
 
+    进程内只构建一次（见 get_registry），之后不可变，在各会话、线程间共享。
+    """
 
-def init_data():
-    """初始化数据"""
-    global ALL_GUAS, GUA_MAP
-    ALL_GUAS = init_gua_data()
-    GUA_MAP = {gua.binary_code: gua for gua in ALL_GUAS}
+    guas: Tuple[Gua, ...]  # 按卦序排列的64卦
+    by_binary: Mapping[str, Gua]  # 二进制编码到卦的映射（只读）
+    by_code: Tuple[Gua, ...]  # 位编码到卦的映射，下标即位编码
+    relations: Tuple[GuaRelations, ...]  # 位编码到关系卦的映射
+
+    @classmethod
+    def build(cls) -> "GuaRegistry":
+        """构建注册表"""
+        guas = tuple(init_gua_data())
+        by_code: List[Optional[Gua]] = [None] * 64
+        for gua in guas:
+            by_code[gua.code] = gua
+        relations = tuple(
+            GuaRelations(*(by_code[c] for c in RELATION_TABLE[code]))
+            for code in range(64)
+        )
+        return cls(
+            guas=guas,
+            by_binary=MappingProxyType({gua.binary_code: gua for gua in guas}),
+            by_code=tuple(by_code),
+            relations=relations,
+        )
 
 
-def binary_to_gua(binary: str) -> Gua:
-    """根据二进制编码获取卦"""
-    if not GUA_MAP:
-        init_data()
-    return GUA_MAP.get(binary, ALL_GUAS[0])
+_registry: Optional[GuaRegistry] = None
+_registry_lock = threading.Lock()
 
 
-def search_gua(query: str) -> List[Gua]:
-    """搜索卦象"""
-    if not ALL_GUAS:
-        init_data()
+def get_registry() -> GuaRegistry:
+    """取得共享的注册表，首次调用时在锁内构建"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = GuaRegistry.build()
+    return _registry
 
-    query = query.lower().strip()
-    # 去掉"卦"字后缀，方便搜索"夬卦"也能找到"夬"
-    query_without_gua = query.rstrip("卦")
-    results = []
 
-    for gua in ALL_GUAS:
-        # 搜索卦名（支持"夬"和"夬卦"）
-        if query in gua.name or query in gua.chinese_name:
-            results.append(gua)
-            continue
+def _get_registry() -> GuaRegistry:
+    """热路径上的注册表访问：已构建时直接返回"""
+    return _registry or get_registry()
 
-        # 去掉"卦"字后的搜索
-        if query_without_gua and query_without_gua != query:
-            if query_without_gua in gua.name or query_without_gua in gua.chinese_name:
-                results.append(gua)
-                continue
 
-        # 搜索简称（如"水天"）
-        for short_name in gua.short_names:
-            if query in short_name:
-                results.append(gua)
-                break
+def init_data() -> GuaRegistry:
+    """初始化数据（可重复调用，只在首次调用时构建）"""
+    return get_registry()
+
+
+def get_relations(gua: Gua) -> GuaRelations:
+    """获取一卦的全部关系卦（预先计算，直接查表）"""
+    return _get_registry().relations[gua.code]
+
 
-    return results
+def binary_to_gua(binary: Union[str, int]) -> Gua:
+    """根据二进制编码获取卦
+
+    Args:
+        binary: 二进制字符串（从下往上，如"111010"）或位编码（0-63）
+
+    Returns:
+        对应的卦，编码无效时返回乾卦
+    """
+    registry = _get_registry()
+    if isinstance(binary, int):
+        if 0 <= binary <= FULL_MASK:
+            return registry.by_code[binary]
+        return registry.guas[0]
+    return registry.by_binary.get(binary, registry.guas[0])
+
+
+def search_gua(query: str, fuzzy: bool = False) -> List[Gua]:
+    """搜索卦象
+
+    查询预先建立的索引（见 gua_search.py），支持卦名、卦象组合（如"水天"）、
+    卦序、拼音与异体字，结果按匹配程度排序。
+    fuzzy 为 True 时还会纠正同音/形近错字（如"小蓄"、"筮嗑"），
+    并按编辑距离补充至多数个相近的卦作为建议。
+    """
+    from gua_search import get_search_index
+
+    if fuzzy:
+        return get_search_index().fuzzy_search(query)
+    return get_search_index().search(query)
 
 
 def get_gua_by_index(index: int) -> Optional[Gua]:
     """根据序号获取卦"""
-    if not ALL_GUAS:
-        init_data()
     if 1 <= index <= 64:
-        return ALL_GUAS[index - 1]
+        return _get_registry().guas[index - 1]
     return None
 
 
-def get_gua_by_numbers(upper_num: int, lower_num: int) -> Optional[Gua]:
+def get_gua_by_numbers(
+    upper_num: int,
+    lower_num: int,
+    scheme: NumberingScheme = NumberingScheme.XIANTIAN,
+) -> Optional[Gua]:
     """根据上下卦数字查找卦象
 
     Args:
-        upper_num: 上卦数字 (1-8)
-        lower_num: 下卦数字 (1-8)
+        upper_num: 上卦数字（先天数1-8，后天数1-9，取余方式为任意整数）
+        lower_num: 下卦数字
+        scheme: 编号方式，默认先天数
 
     Returns:
         匹配的卦象，未找到返回None
     """
-    if not ALL_GUAS:
-        init_data()
+    if scheme is NumberingScheme.MOD8:
+        upper_num = upper_num % 8 or 8
+        lower_num = lower_num % 8 or 8
+        table = _NUMBER_TABLES[NumberingScheme.XIANTIAN]
+    else:
+        table = _NUMBER_TABLES[scheme]
 
     # 验证输入
-    if upper_num not in NUMBER_TO_TRIGRAM or lower_num not in NUMBER_TO_TRIGRAM:
+    if not (0 <= upper_num < len(table) and 0 <= lower_num < len(table)):
         return None
 
-    upper_trigram = NUMBER_TO_TRIGRAM[upper_num]
-    lower_trigram = NUMBER_TO_TRIGRAM[lower_num]
-
-    # 查找匹配的卦
-    for gua in ALL_GUAS:
-        if gua.upper_gua == upper_trigram and gua.lower_gua == lower_trigram:
-            return gua
-
-    return None
+    code = table[upper_num][lower_num]
+    if code < 0:
+        return None
+    return _get_registry().by_code[code]
 
 
-# 初始化
-init_data()
+def get_gua_by_trigrams(upper: str, lower: str) -> Optional[Gua]:
+    """根据上下卦名称（如 "kan"、"qian"）查找卦象"""
+    if upper not in TRIGRAM_CODES or lower not in TRIGRAM_CODES:
+        return None
+    return _get_registry().by_code[TRIGRAM_CODES[lower] | (TRIGRAM_CODES[upper] << 3)]
@@ -0,0 +1,147 @@
+"""
+周易学习程序 - 卦图
+64卦在"变一爻"之下构成六维超立方体。本模块预先算出任意两卦之间的
+最短距离矩阵与下一跳矩阵（64×64）以及邻接表，查询路径只需按下一跳表逐步走。
+
+除六种变爻外，还可把错卦、综卦当作一步（各步可设不同代价），
+得到带权的变体；同一组走法只构建一次。
+"""
+
+import heapq
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from gua_data import RELATION_TABLE, Gua, RelationKind, get_registry
+
+# 代价之和的上限（距离矩阵按字节存放）
+_MAX_DISTANCE = 255
+
+
+class Move(NamedTuple):
+    """一步走法：翻转若干爻（mask），或取某种关系卦（kind）"""
+
+    label: str
+    mask: int = 0
+    kind: Optional[RelationKind] = None
+    cost: int = 1
+
+    def apply(self, code: int) -> int:
+        """对位编码施行这一步"""
+        if self.kind is not None:
+            return RELATION_TABLE[code][self.kind]
+        return code ^ self.mask
+
+
+# 变初爻……变上爻
+LINE_MOVES: Tuple[Move, ...] = tuple(
+    Move(f"变{'初二三四五上'[i]}爻", mask=1 << i) for i in range(6)
+)
+CUO_MOVE = Move("错", kind=RelationKind.CUO)
+ZONG_MOVE = Move("综", kind=RelationKind.ZONG)
+
+# 常用的走法组合
+HYPERCUBE_MOVES = LINE_MOVES
+CUO_ZONG_MOVES = LINE_MOVES + (CUO_MOVE, ZONG_MOVE)
+
+
+class Step(NamedTuple):
+    """路径中的一步：所用走法与走到的卦"""
+
+    move: Move
+    gua: Gua
+
+
+class HexagramGraph:
+    """卦图：预先算好的距离、下一跳与邻接表
+
+    Attributes:
+        moves: 允许的走法
+        neighbors: neighbors[code] 为 (走法下标, 相邻卦编码) 元组
+        distances: distances[a][b] 为从 a 到 b 的最小代价
+        next_hops: next_hops[a][b] 为从 a 走向 b 时下一步到达的卦编码
+        next_moves: next_moves[a][b] 为从 a 走向 b 时下一步所用走法的下标
+    """
+
+    def __init__(self, moves: Sequence[Move] = HYPERCUBE_MOVES):
+        self.moves: Tuple[Move, ...] = tuple(moves)
+        self.neighbors: Tuple[Tuple[Tuple[int, int], ...], ...] = tuple(
+            tuple(
+                (i, move.apply(code))
+                for i, move in enumerate(self.moves)
+                if move.apply(code) != code
+            )
+            for code in range(64)
+        )
+
+        distances, next_hops, next_moves = [], [], []
+        for source in range(64):
+            dist, hop, move = self._shortest_paths(source)
+            distances.append(bytes(dist))
+            next_hops.append(bytes(hop))
+            next_moves.append(bytes(move))
+        self.distances: Tuple[bytes, ...] = tuple(distances)
+        self.next_hops: Tuple[bytes, ...] = tuple(next_hops)
+        self.next_moves: Tuple[bytes, ...] = tuple(next_moves)
+
+    def _shortest_paths(self, source: int):
+        """单源最短路（Dijkstra）
+
+        堆按 (代价, 第一步走法下标, 卦编码) 排序，代价相同时第一步用下标小的走法，
+        例如只用变爻时总是先变较低的爻。
+        """
+        dist = [_MAX_DISTANCE] * 64
+        hop = [source] * 64
+        move = [0] * 64
+        dist[source] = 0
+        heap = [(0, -1, source)]
+        while heap:
+            d, _, code = heapq.heappop(heap)
+            if d > dist[code]:
+                continue
+            for index, neighbor in self.neighbors[code]:
+                nd = d + self.moves[index].cost
+                if nd < dist[neighbor]:
+                    dist[neighbor] = nd
+                    if code == source:
+                        hop[neighbor], move[neighbor] = neighbor, index
+                    else:
+                        hop[neighbor], move[neighbor] = hop[code], move[code]
+                    heapq.heappush(heap, (nd, move[neighbor], neighbor))
+        if max(dist) >= _MAX_DISTANCE:
+            raise ValueError("走法不足以连通64卦，或代价过大")
+        return dist, hop, move
+
+    def distance(self, start: Gua, end: Gua) -> int:
+        """两卦之间的最小代价（只用变爻时即不同爻的个数）"""
+        return self.distances[start.code][end.code]
+
+    def steps(self, start: Gua, end: Gua) -> List[Step]:
+        """从 start 到 end 的最短路径，逐步列出所用走法与到达的卦"""
+        by_code = get_registry().by_code
+        code, target = start.code, end.code
+        result = []
+        while code != target:
+            move = self.moves[self.next_moves[code][target]]
+            code = self.next_hops[code][target]
+            result.append(Step(move, by_code[code]))
+        return result
+
+    def path(self, start: Gua, end: Gua) -> List[Gua]:
+        """从 start 到 end 的最短路径（含起点与终点）"""
+        return [start] + [step.gua for step in self.steps(start, end)]
+
+
+_graphs: Dict[Tuple[Move, ...], HexagramGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def get_graph(moves: Sequence[Move] = HYPERCUBE_MOVES) -> HexagramGraph:
+    """取得某组走法的卦图，每组走法只构建一次"""
+    key = tuple(moves)
+    graph = _graphs.get(key)
+    if graph is None:
+        with _graphs_lock:
+            graph = _graphs.get(key)
+            if graph is None:
+                graph = _graphs[key] = HexagramGraph(key)
+    return graph
@@ -0,0 +1,153 @@
+"""
+周易学习程序 - 占断
+按朱熹《易学启蒙·考变占》的规则，由本卦与变爻决定所占之辞：
+
+    六爻不变，占本卦卦辞；
+    一爻变，以本卦变爻辞占；
+    二爻变，以本卦二变爻辞占，以上爻为主；
+    三爻变，占本卦及之卦卦辞，以本卦为贞，之卦为悔；
+    四爻变，以之卦二不变爻辞占，以下爻为主；
+    五爻变，以之卦不变爻辞占；
+    六爻全变，乾坤占用九、用六，余卦占之卦卦辞。
+
+结果只取决于 (本卦, 变爻掩码)，全部 64 × 64 种首次使用时一次算出，之后查表。
+"""
+
+import threading
+from enum import Enum
+from typing import Iterable, NamedTuple, Optional, Tuple, Union
+
+from gua_data import Gua, changes_to_mask, get_registry
+
+# 乾坤六爻皆变时所用之辞：位编码 -> (名称, 辞, 象曰)
+USE_TEXTS = {
+    0b111111: ("用九", "见群龙无首，吉。", "用九，天德不可为首也。"),
+    0b000000: ("用六", "利永贞。", "用六永贞，以大终也。"),
+}
+
+
+class TextKind(Enum):
+    """所占之辞的种类"""
+
+    JUDGMENT = "卦辞"
+    LINE = "爻辞"
+    USE = "用辞"  # 用九、用六
+
+
+def line_name(gua: Gua, position: int) -> str:
+    """爻题，如初九、六二、上六"""
+    number = "九" if gua.code >> (position - 1) & 1 else "六"
+    if position == 1:
+        return "初" + number
+    if position == 6:
+        return "上" + number
+    return number + "一二三四五六"[position - 1]
+
+
+class TextRef(NamedTuple):
+    """一条所占之辞：哪一卦的卦辞、某爻爻辞或用九用六"""
+
+    gua: Gua
+    kind: TextKind
+    position: int = 0  # 爻辞的爻位（1-6），其余为0
+
+    @property
+    def label(self) -> str:
+        """标题，如：乾 九二、坤 卦辞、乾 用九"""
+        if self.kind is TextKind.LINE:
+            return f"{self.gua.name} {line_name(self.gua, self.position)}"
+        if self.kind is TextKind.USE:
+            return f"{self.gua.name} {USE_TEXTS[self.gua.code][0]}"
+        return f"{self.gua.name} 卦辞"
+
+    @property
+    def text(self) -> str:
+        """辞的正文"""
+        if self.kind is TextKind.LINE:
+            return self.gua.yaos[self.position - 1].text
+        if self.kind is TextKind.USE:
+            return USE_TEXTS[self.gua.code][1]
+        return self.gua.description
+
+
+class Reading(NamedTuple):
+    """一次占断：本卦、变爻、之卦与依次所占之辞（第一条为主）"""
+
+    gua: Gua  # 本卦
+    mask: int  # 变爻掩码
+    changed: Gua  # 之卦
+    rule: str  # 所依规则
+    refs: Tuple[TextRef, ...]
+
+    @property
+    def positions(self) -> Tuple[int, ...]:
+        """所占爻辞的爻位（按 refs 的次序），供界面标出"""
+        return tuple(ref.position for ref in self.refs if ref.kind is TextKind.LINE)
+
+
+def _line_refs(gua: Gua, positions) -> Tuple[TextRef, ...]:
+    return tuple(TextRef(gua, TextKind.LINE, p) for p in positions)
+
+
+def _build_reading(gua: Gua, mask: int) -> Reading:
+    changed = gua.get_changed_gua(mask)
+    moving = [i + 1 for i in range(6) if mask >> i & 1]
+    still = [i + 1 for i in range(6) if not mask >> i & 1]
+    count = len(moving)
+    if count == 0:
+        rule = "六爻不变，占本卦卦辞"
+        refs = (TextRef(gua, TextKind.JUDGMENT),)
+    elif count == 1:
+        rule = "一爻变，以本卦变爻辞占"
+        refs = _line_refs(gua, moving)
+    elif count == 2:
+        rule = "二爻变，以本卦二变爻辞占，以上爻为主"
+        refs = _line_refs(gua, reversed(moving))
+    elif count == 3:
+        rule = "三爻变，占本卦及之卦卦辞，以本卦为贞，之卦为悔"
+        refs = (TextRef(gua, TextKind.JUDGMENT), TextRef(changed, TextKind.JUDGMENT))
+    elif count == 4:
+        rule = "四爻变，以之卦二不变爻辞占，以下爻为主"
+        refs = _line_refs(changed, still)
+    elif count == 5:
+        rule = "五爻变，以之卦不变爻辞占"
+        refs = _line_refs(changed, still)
+    elif gua.code in USE_TEXTS:
+        rule = f"六爻全变，{gua.name}占{USE_TEXTS[gua.code][0]}"
+        refs = (TextRef(gua, TextKind.USE),)
+    else:
+        rule = "六爻全变，占之卦卦辞"
+        refs = (TextRef(changed, TextKind.JUDGMENT),)
+    return Reading(gua, mask, changed, rule, refs)
+
+
+_readings: Optional[Tuple[Reading, ...]] = None
+_readings_lock = threading.Lock()
+
+
+def _get_readings() -> Tuple[Reading, ...]:
+    """全部 64 × 64 种占断，按 位编码 × 64 + 变爻掩码 排列，首次调用时在锁内生成"""
+    global _readings
+    if _readings is None:
+        with _readings_lock:
+            if _readings is None:
+                _readings = tuple(
+                    _build_reading(gua, mask)
+                    for gua in get_registry().by_code
+                    for mask in range(64)
+                )
+    return _readings
+
+
+def get_reading(gua: Gua, changing: Union[Iterable[int], int] = 0) -> Reading:
+    """取得本卦在某组变爻下的占断
+
+    Args:
+        gua: 本卦
+        changing: 变爻位置列表（1-6），或变爻位掩码（0-63）
+
+    Raises:
+        TypeError: 传入布尔值
+        ValueError: 爻位不在 1-6 之间，或掩码不在 0-63 之间
+    """
+    return _get_readings()[gua.code * 64 + changes_to_mask(changing)]
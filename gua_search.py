@@ -0,0 +1,587 @@
+"""
+周易学习程序 - 卦象搜索
+一次性为卦名、卦象组合（如"水天"、"水天需"）、卦序与拼音建立索引，
+查询时规范化输入（异体字、繁体字、"卦"后缀等）后直接查表；
+模糊搜索用同音/形近字表纠正常见错字，再用 BK 树按编辑距离给出建议；
+边输入边搜索时沿前缀树（trie）从上一次查询的节点继续往下走；
+另有覆盖卦辞、彖、象与全部爻辞的全文检索（字二元组倒排索引 + BM25 排序）
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from gua_data import Gua, get_registry
+
+# 异体字、繁体字 -> 本程序卦名用字
+VARIANT_CHARS: Dict[str, str] = {
+    "遯": "遁",
+    "亁": "乾",
+    "巛": "坤",
+    "師": "师",
+    "訟": "讼",
+    "謙": "谦",
+    "隨": "随",
+    "蠱": "蛊",
+    "臨": "临",
+    "觀": "观",
+    "賁": "贲",
+    "剝": "剥",
+    "復": "复",
+    "無": "无",
+    "頤": "颐",
+    "過": "过",
+    "離": "离",
+    "壯": "壮",
+    "晉": "晋",
+    "損": "损",
+    "漸": "渐",
+    "歸": "归",
+    "豐": "丰",
+    "兌": "兑",
+    "渙": "涣",
+    "節": "节",
+    "濟": "济",
+    "風": "风",
+    "澤": "泽",
+    "為": "为",
+    "恆": "恒",
+    "昇": "升",
+    "兊": "兑",
+}
+_VARIANT_TABLE = str.maketrans(VARIANT_CHARS)
+
+# 模糊搜索时纠正的同音字、形近字 -> 卦名用字（这些字本身不出现在卦名中）
+HOMOPHONE_CHARS: Dict[str, str] = {
+    "蓄": "畜",
+    "筮": "噬",
+    "盍": "嗑",
+    "磕": "嗑",
+    "暌": "睽",
+    "揆": "睽",
+    "垢": "姤",
+    "媾": "姤",
+    "謇": "蹇",
+    "决": "夬",
+    "囤": "屯",
+    "颂": "讼",
+    "预": "豫",
+    "太": "泰",
+    "衡": "恒",
+    "盾": "遁",
+    "进": "晋",
+    "逊": "巽",
+    "换": "涣",
+    "俘": "孚",
+}
+_HOMOPHONE_TABLE = str.maketrans(HOMOPHONE_CHARS)
+
+# 模糊搜索的默认结果数与时间预算（秒），超出预算时返回已找到的建议
+FUZZY_LIMIT = 5
+FUZZY_BUDGET = 0.005
+
+# 卦名拼音（不带声调，ü 记作 v），按卦序排列，一卦可有多种写法
+GUA_PINYIN: Tuple[Tuple[str, ...], ...] = (
+    ("qian",),
+    ("kun",),
+    ("zhun",),
+    ("meng",),
+    ("xu",),
+    ("song",),
+    ("shi",),
+    ("bi",),
+    ("xiaoxu",),
+    ("lv", "lu"),
+    ("tai",),
+    ("pi",),
+    ("tongren",),
+    ("dayou",),
+    ("qian",),
+    ("yu",),
+    ("sui",),
+    ("gu",),
+    ("lin",),
+    ("guan",),
+    ("shihe",),
+    ("bi",),
+    ("bo",),
+    ("fu",),
+    ("wuwang",),
+    ("daxu",),
+    ("yi",),
+    ("daguo",),
+    ("kan",),
+    ("li",),
+    ("xian",),
+    ("heng",),
+    ("dun",),
+    ("dazhuang",),
+    ("jin",),
+    ("mingyi",),
+    ("jiaren",),
+    ("kui",),
+    ("jian",),
+    ("xie",),
+    ("sun",),
+    ("yi",),
+    ("guai",),
+    ("gou",),
+    ("cui",),
+    ("sheng",),
+    ("kun",),
+    ("jing",),
+    ("ge",),
+    ("ding",),
+    ("zhen",),
+    ("gen",),
+    ("jian",),
+    ("guimei",),
+    ("feng",),
+    ("lv", "lu"),
+    ("xun",),
+    ("dui",),
+    ("huan",),
+    ("jie",),
+    ("zhongfu",),
+    ("xiaoguo",),
+    ("jiji",),
+    ("weiji",),
+)
+
+# 匹配等级，数值越小排序越靠前；同等级按卦序
+RANK_NAME = 0  # 与卦名完全相同
+RANK_EXACT = 1  # 与全称、卦象组合、卦序或拼音完全相同
+RANK_PREFIX = 2  # 是某个名称的前缀
+RANK_SUBSTRING = 3  # 是某个名称的一部分
+
+
+def edit_distance(a: str, b: str) -> int:
+    """两个字符串的编辑距离（Levenshtein）"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """按编辑距离组织的 BK 树，用于在词表中查找相近的词
+
+    每个节点为 [词, {距离: 子节点}]；由三角不等式，查询时只需下探
+    与查询词距离在 d±max_distance 范围内的子树。
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self._root: Optional[list] = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        if self._root is None:
+            self._root = [word, {}]
+            return
+        node = self._root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [word, {}]
+                return
+            node = child
+
+    def search(
+        self, word: str, max_distance: int, deadline: Optional[float] = None
+    ) -> List[Tuple[int, str]]:
+        """查找编辑距离不超过 max_distance 的词，返回按距离排序的 (距离, 词)
+
+        给定 deadline（time.perf_counter() 时刻）时，到时即停止，返回已找到的部分。
+        """
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            candidate, children = stack.pop()
+            distance = edit_distance(word, candidate)
+            if distance <= max_distance:
+                found.append((distance, candidate))
+            for d in range(distance - max_distance, distance + max_distance + 1):
+                child = children.get(d)
+                if child is not None:
+                    stack.append(child)
+        found.sort()
+        return found
+
+
+def normalize_query(text: str) -> str:
+    """规范化查询词：小写，去空白与连字符，异体字归一，去掉"第"前缀与"卦"后缀"""
+    text = "".join(text.lower().split()).replace("-", "").replace("ü", "v")
+    text = text.translate(_VARIANT_TABLE)
+    if text.startswith("第"):
+        text = text[1:]
+    return text.rstrip("卦")
+
+
+class TrieNode:
+    """前缀树节点：子节点与该前缀对应的排好序的结果"""
+
+    __slots__ = ("children", "results")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        self.results: Tuple[Gua, ...] = ()
+
+
+class SearchIndex:
+    """卦象搜索索引：规范化的查询词 -> 按匹配等级排好序的卦"""
+
+    def __init__(self, guas: Iterable[Gua]):
+        ranks: Dict[str, Dict[Gua, int]] = {}
+        # 完整名称 -> 卦，供模糊搜索使用
+        names: Dict[str, Dict[Gua, int]] = {}
+
+        def add(key: str, gua: Gua, rank: int):
+            entry = ranks.setdefault(key, {})
+            if rank < entry.get(gua, RANK_SUBSTRING + 1):
+                entry[gua] = rank
+
+        for gua in guas:
+            # 中文名称：卦名、全称、卦象组合，任意连续片段都可命中
+            for i, name in enumerate(gua.short_names):
+                name = normalize_query(name)
+                for start in range(len(name)):
+                    for end in range(start + 1, len(name) + 1):
+                        if start == 0 and end == len(name):
+                            rank = RANK_NAME if i == 0 else RANK_EXACT
+                        elif start == 0:
+                            rank = RANK_PREFIX
+                        else:
+                            rank = RANK_SUBSTRING
+                        add(name[start:end], gua, rank)
+                names.setdefault(name, {})[gua] = RANK_NAME if i == 0 else RANK_EXACT
+
+            # 拼音：只按前缀匹配，避免单个字母命中大量无关结果
+            for pinyin in GUA_PINYIN[gua.index - 1]:
+                for end in range(1, len(pinyin)):
+                    add(pinyin[:end], gua, RANK_PREFIX)
+                add(pinyin, gua, RANK_EXACT)
+                names.setdefault(pinyin, {}).setdefault(gua, RANK_EXACT)
+
+            # 卦序：只按完整数字匹配
+            add(str(gua.index), gua, RANK_EXACT)
+
+        self._entries: Dict[str, Tuple[Gua, ...]] = {
+            key: tuple(sorted(entry, key=lambda g: (entry[g], g.index)))
+            for key, entry in ranks.items()
+        }
+        self._names: Dict[str, Tuple[Gua, ...]] = {
+            key: tuple(sorted(entry, key=lambda g: (entry[g], g.index)))
+            for key, entry in names.items()
+        }
+        self._bk_tree = BKTree(self._names)
+
+        # 同一批键组织成前缀树，供边输入边搜索逐字下探
+        self.root = TrieNode()
+        for key, results in self._entries.items():
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, TrieNode())
+            node.results = results
+
+    def lookup(self, key: str) -> Tuple[Gua, ...]:
+        """按已规范化的查询词查表"""
+        return self._entries.get(key, ())
+
+    def search(self, query: str) -> List[Gua]:
+        """搜索卦象，结果按匹配等级与卦序排序；空查询返回空列表"""
+        return list(self._entries.get(normalize_query(query), ()))
+
+    def fuzzy_search(
+        self, query: str, limit: int = FUZZY_LIMIT, budget: float = FUZZY_BUDGET
+    ) -> List[Gua]:
+        """模糊搜索：精确结果在前，其后依次是纠正错字后的结果与编辑距离相近的卦名
+
+        精确结果全部保留，建议补足到 limit 个；编辑距离查找受 budget 秒的时间预算限制。
+        """
+        deadline = time.perf_counter() + budget
+        key = normalize_query(query)
+        results = list(self._entries.get(key, ()))
+        if not key or len(results) >= limit:
+            return results
+
+        seen = set(results)
+
+        def extend(guas: Iterable[Gua]):
+            for gua in guas:
+                if len(results) >= limit:
+                    return
+                if gua not in seen:
+                    seen.add(gua)
+                    results.append(gua)
+
+        corrected = key.translate(_HOMOPHONE_TABLE)
+        extend(self._entries.get(corrected, ()))
+
+        # 单字只纠错不找近似，否则任意单字都会与所有单字卦名相距1
+        max_distance = min(2, len(corrected) // 2)
+        if max_distance and len(results) < limit:
+            # 距离相同时，长度与查询词更接近的名称优先（如 qain -> qian）
+            candidates = sorted(
+                self._bk_tree.search(corrected, max_distance, deadline),
+                key=lambda item: (item[0], abs(len(item[1]) - len(corrected))),
+            )
+            for _, name in candidates:
+                extend(self._names[name])
+        return results
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """取得共享的搜索索引，首次调用时在锁内构建"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SearchIndex(get_registry().guas)
+    return _index
+
+
+class IncrementalSearch:
+    """边输入边搜索
+
+    记住上一次查询停在前缀树的哪个节点；新查询是上一次的延长时
+    只需从该节点走过新增的字，否则从根重新走。可在多个线程中调用。
+    """
+
+    def __init__(self, index: Optional[SearchIndex] = None):
+        self._index = index or get_search_index()
+        self._lock = threading.Lock()
+        self._key = ""
+        self._node: Optional[TrieNode] = self._index.root
+
+    def update(self, query: str) -> List[Gua]:
+        """以当前输入查询，返回与 SearchIndex.search 相同的结果"""
+        key = normalize_query(query)
+        with self._lock:
+            if key.startswith(self._key):
+                node, suffix = self._node, key[len(self._key) :]
+            else:
+                node, suffix = self._index.root, key
+            for char in suffix:
+                if node is None:
+                    break
+                node = node.children.get(char)
+            self._key, self._node = key, node
+        return list(node.results) if node is not None else []
+
+
+def fuzzy_search_gua(query: str, limit: int = FUZZY_LIMIT) -> List[Gua]:
+    """模糊搜索卦象，见 SearchIndex.fuzzy_search"""
+    return get_search_index().fuzzy_search(query, limit)
+
+
+# 全文检索的字段
+TEXT_FIELDS = ("description", "tuan", "xiang", "yao_text", "yao_xiang")
+TEXT_FIELD_LABELS = {
+    "description": "卦辞",
+    "tuan": "彖曰",
+    "xiang": "象曰",
+    "yao_text": "爻辞",
+    "yao_xiang": "小象",
+}
+
+# 分词时视为断点的标点与空白，二元组不跨越它们
+_BREAK_CHARS = frozenset("，。、；：？！“”‘’（）《》「」『』…—·,.;:?!()[] \t\n")
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class TextHit(NamedTuple):
+    """一条全文检索结果"""
+
+    gua: Gua
+    field: str  # 字段，见 TEXT_FIELDS
+    position: int  # 爻位 1-6，卦辞、彖、象为 0
+    score: float  # BM25 得分
+    spans: Tuple[Tuple[int, int], ...]  # 命中片段在原文中的 (起, 止) 偏移
+
+    @property
+    def text(self) -> str:
+        """命中的原文"""
+        return _field_text(self.gua, self.field, self.position)
+
+
+def _field_text(gua: Gua, field: str, position: int) -> str:
+    """取出一卦某字段的文本"""
+    if field == "yao_text":
+        return gua.yaos[position - 1].text
+    if field == "yao_xiang":
+        return gua.yaos[position - 1].xiang
+    return getattr(gua, field)
+
+
+def _normalize_text(text: str) -> str:
+    """全文规范化：小写、异体字归一，逐字替换，不改变长度与偏移"""
+    return text.lower().translate(_VARIANT_TABLE)
+
+
+def _terms(text: str) -> List[str]:
+    """切分出字二元组，不跨越标点；孤立的单字按单字计"""
+    terms = []
+    run_start = 0
+    for i in range(len(text) + 1):
+        if i == len(text) or text[i] in _BREAK_CHARS:
+            run = text[run_start:i]
+            if len(run) == 1:
+                terms.append(run)
+            terms.extend(run[j : j + 2] for j in range(len(run) - 1))
+            run_start = i + 1
+    return terms
+
+
+class FullTextIndex:
+    """全文检索索引：字二元组 -> [(文档号, 预先算好的 BM25 权重)]
+
+    单字查询走单字倒排表。每个文档是一卦的一个字段（爻辞、小象按爻分开）。
+    """
+
+    def __init__(self, guas: Iterable[Gua]):
+        self._docs: List[Tuple[Gua, str, int, str]] = []
+        for gua in guas:
+            for field in ("description", "tuan", "xiang"):
+                self._add_doc(gua, field, 0)
+            for yao in gua.yaos:
+                self._add_doc(gua, "yao_text", yao.position)
+                self._add_doc(gua, "yao_xiang", yao.position)
+
+        bigram_counts: List[Dict[str, int]] = []
+        unigram_counts: List[Dict[str, int]] = []
+        for _, _, _, text in self._docs:
+            bigrams: Dict[str, int] = {}
+            for term in _terms(text):
+                bigrams[term] = bigrams.get(term, 0) + 1
+            unigrams: Dict[str, int] = {}
+            for char in text:
+                if char not in _BREAK_CHARS:
+                    unigrams[char] = unigrams.get(char, 0) + 1
+            bigram_counts.append(bigrams)
+            unigram_counts.append(unigrams)
+
+        self._bigrams = self._build_postings(bigram_counts)
+        self._unigrams = self._build_postings(unigram_counts)
+
+    def _add_doc(self, gua: Gua, field: str, position: int):
+        text = _normalize_text(_field_text(gua, field, position))
+        if text:
+            self._docs.append((gua, field, position, text))
+
+    @staticmethod
+    def _build_postings(
+        counts: List[Dict[str, int]],
+    ) -> Dict[str, Tuple[Tuple[int, float], ...]]:
+        """由各文档的词频表生成倒排表，权重为该词对该文档的 BM25 贡献"""
+        doc_count = len(counts)
+        lengths = [max(sum(c.values()), 1) for c in counts]
+        avg_length = sum(lengths) / max(doc_count, 1)
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, doc_counts in enumerate(counts):
+            for term, tf in doc_counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        weighted = {}
+        for term, entries in postings.items():
+            df = len(entries)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            weighted[term] = tuple(
+                (
+                    doc_id,
+                    idf
+                    * tf
+                    * (BM25_K1 + 1)
+                    / (
+                        tf
+                        + BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avg_length)
+                    ),
+                )
+                for doc_id, tf in entries
+            )
+        return weighted
+
+    def search(self, query: str, limit: int = 20) -> List[TextHit]:
+        """全文检索，按 BM25 得分从高到低返回至多 limit 条结果"""
+        query = "".join(
+            char for char in _normalize_text(query) if char not in _BREAK_CHARS
+        )
+        if not query:
+            return []
+        if len(query) == 1:
+            terms, postings = [query], self._unigrams
+        else:
+            terms = [query[i : i + 2] for i in range(len(query) - 1)]
+            postings = self._bigrams
+
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            for doc_id, weight in postings.get(term, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        hits = []
+        for doc_id, score in ranked:
+            gua, field, position, text = self._docs[doc_id]
+            hits.append(
+                TextHit(gua, field, position, score, _find_spans(text, query, terms))
+            )
+        return hits
+
+
+def _find_spans(text: str, query: str, terms: List[str]) -> Tuple[Tuple[int, int], ...]:
+    """找出命中片段：优先整个查询词，否则各个二元组"""
+    for needles in ([query], terms):
+        spans = []
+        for needle in needles:
+            start = text.find(needle)
+            while start >= 0:
+                spans.append((start, start + len(needle)))
+                start = text.find(needle, start + 1)
+        if spans:
+            return tuple(sorted(set(spans)))
+    return ()
+
+
+_fulltext_index: Optional[FullTextIndex] = None
+_fulltext_lock = threading.Lock()
+
+
+def get_fulltext_index() -> FullTextIndex:
+    """取得共享的全文检索索引，首次调用时在锁内构建（会加载全部文本）"""
+    global _fulltext_index
+    if _fulltext_index is None:
+        with _fulltext_lock:
+            if _fulltext_index is None:
+                _fulltext_index = FullTextIndex(get_registry().guas)
+    return _fulltext_index
+
+
+def search_text(query: str, limit: int = 20) -> List[TextHit]:
+    """在卦辞、彖、象与全部爻辞中全文检索"""
+    return get_fulltext_index().search(query, limit)
@@ -0,0 +1,133 @@
+"""
+周易学习程序 - 卦序
+文王序（通行本）、伏羲先天序、京房八宫序与马王堆帛书序，
+各预先生成一张 次序 -> 位编码 的排列表与其逆表（位编码 -> 次序），
+排名、前后翻页与不同卦序之间的换算都只是查表。
+"""
+
+from enum import Enum
+from typing import Dict, Tuple
+
+from gua_data import (
+    NUMBER_TO_TRIGRAM,
+    PALACE_TABLE,
+    TRIGRAM_CODES,
+    Gua,
+    get_registry,
+)
+
+
+class Ordering(Enum):
+    """卦序"""
+
+    KING_WEN = "文王序"
+    FU_XI = "伏羲先天序"
+    PALACE = "京房八宫序"
+    MAWANGDUI = "帛书序"
+
+
+def _xiantian_codes() -> Tuple[int, ...]:
+    """先天数 1-8（乾兑离震巽坎艮坤）对应的经卦编码"""
+    return tuple(TRIGRAM_CODES[NUMBER_TO_TRIGRAM[n]] for n in range(1, 9))
+
+
+def _king_wen_order() -> Tuple[int, ...]:
+    return tuple(gua.code for gua in get_registry().guas)
+
+
+def _fu_xi_order() -> Tuple[int, ...]:
+    """伏羲先天六十四卦次序：下卦按先天数分八组，组内上卦按先天数排列"""
+    xiantian = _xiantian_codes()
+    return tuple(upper << 3 | lower for lower in xiantian for upper in xiantian)
+
+
+# 八宫次序：乾震坎艮（阳四宫），坤巽离兑（阴四宫）
+PALACE_ORDER = ("qian", "zhen", "kan", "gen", "kun", "xun", "li", "dui")
+
+
+def _palace_order() -> Tuple[int, ...]:
+    """京房八宫次序：各宫依本宫、一世至五世、游魂、归魂排列"""
+    rank = {TRIGRAM_CODES[key]: i for i, key in enumerate(PALACE_ORDER)}
+    return tuple(
+        sorted(
+            range(64),
+            key=lambda code: (rank[PALACE_TABLE[code][0]], PALACE_TABLE[code][1]),
+        )
+    )
+
+
+# 帛书上卦次序：键（乾）根（艮）赣（坎）辰（震）川（坤）夺（兑）罗（离）筭（巽）
+MAWANGDUI_UPPER = ("qian", "gen", "kan", "zhen", "kun", "dui", "li", "xun")
+# 帛书下卦次序：乾坤艮兑坎离震巽
+MAWANGDUI_LOWER = ("qian", "kun", "gen", "dui", "kan", "li", "zhen", "xun")
+
+
+def _mawangdui_order() -> Tuple[int, ...]:
+    """马王堆帛书次序：上卦分八组，每组先列纯卦，再按下卦次序列其余七卦"""
+    order = []
+    for upper_key in MAWANGDUI_UPPER:
+        upper = TRIGRAM_CODES[upper_key]
+        order.append(upper << 3 | upper)
+        for lower_key in MAWANGDUI_LOWER:
+            if lower_key != upper_key:
+                order.append(upper << 3 | TRIGRAM_CODES[lower_key])
+    return tuple(order)
+
+
+def _invert(order: Tuple[int, ...]) -> bytes:
+    inverse = bytearray(64)
+    for position, code in enumerate(order):
+        inverse[code] = position
+    return bytes(inverse)
+
+
+# 卦序 -> 排列表（第 i 个为位编码，i 从0开始）
+ORDERS: Dict[Ordering, Tuple[int, ...]] = {
+    Ordering.KING_WEN: _king_wen_order(),
+    Ordering.FU_XI: _fu_xi_order(),
+    Ordering.PALACE: _palace_order(),
+    Ordering.MAWANGDUI: _mawangdui_order(),
+}
+
+# 卦序 -> 逆表（位编码 -> 从0开始的次序）
+RANKS: Dict[Ordering, bytes] = {
+    ordering: _invert(order) for ordering, order in ORDERS.items()
+}
+
+
+def rank(gua: Gua, ordering: Ordering = Ordering.KING_WEN) -> int:
+    """卦在某卦序中的次序（1-64）"""
+    return RANKS[ordering][gua.code] + 1
+
+
+def gua_at(position: int, ordering: Ordering = Ordering.KING_WEN) -> Gua:
+    """某卦序中第 position 个卦（1-64）
+
+    Raises:
+        IndexError: position 不在 1-64 之间
+    """
+    if not 1 <= position <= 64:
+        raise IndexError(f"次序必须在 1-64 之间: {position}")
+    return get_registry().by_code[ORDERS[ordering][position - 1]]
+
+
+def sequence(ordering: Ordering = Ordering.KING_WEN) -> Tuple[Gua, ...]:
+    """按某卦序排列的64卦"""
+    by_code = get_registry().by_code
+    return tuple(by_code[code] for code in ORDERS[ordering])
+
+
+def next_gua(gua: Gua, ordering: Ordering = Ordering.KING_WEN, step: int = 1) -> Gua:
+    """某卦序中的后 step 卦，首尾相接"""
+    position = (RANKS[ordering][gua.code] + step) % 64
+    return get_registry().by_code[ORDERS[ordering][position]]
+
+
+def prev_gua(gua: Gua, ordering: Ordering = Ordering.KING_WEN, step: int = 1) -> Gua:
+    """某卦序中的前 step 卦，首尾相接"""
+    return next_gua(gua, ordering, -step)
+
+
+def convert(position: int, source: Ordering, target: Ordering) -> int:
+    """把 source 卦序中的次序换算为 target 卦序中的次序（均为1-64）"""
+    return rank(gua_at(position, source), target)
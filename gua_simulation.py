@@ -0,0 +1,233 @@
+"""
+周易学习程序 - 起卦分布的蒙特卡洛检验
+将大量模拟起卦分块交给进程池，合并各块的直方图后做卡方检验：
+本卦、之卦的64卦分布，以及每一爻 6/7/8/9 的分布，
+并报告每核每秒的起卦数。
+
+抽样直接使用 gua_casting.cast_batch（与批量起卦同一实现，之卦经
+gua_batch 的变卦表求得），各块的随机种子由 SeedSequence 派生，
+结果只取决于总次数、块大小与种子，与进程数无关。
+依赖 numpy（可选依赖）。
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gua_casting import COIN_TABLE, YARROW_TABLE, CastMethod, cast_batch
+
+# 默认每块的起卦数（每块约占 3 × 块大小 字节的临时内存）
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# 默认显著性水平
+DEFAULT_ALPHA = 0.001
+
+LINE_VALUES = (6, 7, 8, 9)
+
+# 每爻 阳 | 变 << 1 -> LINE_VALUES 中的下标：0 少阴8、1 少阳7、2 老阴6、3 老阳9
+_LINE_VALUE_ORDER = np.array([2, 1, 0, 3])
+
+_METHOD_TABLES = {CastMethod.COINS: COIN_TABLE, CastMethod.YARROW: YARROW_TABLE}
+
+
+class ChiSquare(NamedTuple):
+    """卡方检验结果"""
+
+    name: str
+    statistic: float
+    dof: int
+    p_value: float
+
+
+class SimulationReport(NamedTuple):
+    """一次模拟的结果"""
+
+    method: CastMethod
+    casts: int
+    workers: int  # 实际使用的进程数（不超过块数）
+    seconds: float
+    gua_counts: np.ndarray  # 本卦，按位编码，长度64
+    changed_counts: np.ndarray  # 之卦，按位编码，长度64
+    line_counts: np.ndarray  # 形状 (6, 4)：第几爻 × 爻值 6/7/8/9
+    tests: Tuple[ChiSquare, ...]
+
+    @property
+    def casts_per_second(self) -> float:
+        return self.casts / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def casts_per_second_per_core(self) -> float:
+        return self.casts_per_second / self.workers
+
+
+def line_probabilities(method: CastMethod) -> Tuple[float, ...]:
+    """某种起卦方式下一爻取 6/7/8/9 的理论概率"""
+    table = _METHOD_TABLES[method]
+    return tuple(table.count(value) / len(table) for value in LINE_VALUES)
+
+
+def gua_probabilities(yang_probability: float) -> np.ndarray:
+    """每爻为阳的概率相同且各爻独立时，64卦（按位编码）的理论概率"""
+    codes = np.arange(64)
+    yang_lines = np.array([bin(code).count("1") for code in codes])
+    return yang_probability**yang_lines * (1 - yang_probability) ** (6 - yang_lines)
+
+
+def chi_square_sf(statistic: float, dof: int) -> float:
+    """卡方分布的上侧概率 P(X >= statistic)，即正则化上不完全伽马函数 Q(k/2, x/2)"""
+    if statistic <= 0:
+        return 1.0
+    a, x = dof / 2, statistic / 2
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # 级数展开求 P，再取 1 - P
+        term = total = 1 / a
+        n = a
+        while abs(term) > abs(total) * 1e-15:
+            n += 1
+            term *= x / n
+            total += term
+        return max(0.0, 1 - total * math.exp(log_prefix))
+    # 连分式（Lentz 方法）直接求 Q
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefix) * h
+
+
+def chi_square(name: str, observed, probabilities: Sequence[float]) -> ChiSquare:
+    """拟合优度卡方检验"""
+    observed = np.asarray(observed, dtype=np.float64)
+    expected = observed.sum() * np.asarray(probabilities, dtype=np.float64)
+    statistic = float(((observed - expected) ** 2 / expected).sum())
+    dof = len(observed) - 1
+    return ChiSquare(name, statistic, dof, chi_square_sf(statistic, dof))
+
+
+def _run_chunk(args) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """在工作进程中模拟一块，返回该块的三个直方图"""
+    method, size, seed = args
+    codes, masks, changed = cast_batch(size, method, seed)
+    line_keys = np.empty((6, size), dtype=np.uint8)
+    for i in range(6):
+        line_keys[i] = ((codes >> i) & 1) | (((masks >> i) & 1) << 1) | (i << 2)
+    return (
+        np.bincount(codes, minlength=64),
+        np.bincount(changed, minlength=64),
+        np.bincount(line_keys.ravel(), minlength=24).reshape(6, 4),
+    )
+
+
+def _chunk_sizes(total: int, chunk_size: int) -> List[int]:
+    full, rest = divmod(total, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def simulate(
+    total: int,
+    method: CastMethod = CastMethod.YARROW,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: int = 0,
+) -> SimulationReport:
+    """模拟 total 次起卦并做卡方检验
+
+    Args:
+        total: 起卦总次数
+        method: 起卦方式
+        workers: 进程数上限，默认为 CPU 核数；实际不超过块数，只有一块时在当前进程内运行
+        chunk_size: 每块的起卦数
+        seed: 随机种子
+
+    Raises:
+        ValueError: 起卦次数不大于0
+    """
+    if total <= 0:
+        raise ValueError(f"起卦次数必须大于0: {total}")
+    sizes = _chunk_sizes(total, chunk_size)
+    workers = min(workers or os.cpu_count() or 1, len(sizes))
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(method, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    gua_counts = np.zeros(64, dtype=np.int64)
+    changed_counts = np.zeros(64, dtype=np.int64)
+    line_counts = np.zeros((6, 4), dtype=np.int64)
+
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for gua, changed, lines in (pool.map if pool else map)(_run_chunk, tasks):
+            gua_counts += gua
+            changed_counts += changed
+            line_counts += lines
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    seconds = time.perf_counter() - start
+    line_counts = line_counts[:, _LINE_VALUE_ORDER]
+
+    probabilities = line_probabilities(method)
+    p6, p7, _, p9 = probabilities
+    tests = [
+        chi_square("本卦", gua_counts, gua_probabilities(p7 + p9)),
+        chi_square("之卦", changed_counts, gua_probabilities(p7 + p6)),
+    ]
+    tests += [
+        chi_square(f"第{i + 1}爻", line_counts[i], probabilities) for i in range(6)
+    ]
+    return SimulationReport(
+        method,
+        total,
+        workers,
+        seconds,
+        gua_counts,
+        changed_counts,
+        line_counts,
+        tuple(tests),
+    )
+
+
+def format_report(report: SimulationReport, alpha: float = DEFAULT_ALPHA) -> str:
+    """将模拟结果整理为文本报告"""
+    method_names = {CastMethod.COINS: "三枚铜钱", CastMethod.YARROW: "大衍蓍草"}
+    lines = [
+        f"起卦方式: {method_names[report.method]}",
+        f"起卦次数: {report.casts:,}  进程数: {report.workers}  "
+        f"耗时: {report.seconds:.2f} s",
+        f"吞吐量: {report.casts_per_second:,.0f} 次/秒  "
+        f"每核 {report.casts_per_second_per_core:,.0f} 次/秒",
+        "",
+        "爻值频率（6 / 7 / 8 / 9）:",
+    ]
+    expected = line_probabilities(report.method)
+    lines.append("  理论  " + "  ".join(f"{p:.5f}" for p in expected))
+    for i, counts in enumerate(report.line_counts):
+        total = counts.sum() or 1
+        lines.append(f"  第{i + 1}爻 " + "  ".join(f"{c / total:.5f}" for c in counts))
+
+    lines += ["", f"卡方检验（显著性水平 {alpha}）:"]
+    for test in report.tests:
+        verdict = "通过" if test.p_value >= alpha else "拒绝"
+        lines.append(
+            f"  {test.name:<4} χ²={test.statistic:10.2f}  自由度={test.dof:2d}  "
+            f"p={test.p_value:.4f}  {verdict}"
+        )
+    return "\n".join(lines)
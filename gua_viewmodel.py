@@ -0,0 +1,255 @@
+"""
+周易学习程序 - 视图模型
+界面所需的全部文字、颜色与爻线样式在这里一次算好，组件只负责绑定。
+
+卦象视图的状态只有 (本卦, 变爻掩码, 标红掩码) 三项，视图模型按此缓存
+（LRU，条目不可变，可在多个会话间共享），重复出现的状态不再重算。
+"""
+
+import functools
+from typing import Iterable, NamedTuple, Optional, Tuple, Union
+
+import flet as ft
+
+from gua_data import (
+    NUMBER_TO_TRIGRAM,
+    TRIGRAM_CODES,
+    TRIGRAMS,
+    Gua,
+    changes_to_mask,
+    get_registry,
+)
+from gua_reading import TextKind, get_reading
+
+# 卦象视图模型的缓存条数
+VIEW_MODEL_CACHE_SIZE = 1024
+
+# 八卦的卦象（天、地……）与卦名（乾、坤……）
+TRIGRAM_IMAGES = {key: info["attribute"] for key, info in TRIGRAMS.items()}
+TRIGRAM_NAMES = {key: info["name"] for key, info in TRIGRAMS.items()}
+
+# 总览矩阵的经卦次序：先天数 1-8（乾兑离震巽坎艮坤），与数字定位一致
+OVERVIEW_TRIGRAMS = tuple(NUMBER_TO_TRIGRAM[n] for n in range(1, 9))
+
+# 爻位标签（自初爻至上爻）
+POSITION_LABELS = ("初爻", "二爻", "三爻", "四爻", "五爻", "上爻")
+
+
+class LineView(NamedTuple):
+    """一爻的显示内容"""
+
+    position: int  # 爻位 1-6
+    label: str  # 爻位标签
+    label_color: str
+    label_weight: Optional[ft.FontWeight]
+    label_bgcolor: Optional[str]  # 所占之爻（爻辞出自显示之卦时）加底色
+    is_yang: bool  # 显示之卦的阴阳
+    line_color: str
+    line_height: int
+    line_radius: int
+    marker: str  # 变、★、变★ 或空
+    marker_size: int
+    marker_width: int
+    text: str  # 爻辞
+    xiang: str  # 小象，已加"象曰："前缀，无则为空
+    text_color: str
+    text_weight: ft.FontWeight
+
+
+class HexagramViewModel(NamedTuple):
+    """卦象视图的显示内容"""
+
+    gua: Gua  # 本卦
+    changing: int  # 变爻掩码
+    highlighted: int  # 标红掩码
+    display_gua: Gua  # 显示之卦（有变爻时为之卦）
+    title: str  # 卦名，如：需 (水天需)
+    judgment: str  # 卦辞
+    reading: Tuple[str, ...]  # 占断：占法与所占之辞，第二行为主；无变爻时为空
+    lines: Tuple[LineView, ...]  # 自上爻至初爻
+
+
+def _title(gua: Gua) -> str:
+    return (
+        f"{gua.name} ({TRIGRAM_IMAGES[gua.upper_gua]}"
+        f"{TRIGRAM_IMAGES[gua.lower_gua]}{gua.name})"
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def gua_title(gua: Gua) -> str:
+    """卦名与卦象，如：需 (水天需)"""
+    return _title(gua)
+
+
+def _marker(is_changing: bool, is_highlighted: bool) -> Tuple[str, int, int]:
+    """爻线右侧的标记：(文字, 字号, 宽度)"""
+    if is_changing and is_highlighted:
+        return "变★", 12, 36
+    if is_changing:
+        return "变", 12, 24
+    if is_highlighted:
+        return "★", 14, 24
+    return "", 12, 24
+
+
+def _line_view(
+    display_gua: Gua, position: int, changing: int, highlighted: int, operative
+) -> LineView:
+    yao = display_gua.yaos[position - 1]
+    is_highlighted = bool(highlighted >> (position - 1) & 1)
+    is_operative = position in operative
+    marker, marker_size, marker_width = _marker(
+        bool(changing >> (position - 1) & 1), is_highlighted
+    )
+    return LineView(
+        position=position,
+        label=POSITION_LABELS[position - 1],
+        label_color=ft.Colors.BROWN_700 if is_operative else ft.Colors.GREY,
+        label_weight=ft.FontWeight.BOLD if is_operative else None,
+        label_bgcolor=ft.Colors.AMBER_100 if is_operative else None,
+        is_yang=yao.is_yang,
+        line_color=ft.Colors.RED if is_highlighted else ft.Colors.BLACK,
+        line_height=18 if is_highlighted else 14,
+        line_radius=9 if is_highlighted else 7,
+        marker=marker,
+        marker_size=marker_size,
+        marker_width=marker_width,
+        text=yao.text,
+        xiang=f"象曰：{yao.xiang}" if yao.xiang else "",
+        text_color=ft.Colors.RED if is_highlighted else ft.Colors.GREY_700,
+        text_weight=ft.FontWeight.BOLD if is_highlighted else ft.FontWeight.NORMAL,
+    )
+
+
+@functools.lru_cache(maxsize=VIEW_MODEL_CACHE_SIZE)
+def _view_model(code: int, changing: int, highlighted: int) -> HexagramViewModel:
+    gua = get_registry().by_code[code]
+    reading = get_reading(gua, changing)
+    display_gua = reading.changed
+    # 只标出显示之卦上所占的爻：一二爻变时所占为本卦爻辞，而各行显示的是之卦
+    operative = {
+        ref.position
+        for ref in reading.refs
+        if ref.kind is TextKind.LINE and ref.gua is display_gua
+    }
+    return HexagramViewModel(
+        gua=gua,
+        changing=changing,
+        highlighted=highlighted,
+        display_gua=display_gua,
+        title=_title(display_gua),
+        judgment=f"卦辞：{display_gua.description}",
+        reading=(
+            (f"占法：{reading.rule}",)
+            + tuple(f"{ref.label}：{ref.text}" for ref in reading.refs)
+            if changing
+            else ()
+        ),
+        lines=tuple(
+            _line_view(display_gua, position, changing, highlighted, operative)
+            for position in range(6, 0, -1)
+        ),
+    )
+
+
+def _to_mask(positions: Union[Iterable[int], int, None]) -> int:
+    return 0 if positions is None else changes_to_mask(positions)
+
+
+def get_view_model(
+    gua: Gua,
+    changing: Union[Iterable[int], int, None] = None,
+    highlighted: Union[Iterable[int], int, None] = None,
+) -> HexagramViewModel:
+    """取得卦象视图的显示内容（按状态缓存）
+
+    Args:
+        gua: 本卦
+        changing: 变爻位置列表（1-6）或位掩码
+        highlighted: 标红爻位置列表（1-6）或位掩码
+
+    Raises:
+        TypeError: 传入布尔值
+        ValueError: 爻位不在 1-6 之间，或掩码不在 0-63 之间
+    """
+    return _view_model(gua.code, _to_mask(changing), _to_mask(highlighted))
+
+
+def view_model_cache_info():
+    """视图模型缓存的命中统计（functools 的 CacheInfo）"""
+    return _view_model.cache_info()
+
+
+def gua_glyph(gua: Gua) -> str:
+    """卦的 Unicode 符号（䷀-䷿ 按文王卦序排列），用作缩略图"""
+    return chr(0x4DC0 + gua.index - 1)
+
+
+class Thumbnail(NamedTuple):
+    """总览中一卦的缩略显示"""
+
+    gua: Gua
+    glyph: str  # 卦符
+    name: str  # 卦名
+    label: str  # 列表中的一行，如：5. 需 (水天需)
+    tooltip: str  # 如：第5卦 需 (水天需)
+
+
+@functools.lru_cache(maxsize=64)
+def thumbnail(gua: Gua) -> Thumbnail:
+    """一卦的缩略显示（按卦缓存）"""
+    title = gua_title(gua)
+    return Thumbnail(
+        gua=gua,
+        glyph=gua_glyph(gua),
+        name=gua.name,
+        label=f"{gua.index}. {title}",
+        tooltip=f"第{gua.index}卦 {title}",
+    )
+
+
+def trigram_matrix() -> Tuple[Tuple[Gua, ...], ...]:
+    """八卦矩阵：第 i 行上卦、第 j 列下卦均按 OVERVIEW_TRIGRAMS 排列"""
+    by_code = get_registry().by_code
+    codes = [TRIGRAM_CODES[key] for key in OVERVIEW_TRIGRAMS]
+    return tuple(
+        tuple(by_code[upper << 3 | lower] for lower in codes) for upper in codes
+    )
+
+
+class FigureLayout(NamedTuple):
+    """整卦画在一块画布上时的版式（像素），每爻占一行，上爻在最上"""
+
+    label_width: int = 50  # 爻位标签
+    line_x: int = 60  # 爻线左端
+    line_width: int = 180  # 爻线全长
+    gap: int = 16  # 阴爻中缝
+    marker_offset: int = 8  # 标记与爻线的间距
+    row_height: int = 64
+
+    @property
+    def width(self) -> int:
+        """画布宽度：标签、爻线与最宽的标记（变★）"""
+        return self.line_x + self.line_width + self.marker_offset + 36
+
+    @property
+    def height(self) -> int:
+        return self.row_height * 6
+
+    def row_top(self, position: int) -> int:
+        """某爻所在行的上沿"""
+        return (6 - position) * self.row_height
+
+    def segments(self, is_yang: bool) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """爻线的左右两段 (x, 宽度)；阳爻只有左段，右段宽度为0"""
+        if is_yang:
+            return (self.line_x, self.line_width), (self.line_x + self.line_width, 0)
+        half = (self.line_width - self.gap) // 2
+        return (self.line_x, half), (self.line_x + half + self.gap, half)
+
+    def hit_line(self, x: float, y: float) -> Optional[int]:
+        """点击坐标落在哪一爻（爻线及其标记的范围），不在任何爻上时为 None"""
+        if not self.line_x <= x < self.width or not 0 <= y < self.height:
+            return None
+        return 6 - int(y // self.row_height)
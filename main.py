@@ -4,191 +4,368 @@
 """
 
 import flet as ft
+import flet.canvas as cv
 from gua_data import (
     ALL_GUAS,
     search_gua,
     get_gua_by_index,
     get_gua_by_numbers,
+    get_relations,
     binary_to_gua,
     YaoType,
     Yao,
     Gua,
     TRIGRAMS,
+    get_registry,
     init_data,
+    mask_to_positions,
 )
-from typing import List, Optional
+from gua_casting import CastMethod, cast_lines, lines_to_cast
+from gua_graph import CUO_ZONG_MOVES, HYPERCUBE_MOVES, Step, get_graph
+from gua_viewmodel import (
+    OVERVIEW_TRIGRAMS,
+    TRIGRAM_NAMES,
+    FigureLayout,
+    LineView,
+    get_view_model,
+    gua_glyph,
+    gua_title,
+    thumbnail,
+    trigram_matrix,
+)
+from gua_sequences import Ordering, next_gua, prev_gua, rank
+from gua_search import TEXT_FIELD_LABELS, IncrementalSearch, search_text
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+import functools
+import threading
+import time
 
 # 统一的爻线宽度 - 放大尺寸
 YAO_LINE_WIDTH = 180  # 爻线本身宽度（从100放大到180）
 YAO_TOTAL_WIDTH = 220  # 包含"变"字的总宽度（从140放大到220）
 
+# 搜索结果最多显示的条数（结果行预先创建，之后只改内容）
+SEARCH_RESULT_LIMIT = 5
+# 边输入边搜索的防抖间隔（秒）
+SEARCH_DEBOUNCE = 0.15
+# 路径演示每一步停留的时间（秒）
+PATH_STEP_DELAY = 0.8
+# 本卦视图是否用一块画布画六爻（False 时每爻一组控件）
+HEXAGRAM_CANVAS = True
+# 画布模式的版式
+FIGURE_LAYOUT = FigureLayout()
+
+
+def update_control(control: ft.Control):
+    """立即把控件的改动发给客户端"""
+    control.update()
+
+
+class UpdateBatch:
+    """把一次操作中的多次 update() 合并为一次发给客户端
+
+    在 transaction() 之内（仅限开启它的线程）经 refresh() 提交的控件先记下，
+    退出最外层的 transaction() 时统一发送：只有一个控件时只更新该控件，
+    否则整页 update() 一次，web 模式下只有一条消息。
+    其余时候（如后台线程中的路径演示）refresh() 立即更新。
+    """
+
+    def __init__(self, page: Optional[ft.Page] = None):
+        self.page = page
+        self.sent = 0  # 已发送的更新次数
+        self._local = threading.local()
+
+    @contextmanager
+    def transaction(self):
+        """合并其中的全部更新，可嵌套"""
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            local.pending = []
+        local.depth = depth + 1
+        try:
+            yield
+        finally:
+            local.depth = depth
+            if depth == 0:
+                pending, local.pending = local.pending, []
+                self._send(pending)
+
+    def refresh(self, *controls: ft.Control):
+        """提交控件的改动：事务中先记下，否则立即发送"""
+        local = self._local
+        if getattr(local, "depth", 0):
+            for control in controls:
+                if not any(control is pending for pending in local.pending):
+                    local.pending.append(control)
+        else:
+            self._send(list(controls))
+
+    def _send(self, controls: List[ft.Control]):
+        if not controls:
+            return
+        self.sent += 1
+        if len(controls) == 1:
+            controls[0].update()
+        else:
+            self.page.update()
+
+
+def batched(handler):
+    """事件处理方法的装饰器：方法内的全部界面更新合并为一次"""
+
+    @functools.wraps(handler)
+    def wrapper(self, *args, **kwargs):
+        with self._updates.transaction():
+            return handler(self, *args, **kwargs)
+
+    return wrapper
+
 
 class YaoLineWidget(ft.Container):
-    """爻线组件 - 统一处理阴阳爻的显示"""
+    """爻线组件 - 统一处理阴阳爻的显示
+
+    阳爻、阴爻共用同一组控件：阳爻时左段占满全宽、隐去中缝与右段，
+    阴爻时左右两段各占一半。切换时只改宽度、颜色与可见性。
+    """
+
+    GAP = 16
+    SEGMENT_WIDTH = (YAO_LINE_WIDTH - GAP) // 2
 
-    def __init__(self, yao: Yao, is_highlighted: bool = False):
-        self.yao = yao
-        self.is_highlighted = is_highlighted
+    def __init__(self, line: LineView):
+        self.line: Optional[LineView] = None
+        self._left = ft.Container()
+        self._gap = ft.Container(width=self.GAP, bgcolor=ft.Colors.TRANSPARENT)
+        self._right = ft.Container(width=self.SEGMENT_WIDTH)
 
         super().__init__(
-            content=self._create_yao_line(),
+            content=ft.Row(
+                [self._left, self._gap, self._right],
+                alignment=ft.MainAxisAlignment.CENTER,
+                spacing=0,
+            ),
             width=YAO_LINE_WIDTH,
             height=30,
             padding=ft.Padding(top=8, bottom=8, left=0, right=0),
             alignment=ft.Alignment(0, 0),
         )
-
-    def _create_yao_line(self):
-        """创建爻线"""
-        # 高亮样式：红色、加粗
-        color = ft.Colors.RED if self.is_highlighted else ft.Colors.BLACK
-        height = 18 if self.is_highlighted else 14  # 高亮时更粗
-
-        if self.yao.is_yang:
-            # 阳爻 —— 一根完整的线
-            return ft.Container(
-                width=YAO_LINE_WIDTH,
-                height=height,
-                bgcolor=color,
-                border_radius=9 if self.is_highlighted else 7,
-            )
-        else:
-            # 阴爻 —— 两根比较短的线，中间断开
-            gap = 16
-            segment_width = (YAO_LINE_WIDTH - gap) // 2
-
-            return ft.Row(
-                [
-                    ft.Container(
-                        width=segment_width,
-                        height=height,
-                        bgcolor=color,
-                        border_radius=9 if self.is_highlighted else 7,
-                    ),
-                    ft.Container(
-                        width=gap,
-                        height=height,
-                        bgcolor=ft.Colors.TRANSPARENT,
-                    ),
-                    ft.Container(
-                        width=segment_width,
-                        height=height,
-                        bgcolor=color,
-                        border_radius=9 if self.is_highlighted else 7,
-                    ),
-                ],
-                alignment=ft.MainAxisAlignment.CENTER,
-                spacing=0,
-            )
+        self.bind(line)
+
+    def bind(self, line: LineView):
+        """按爻的显示内容修改爻线（高亮时红色、加粗），只改有变化的属性"""
+        old = self.line
+        self.line = line
+        if old is None or old.is_yang != line.is_yang:
+            # 阳爻 —— 一根完整的线；阴爻 —— 两根比较短的线，中间断开
+            self._left.width = YAO_LINE_WIDTH if line.is_yang else self.SEGMENT_WIDTH
+            self._gap.visible = self._right.visible = not line.is_yang
+        if (
+            old is None
+            or old.line_color != line.line_color
+            or old.line_height != line.line_height
+        ):
+            for segment in (self._left, self._gap, self._right):
+                segment.height = line.line_height
+            for segment in (self._left, self._right):
+                segment.bgcolor = line.line_color
+                segment.border_radius = line.line_radius
 
 
 class ClickableYaoLine(ft.Container):
     """可点击的爻组件 - 用于本卦区域"""
 
-    def __init__(
-        self,
-        original_yao: Yao,
-        display_yao: Yao,
-        on_click=None,
-        is_changing: bool = False,
-        is_highlighted: bool = False,
-    ):
+    def __init__(self, original_yao: Yao, line: LineView, on_click=None):
         self.original_yao = original_yao
-        self.display_yao = display_yao
         self.on_yao_click = on_click
-        self.is_changing = is_changing
-        self.is_highlighted = is_highlighted
+        self.line: Optional[LineView] = None
+
+        # 爻线与标记（变/高亮）
+        self._yao_line = YaoLineWidget(line)
+        self._marker_text = ft.Text("", color=ft.Colors.RED, weight=ft.FontWeight.BOLD)
+        self._marker = ft.Container(
+            content=self._marker_text, alignment=ft.Alignment(0, 0)
+        )
 
         super().__init__(
-            content=self._create_content(),
+            content=ft.Row(
+                [self._yao_line, ft.Container(width=8), self._marker],
+                alignment=ft.MainAxisAlignment.START,
+                spacing=0,
+            ),
             on_click=self._handle_click,
             padding=0,
             width=YAO_TOTAL_WIDTH,
         )
+        self.bind(original_yao, line)
 
-    def _create_content(self):
-        """创建爻的视觉内容"""
-        # 爻线，支持高亮
-        yao_line = YaoLineWidget(self.display_yao, is_highlighted=self.is_highlighted)
+    def bind(self, original_yao: Yao, line: LineView):
+        """换上新的爻与显示内容，只改有变化的属性"""
+        self.original_yao = original_yao
+        old = self.line
+        self.line = line
+        self._yao_line.bind(line)
+        if old is None or old.marker != line.marker:
+            self._marker_text.value = line.marker
+            self._marker_text.size = line.marker_size
+            self._marker.width = line.marker_width
 
-        # 创建行，包含爻线和标记（变/高亮）
-        if self.is_changing and self.is_highlighted:
-            # 同时是变爻和高亮
-            return ft.Row(
-                [
-                    yao_line,
-                    ft.Container(width=8),
-                    ft.Container(
-                        content=ft.Text(
-                            "变★",
-                            size=12,
-                            color=ft.Colors.RED,
-                            weight=ft.FontWeight.BOLD,
-                        ),
-                        width=36,
-                        alignment=ft.Alignment(0, 0),
-                    ),
-                ],
-                alignment=ft.MainAxisAlignment.START,
-                spacing=0,
+    def _handle_click(self, e):
+        """处理点击事件"""
+        if self.on_yao_click:
+            self.on_yao_click(self.original_yao)
+
+
+class _LineRow(ft.Row):
+    """卦象视图中的一行：爻位标签、爻线、爻辞与小象"""
+
+    def __init__(self, original_yao: Yao, line: LineView, on_click=None):
+        self.line: Optional[LineView] = None
+        self._label_text = ft.Text("", size=16)
+        self._label = ft.Container(
+            content=self._label_text,
+            width=50,
+            alignment=ft.Alignment(1, 0),
+            border_radius=5,
+        )
+        self.yao_line = ClickableYaoLine(original_yao, line, on_click)
+        self._text = ft.Text("", size=14)
+        self._xiang = ft.Text("", size=12, italic=True)
+
+        super().__init__(
+            [
+                # 爻位标签（所占之爻底色标出）
+                self._label,
+                # 爻线
+                self.yao_line,
+                # 爻辞和小象传
+                ft.Container(
+                    content=ft.Column([self._text, self._xiang], spacing=2),
+                    width=400,
+                    padding=ft.Padding(left=15, top=0, right=0, bottom=0),
+                ),
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+        )
+        self.bind(original_yao, line)
+
+    def bind(self, original_yao: Yao, line: LineView):
+        """换上新的爻与显示内容，只改有变化的属性"""
+        old = self.line
+        self.line = line
+        self.yao_line.bind(original_yao, line)
+        if old is None or old.label_color != line.label_color:
+            self._label_text.value = line.label
+            self._label_text.color = line.label_color
+            self._label_text.weight = line.label_weight
+            self._label.bgcolor = line.label_bgcolor
+        if old is None or old.text != line.text:
+            self._text.value = line.text
+        if old is None or old.xiang != line.xiang:
+            # 小象传（如果有）
+            self._xiang.value = line.xiang
+            self._xiang.visible = bool(line.xiang)
+        if old is None or old.text_color != line.text_color:
+            for text in (self._text, self._xiang):
+                text.color = line.text_color
+                text.weight = line.text_weight
+
+
+class HexagramCanvas(ft.GestureDetector):
+    """整卦画在一块画布上：爻位标签、六爻与标记（变/高亮）
+
+    每爻只有五个画布图形（标签底色、标签、左右两段爻线、标记），
+    换卦时只改图形的坐标、颜色与文字；点击时按坐标判断是哪一爻。
+    """
+
+    def __init__(self, lines: Tuple[LineView, ...], on_line_click=None):
+        self.layout = FIGURE_LAYOUT
+        self.on_line_click = on_line_click
+        self.lines: Dict[int, LineView] = {}
+
+        # 爻位 -> (标签底色, 标签, 左段, 右段, 标记)
+        self._shapes = {}
+        layout = self.layout
+        for position in range(6, 0, -1):
+            middle = layout.row_top(position) + layout.row_height / 2
+            self._shapes[position] = (
+                cv.Rect(
+                    0,
+                    middle - 14,
+                    layout.label_width,
+                    28,
+                    border_radius=5,
+                    paint=ft.Paint(color=ft.Colors.TRANSPARENT),
+                ),
+                cv.Text(layout.label_width, middle, "", alignment=ft.Alignment(1, 0)),
+                cv.Rect(0, 0, paint=ft.Paint()),
+                cv.Rect(0, 0, paint=ft.Paint()),
+                cv.Text(0, middle, "", alignment=ft.Alignment(0, 0)),
             )
-        elif self.is_changing:
-            return ft.Row(
-                [
-                    yao_line,
-                    ft.Container(width=8),
-                    ft.Container(
-                        content=ft.Text(
-                            "变",
-                            size=12,
-                            color=ft.Colors.RED,
-                            weight=ft.FontWeight.BOLD,
-                        ),
-                        width=24,
-                        alignment=ft.Alignment(0, 0),
-                    ),
-                ],
-                alignment=ft.MainAxisAlignment.START,
-                spacing=0,
+
+        super().__init__(
+            content=cv.Canvas(
+                [shape for shapes in self._shapes.values() for shape in shapes],
+                width=layout.width,
+                height=layout.height,
+            ),
+            on_tap_down=self._on_tap_down,
+        )
+        self.bind(lines)
+
+    def bind(self, lines: Tuple[LineView, ...]):
+        """按各爻的显示内容修改图形，只改有变化的爻"""
+        layout = self.layout
+        for line in lines:
+            old = self.lines.get(line.position)
+            if old == line:
+                continue
+            self.lines[line.position] = line
+            background, label, left, right, marker = self._shapes[line.position]
+            background.paint.color = line.label_bgcolor or ft.Colors.TRANSPARENT
+            label.value = line.label
+            label.style = ft.TextStyle(
+                size=16, color=line.label_color, weight=line.label_weight
             )
-        elif self.is_highlighted:
-            return ft.Row(
-                [
-                    yao_line,
-                    ft.Container(width=8),
-                    ft.Container(
-                        content=ft.Text(
-                            "★",
-                            size=14,
-                            color=ft.Colors.RED,
-                            weight=ft.FontWeight.BOLD,
-                        ),
-                        width=24,
-                        alignment=ft.Alignment(0, 0),
-                    ),
-                ],
-                alignment=ft.MainAxisAlignment.START,
-                spacing=0,
+            y = (
+                layout.row_top(line.position)
+                + (layout.row_height - line.line_height) / 2
             )
-        else:
-            return ft.Row(
-                [
-                    yao_line,
-                    ft.Container(width=8),
-                    ft.Container(width=24),  # 占位保持对齐
-                ],
-                alignment=ft.MainAxisAlignment.START,
-                spacing=0,
+            for segment, (x, width) in zip(
+                (left, right), layout.segments(line.is_yang)
+            ):
+                segment.x, segment.y = x, y
+                segment.width, segment.height = width, line.line_height
+                segment.border_radius = line.line_radius
+                segment.paint.color = line.line_color
+            marker.value = line.marker
+            marker.x = (
+                layout.line_x
+                + layout.line_width
+                + layout.marker_offset
+                + line.marker_width / 2
+            )
+            marker.style = ft.TextStyle(
+                size=line.marker_size, color=ft.Colors.RED, weight=ft.FontWeight.BOLD
             )
 
-    def _handle_click(self, e):
-        """处理点击事件"""
-        if self.on_yao_click:
-            self.on_yao_click(self.original_yao)
+    def _on_tap_down(self, e):
+        """按点击坐标找到所点之爻"""
+        if e.local_position is None:
+            return
+        position = self.layout.hit_line(e.local_position.x, e.local_position.y)
+        if position is not None and self.on_line_click:
+            self.on_line_click(position)
 
 
 class InteractiveHexagramView(ft.Column):
-    """可交互的卦象视图 - 包含卦辞和爻辞"""
+    """可交互的卦象视图 - 包含卦辞和爻辞
+
+    控件树只在创建时构建一次；之后每次更新按新旧视图模型的差异
+    只修改有变化的属性，界面（web 模式下）只收到这些属性的改动。
+    canvas 为 True 时六爻画在一块画布上（HexagramCanvas），爻辞另列一栏，
+    控件数约为逐爻一组控件时的五分之一。
+    """
 
     def __init__(
         self,
@@ -197,22 +374,31 @@ class InteractiveHexagramView(ft.Column):
         title: str = "",
         changing_positions: Optional[List[int]] = None,
         highlighted_positions: Optional[List[int]] = None,
+        refresh=update_control,
+        canvas: bool = False,
     ):
         self.original_gua = original_gua
         self.on_yao_click = on_yao_click
         self.title = title
+        self.canvas = canvas
+        # 提交改动的方式，默认立即 update()，可换成 UpdateBatch.refresh
+        self._refresh = refresh
         self.changing_positions = (
             changing_positions if changing_positions is not None else []
         )
         self.highlighted_positions = (
             highlighted_positions if highlighted_positions is not None else []
         )
-
+        self.view_model = get_view_model(
+            original_gua, self.changing_positions, self.highlighted_positions
+        )
         # 根据变爻状态确定当前显示的卦
-        if self.changing_positions:
-            self.display_gua = original_gua.get_changed_gua(self.changing_positions)
-        else:
-            self.display_gua = original_gua
+        self.display_gua = self.view_model.display_gua
+
+        # 路径演示的代号，update_gua 时递增以中止正在进行的演示
+        self._playback = 0
+        # 路径演示在后台线程中换卦，_show 与代号的读写都在锁内进行
+        self._lock = threading.Lock()
 
         super().__init__(
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
@@ -222,7 +408,8 @@ class InteractiveHexagramView(ft.Column):
         self._build()
 
     def _build(self):
-        """构建卦象视图"""
+        """构建卦象视图的控件树（只调用一次），内容由 _bind 填入"""
+        vm = self.view_model
         self.controls = []
 
         # 标题
@@ -232,35 +419,20 @@ class InteractiveHexagramView(ft.Column):
             )
 
         # 卦名信息
-        trigram_names = {
-            "qian": "天",
-            "kun": "地",
-            "zhen": "雷",
-            "gen": "山",
-            "kan": "水",
-            "li": "火",
-            "xun": "风",
-            "dui": "泽",
-        }
-        upper = trigram_names.get(self.display_gua.upper_gua, "")
-        lower = trigram_names.get(self.display_gua.lower_gua, "")
-
-        self.controls.append(
-            ft.Text(
-                f"{self.display_gua.name} ({upper}{lower}{self.display_gua.name})",
-                size=28,  # 从20放大到28
-                weight=ft.FontWeight.BOLD,
-            )
-        )
+        self._name_text = ft.Text(
+            vm.title, size=28, weight=ft.FontWeight.BOLD
+        )  # 从20放大到28
+        self.controls.append(self._name_text)
 
         # 卦辞（使用display_gua的卦辞）
+        self._judgment_text = ft.Text(
+            vm.judgment,
+            size=16,  # 从14放大到16
+            color=ft.Colors.GREY_800,
+        )
         self.controls.append(
             ft.Container(
-                content=ft.Text(
-                    f"卦辞：{self.display_gua.description}",
-                    size=16,  # 从14放大到16
-                    color=ft.Colors.GREY_800,
-                ),
+                content=self._judgment_text,
                 padding=15,  # 从10放大到15
                 bgcolor=ft.Colors.GREY_100,
                 border_radius=5,
@@ -268,80 +440,115 @@ class InteractiveHexagramView(ft.Column):
             )
         )
 
+        # 占断：有变爻时列出占法与所占之辞（第一条为主，最多两条）
+        self._reading_texts = [ft.Text("", size=13, color=ft.Colors.GREY_700)] + [
+            ft.Text(
+                "",
+                size=14,
+                color=ft.Colors.BROWN_700,
+                weight=ft.FontWeight.BOLD if i == 0 else None,
+            )
+            for i in range(2)
+        ]
+        self._reading = ft.Container(
+            content=ft.Column(self._reading_texts, spacing=4),
+            padding=10,
+            bgcolor=ft.Colors.AMBER_50,
+            border_radius=5,
+            width=600,
+        )
+        self.controls.append(self._reading)
+        self._bind_reading(vm.reading)
+
         # 分隔线
         self.controls.append(ft.Divider())
 
         # 六爻（从上往下显示）
-        # 注意：使用display_gua的爻来显示，但保留original_gua的爻用于点击
-        original_yaos_dict = {y.position: y for y in self.original_gua.yaos}
-
-        for i, display_yao in enumerate(reversed(self.display_gua.yaos)):
-            position = display_yao.position
-            original_yao = original_yaos_dict[position]
-            is_changing = position in self.changing_positions
-            is_highlighted = position in self.highlighted_positions
-
-            yao_line = ClickableYaoLine(
-                original_yao=original_yao,
-                display_yao=display_yao,
-                on_click=self.on_yao_click,
-                is_changing=is_changing,
-                is_highlighted=is_highlighted,
+        # 注意：显示的是display_gua的爻，点击时仍传回original_gua的爻
+        if self.canvas:
+            self._build_canvas(vm)
+            return
+        self._rows = [
+            _LineRow(self.original_gua.yaos[line.position - 1], line, self.on_yao_click)
+            for line in vm.lines
+        ]
+        self.controls.extend(self._rows)
+
+    def _build_canvas(self, vm):
+        """画布模式：左侧一块画布画六爻，右侧每爻一段文字，行高与画布对齐"""
+        self._figure = HexagramCanvas(vm.lines, on_line_click=self._on_line_click)
+        # 爻位 -> (爻辞, 小象)
+        self._line_spans = {}
+        boxes = []
+        for line in vm.lines:
+            text = ft.TextSpan("")
+            xiang = ft.TextSpan("", ft.TextStyle(size=12, italic=True))
+            self._line_spans[line.position] = (text, xiang)
+            boxes.append(
+                ft.Container(
+                    content=ft.Text(spans=[text, xiang], size=14),
+                    height=FIGURE_LAYOUT.row_height,
+                    alignment=ft.Alignment(-1, 0),
+                )
             )
-
-            # 爻位标签
-            position_labels = ["上爻", "五爻", "四爻", "三爻", "二爻", "初爻"]
-            label = position_labels[i]
-
-            # 爻辞和小象传（使用display_gua的爻辞）
-            yao_text = display_yao.text
-            xiang_text = display_yao.xiang
-
-            # 高亮时的样式
-            text_color = ft.Colors.RED if is_highlighted else ft.Colors.GREY_700
-            text_weight = ft.FontWeight.BOLD if is_highlighted else ft.FontWeight.NORMAL
-
-            row = ft.Row(
+            self._bind_spans(line)
+        self.controls.append(
+            ft.Row(
                 [
-                    # 爻位标签
+                    self._figure,
                     ft.Container(
-                        content=ft.Text(label, size=16, color=ft.Colors.GREY),
-                        width=50,
-                        alignment=ft.Alignment(1, 0),
-                    ),
-                    # 爻线
-                    yao_line,
-                    # 爻辞和小象传
-                    ft.Container(
-                        content=ft.Column(
-                            [
-                                # 爻辞
-                                ft.Text(
-                                    yao_text,
-                                    size=14,
-                                    color=text_color,
-                                    weight=text_weight,
-                                ),
-                                # 小象传（如果有）
-                                ft.Text(
-                                    f"象曰：{xiang_text}" if xiang_text else "",
-                                    size=12,
-                                    color=text_color,
-                                    weight=text_weight,
-                                    italic=True,
-                                )
-                                if xiang_text
-                                else ft.Container(),
-                            ],
-                            spacing=2,
-                        ),
+                        content=ft.Column(boxes, spacing=0),
                         width=400,
                         padding=ft.Padding(left=15, top=0, right=0, bottom=0),
                     ),
                 ],
                 alignment=ft.MainAxisAlignment.CENTER,
+                vertical_alignment=ft.CrossAxisAlignment.START,
             )
-            self.controls.append(row)
+        )
+
+    def _bind_spans(self, line: LineView):
+        text, xiang = self._line_spans[line.position]
+        text.text = line.text
+        text.style = ft.TextStyle(color=line.text_color, weight=line.text_weight)
+        # 小象传（如果有）另起一行
+        xiang.text = f"\n{line.xiang}" if line.xiang else ""
+        xiang.style = ft.TextStyle(
+            size=12, italic=True, color=line.text_color, weight=line.text_weight
+        )
+
+    def _on_line_click(self, position: int):
+        """画布模式下点击某爻，传回本卦的爻"""
+        if self.on_yao_click:
+            self.on_yao_click(self.original_gua.yaos[position - 1])
+
+    def _bind_reading(self, reading):
+        self._reading.visible = bool(reading)
+        for i, text in enumerate(self._reading_texts):
+            text.value = reading[i] if i < len(reading) else ""
+            text.visible = i < len(reading)
+
+    def _bind(self, old, vm):
+        """按新旧视图模型的差异修改控件属性"""
+        if old.title != vm.title:
+            self._name_text.value = vm.title
+        if old.judgment != vm.judgment:
+            self._judgment_text.value = vm.judgment
+        if old.reading != vm.reading:
+            self._bind_reading(vm.reading)
+        if self.canvas:
+            self._figure.bind(vm.lines)
+            for old_line, line in zip(old.lines, vm.lines):
+                if old_line != line:
+                    self._bind_spans(line)
+            return
+        yaos = self.original_gua.yaos
+        for row, old_line, line in zip(self._rows, old.lines, vm.lines):
+            if (
+                old_line != line
+                or row.yao_line.original_yao is not yaos[line.position - 1]
+            ):
+                row.bind(yaos[line.position - 1], line)
 
     def update_gua(
         self,
@@ -349,110 +556,302 @@ class InteractiveHexagramView(ft.Column):
         changing_positions: Optional[List[int]] = None,
         highlighted_positions: Optional[List[int]] = None,
     ):
-        """更新卦象"""
-        self.original_gua = original_gua
-        self.changing_positions = (
-            changing_positions if changing_positions is not None else []
+        """更新卦象（会中止正在进行的路径演示）"""
+        self._show(
+            original_gua,
+            changing_positions,
+            highlighted_positions,
+            playback=self._next_playback(),
         )
-        if highlighted_positions is not None:
-            self.highlighted_positions = highlighted_positions
 
-        # 重新计算display_gua
-        if self.changing_positions:
-            self.display_gua = original_gua.get_changed_gua(self.changing_positions)
-        else:
-            self.display_gua = original_gua
+    def _next_playback(self) -> int:
+        """递增并返回路径演示的代号，之前的代号随即失效"""
+        with self._lock:
+            self._playback += 1
+            return self._playback
 
-        self._build()
-        self.update()
+    def _show(
+        self,
+        original_gua: Gua,
+        changing_positions: Optional[List[int]] = None,
+        highlighted_positions: Optional[List[int]] = None,
+        playback: Optional[int] = None,
+    ) -> bool:
+        """按本卦与变爻更新视图
+
+        在锁内读取旧视图模型并按差异修改控件，后台的路径演示与界面线程
+        不会以同一个旧模型为准各改一半。playback 不是当前代号时（已被
+        update_gua 或新的演示取代）不做任何改动并返回 False；检查与修改
+        在同一把锁内，过期的一步不会盖过用户所选的卦。
+        """
+        with self._lock:
+            if playback is not None and playback != self._playback:
+                return False
+            self.original_gua = original_gua
+            self.changing_positions = (
+                changing_positions if changing_positions is not None else []
+            )
+            if highlighted_positions is not None:
+                self.highlighted_positions = highlighted_positions
+
+            old = self.view_model
+            self.view_model = get_view_model(
+                original_gua, self.changing_positions, self.highlighted_positions
+            )
+            self.display_gua = self.view_model.display_gua
+            if self.view_model is not old:
+                self._bind(old, self.view_model)
+                self._refresh(self)
+            return True
+
+    def play_path(self, start: Gua, steps: List[Step], delay: float = PATH_STEP_DELAY):
+        """依次演示一条路径，应在后台线程中调用
+
+        变爻的一步先以变爻标出所变之爻（显示变后之卦），错、综一步直接切换；
+        期间调用 update_gua 即中止演示。
+        """
+        playback = self._next_playback()
+        if not self._show(start, [], playback=playback):
+            return
+        current = start
+        for step in steps:
+            time.sleep(delay)
+            if step.move.kind is None:
+                shown = self._show(
+                    current, mask_to_positions(step.move.mask), playback=playback
+                )
+            else:
+                shown = self._show(step.gua, [], playback=playback)
+            if not shown:
+                return
+            current = step.gua
+        time.sleep(delay)
+        self._show(current, [], playback=playback)
+
+
+def iter_controls(control: ft.Control) -> Iterator[ft.Control]:
+    """依次给出控件树中的控件（含自身）"""
+    yield control
+    children = getattr(control, "controls", None) or []
+    content = getattr(control, "content", None)
+    if isinstance(content, ft.Control):
+        children = [*children, content]
+    for child in children:
+        yield from iter_controls(child)
+
+
+def count_controls(control: ft.Control) -> int:
+    """控件树中的控件个数（含自身）"""
+    return sum(1 for _ in iter_controls(control))
+
+
+def count_shapes(control: ft.Control) -> int:
+    """控件树中各画布上的图形个数（图形不是控件，count_controls 不计）"""
+    return sum(
+        len(child.shapes)
+        for child in iter_controls(control)
+        if isinstance(child, cv.Canvas)
+    )
+
+
+# 关系卡片：(名称, GuaRelations 字段, 说明)，每行一组
+RELATION_CARD_ROWS = (
+    (
+        ("错卦", "cuo", "阴阳全反"),
+        ("综卦", "zong", "上下颠倒"),
+        ("反卦", "fan", "上下卦互换"),
+    ),
+    (
+        ("互卦", "hu", "234爻为下、345爻为上"),
+        ("上互卦", "shang_hu", "345爻经卦重叠"),
+        ("下互卦", "xia_hu", "234爻经卦重叠"),
+    ),
+    (("伏卦", "fu", "纯卦伏错卦，余伏本宫"),),
+)
 
 
 class GuaRelationsView(ft.Column):
-    """卦象关系视图"""
+    """卦象关系视图
 
-    def __init__(self, gua: Gua, on_gua_select=None):
+    七张关系卡片只创建一次，换卦时只改卡片上的卦名与所指的卦（data），
+    再整体 update() 一次。controls_created 为创建时新建的控件数；
+    track_created 为 True 时（仅供测量），每次换卦前后逐一比对控件树，
+    last_created 记为换卦后新出现的控件数并计入 controls_created，
+    平时换卦不遍历控件树。每次换卦都重建面板时，每次新建的控件数即创建时的
+    controls_created。
+    """
+
+    def __init__(
+        self,
+        gua: Gua,
+        on_gua_select=None,
+        refresh=update_control,
+        track_created: bool = False,
+    ):
         self.gua = gua
         self.on_gua_select = on_gua_select
+        self._refresh = refresh
+        self.track_created = track_created
+        self.controls_created = 0
+        self.last_created = 0
 
         super().__init__(spacing=20)
         self._build()
+        self._bind()
 
     def _build(self):
-        """构建关系视图"""
-        self.controls = []
-
+        """构建关系视图（只调用一次），并把新建的控件计入 controls_created"""
         # 标题
-        self.controls.append(ft.Text("卦象关系", size=20, weight=ft.FontWeight.BOLD))
+        self.controls = [ft.Text("卦象关系", size=20, weight=ft.FontWeight.BOLD)]
+
+        # 关系卡片 - 按行排列；卡片标题 -> (卡片, 卦名文字)
+        self._cards = {}
+        for cards in RELATION_CARD_ROWS:
+            row = ft.Row(alignment=ft.MainAxisAlignment.SPACE_EVENLY)
+            for name, field, description in cards:
+                gua_text = ft.Text("", size=16)
+                card = ft.Container(
+                    content=ft.Column(
+                        [
+                            ft.Text(name, size=14, weight=ft.FontWeight.BOLD),
+                            gua_text,
+                            ft.Text(description, size=12, color=ft.Colors.GREY),
+                        ],
+                        spacing=5,
+                    ),
+                    padding=15,
+                    on_click=self._on_card_click,
+                )
+                self._cards[field] = (card, gua_text)
+                row.controls.append(ft.Card(content=card, elevation=2))
+            self.controls.append(row)
+        self.controls_created += count_controls(self)
 
-        # 创建关系卡片 - 按行排列
-        # 第一行：错卦、综卦、反卦
-        row1 = ft.Row(
-            [
-                self._create_relation_card("错卦", self.gua.get_dui_gua(), "阴阳全反"),
-                self._create_relation_card("综卦", self.gua.get_zong_gua(), "上下颠倒"),
-                self._create_relation_card(
-                    "反卦", self.gua.get_fan_gua(), "上下卦互换"
-                ),
-            ],
-            alignment=ft.MainAxisAlignment.SPACE_EVENLY,
+    def _bind(self):
+        """把当前卦的关系卦填入卡片（关系卦直接查预先计算的关系表）"""
+        relations = get_relations(self.gua)
+        for field, (card, gua_text) in self._cards.items():
+            related = getattr(relations, field)
+            card.data = related
+            gua_text.value = f"{gua_glyph(related)} {gua_title(related)}"
+
+    def _on_card_click(self, e):
+        """点击关系卡片，切换到卡片所指的卦"""
+        if self.on_gua_select and e.control.data is not None:
+            self.on_gua_select(e.control.data)
+
+    def update_gua(self, gua: Gua):
+        """更新卦象（track_created 时并记下换卦新建的控件数）"""
+        if not self.track_created:
+            self.gua = gua
+            self._bind()
+            self._refresh(self)
+            return
+        # 持有换卦前的控件，其 id() 不会被换卦中新建的控件占用
+        before = {id(control): control for control in iter_controls(self)}
+        self.gua = gua
+        self._bind()
+        self.last_created = sum(
+            id(control) not in before for control in iter_controls(self)
         )
+        self.controls_created += self.last_created
+        self._refresh(self)
 
-        # 第二行：上互卦、下互卦
-        row2 = ft.Row(
-            [
-                self._create_relation_card(
-                    "上互卦", self.gua.get_shang_hu_gua(), "345爻"
-                ),
-                self._create_relation_card(
-                    "下互卦", self.gua.get_xia_hu_gua(), "234爻"
-                ),
-            ],
-            alignment=ft.MainAxisAlignment.SPACE_EVENLY,
-        )
-
-        self.controls.append(row1)
-        self.controls.append(row2)
-
-    def _create_relation_card(self, name: str, gua: Gua, description: str) -> ft.Card:
-        """创建关系卡片"""
-        trigram_names = {
-            "qian": "天",
-            "kun": "地",
-            "zhen": "雷",
-            "gen": "山",
-            "kan": "水",
-            "li": "火",
-            "xun": "风",
-            "dui": "泽",
-        }
-        upper = trigram_names.get(gua.upper_gua, "")
-        lower = trigram_names.get(gua.lower_gua, "")
-
-        def on_click(e):
-            if self.on_gua_select:
-                self.on_gua_select(gua)
-
-        return ft.Card(
-            content=ft.Container(
-                content=ft.Column(
-                    [
-                        ft.Text(name, size=14, weight=ft.FontWeight.BOLD),
-                        ft.Text(f"{gua.name} ({upper}{lower}{gua.name})", size=16),
-                        ft.Text(description, size=12, color=ft.Colors.GREY),
-                    ],
-                    spacing=5,
-                ),
-                padding=15,
-                on_click=on_click,
+
+class GuaOverview(ft.Tabs):
+    """六十四卦总览：八卦矩阵与文王卦序列表
+
+    两页都用按需构建的 GridView / ListView（只渲染可见的格子），
+    每格只有一个容器和一段文字；列表页在第一次切换过去时才创建。
+    点击格子调用 on_gua_select。
+    """
+
+    def __init__(self, on_gua_select=None):
+        self.on_gua_select = on_gua_select
+        self._list = ft.ListView(item_extent=44, build_controls_on_demand=True)
+
+        super().__init__(
+            length=2,
+            selected_index=0,
+            on_change=self._on_tab_change,
+            content=ft.Column(
+                [
+                    ft.TabBar(
+                        tabs=[ft.Tab(label="八卦矩阵"), ft.Tab(label="文王卦序")]
+                    ),
+                    ft.TabBarView(
+                        controls=[self._build_grid(), self._list], expand=True
+                    ),
+                ],
+                expand=True,
             ),
-            elevation=2,
+            expand=True,
         )
 
-    def update_gua(self, gua: Gua):
-        """更新卦象"""
-        self.gua = gua
-        self._build()
-        self.update()
+    def _cell(self, gua: Gua, spans, **kwargs) -> ft.Container:
+        return ft.Container(
+            content=ft.Text(spans=spans, **kwargs),
+            data=gua,
+            tooltip=thumbnail(gua).tooltip,
+            on_click=self._on_cell_click,
+            border_radius=4,
+        )
+
+    def _build_grid(self) -> ft.GridView:
+        """八卦矩阵：行为上卦，列为下卦，首行首列为经卦"""
+        header = ft.TextStyle(size=14, weight=ft.FontWeight.BOLD)
+        cells = [ft.Text("上＼下", size=12, color=ft.Colors.GREY)]
+        cells += [
+            ft.Text(f"{TRIGRAMS[key]['symbol']}{TRIGRAMS[key]['name']}", style=header)
+            for key in OVERVIEW_TRIGRAMS
+        ]
+        for key, row in zip(OVERVIEW_TRIGRAMS, trigram_matrix()):
+            cells.append(
+                ft.Text(
+                    f"{TRIGRAMS[key]['symbol']}{TRIGRAMS[key]['name']}", style=header
+                )
+            )
+            for gua in row:
+                thumb = thumbnail(gua)
+                cells.append(
+                    self._cell(
+                        gua,
+                        [
+                            ft.TextSpan(thumb.glyph, ft.TextStyle(size=30)),
+                            ft.TextSpan(f"\n{thumb.name}", ft.TextStyle(size=12)),
+                        ],
+                        text_align=ft.TextAlign.CENTER,
+                    )
+                )
+        return ft.GridView(
+            cells,
+            runs_count=9,
+            spacing=4,
+            run_spacing=4,
+            build_controls_on_demand=True,
+        )
+
+    def _fill_list(self):
+        """文王卦序列表（第一次显示时创建）"""
+        self._list.controls = [
+            self._cell(
+                gua,
+                [
+                    ft.TextSpan(thumbnail(gua).glyph, ft.TextStyle(size=26)),
+                    ft.TextSpan(f"  {thumbnail(gua).label}", ft.TextStyle(size=15)),
+                ],
+            )
+            for gua in get_registry().guas
+        ]
+
+    def _on_tab_change(self, e):
+        if self.selected_index == 1 and not self._list.controls:
+            self._fill_list()
+            self._list.update()
+
+    def _on_cell_click(self, e):
+        if self.on_gua_select and e.control.data is not None:
+            self.on_gua_select(e.control.data)
 
 
 class YijingApp:
@@ -463,10 +862,20 @@ class YijingApp:
         self.changing_yaos: List[int] = []  # 变爻位置列表
         self.highlighted_yaos: List[int] = []  # 高亮爻位置列表
         self.page: Optional[ft.Page] = None
+        # 边输入边搜索：每次输入递增代号，后台查询完成时代号已变则丢弃结果
+        self._live_search = IncrementalSearch()
+        self._search_generation = 0
+        # 递增代号与后台显示结果（含其前的代号检查）都在锁内进行
+        self._search_lock = threading.Lock()
+        # 一次操作中的界面更新合并为一次发送
+        self._updates = UpdateBatch()
+        # 六十四卦总览对话框，第一次打开时才创建
+        self._overview: Optional[ft.AlertDialog] = None
 
     def main(self, page: ft.Page):
         """主入口"""
         self.page = page
+        self._updates.page = page
         page.title = "周易学习 - 玩索而得"
         page.theme_mode = ft.ThemeMode.LIGHT
         page.padding = 20
@@ -488,6 +897,7 @@ class YijingApp:
             hint_text="输入卦名或简称（如：水天、需）",
             expand=True,
             on_submit=self._on_search,
+            on_change=self._on_search_change,
         )
         search_button = ft.Button(
             "搜索",
@@ -526,6 +936,19 @@ class YijingApp:
             on_click=self._on_number_search,
         )
 
+        # 起卦：选择摇卦方式后点击按钮
+        self.cast_method = ft.Dropdown(
+            label="起卦方式",
+            width=140,
+            dense=True,
+            value=CastMethod.COINS.value,
+            options=[
+                ft.DropdownOption(key=CastMethod.COINS.value, text="三枚铜钱"),
+                ft.DropdownOption(key=CastMethod.YARROW.value, text="大衍蓍草"),
+            ],
+        )
+        cast_button = ft.Button("起卦", on_click=self._on_cast)
+
         number_search_row = ft.Row(
             [
                 ft.Text("数字定位:", size=14, weight=ft.FontWeight.BOLD),
@@ -535,12 +958,29 @@ class YijingApp:
                 number_search_button,
                 # 数字对照提示
                 ft.Text("1乾2兑3离4震5巽6坎7艮8坤", size=11, color=ft.Colors.GREY_600),
+                self.cast_method,
+                cast_button,
             ],
             alignment=ft.MainAxisAlignment.CENTER,
         )
 
-        # 搜索结果 - 减小高度
-        self.search_results = ft.Column(scroll=ft.ScrollMode.AUTO, height=100)
+        # 搜索结果 - 减小高度；提示文字与结果行只创建一次，之后复用
+        self.search_message = ft.Text("", size=12, visible=False)
+        self.result_tiles = [
+            ft.ListTile(
+                leading=ft.Text("", size=28),
+                title=ft.Text(""),
+                subtitle=ft.Text(""),
+                visible=False,
+                on_click=self._on_result_click,
+            )
+            for _ in range(SEARCH_RESULT_LIMIT)
+        ]
+        self.search_results = ft.Column(
+            [self.search_message, *self.result_tiles],
+            scroll=ft.ScrollMode.AUTO,
+            height=100,
+        )
 
         # 高亮选择区域 - 用于选择重点突出的爻
         self.highlight_checkboxes = []
@@ -584,18 +1024,65 @@ class YijingApp:
             alignment=ft.MainAxisAlignment.CENTER,
         )
 
+        # 路径演示：从当前卦到目标卦的最少变爻步骤
+        self.path_target = ft.TextField(
+            label="目标卦",
+            hint_text="如：未济",
+            width=120,
+            on_submit=self._on_path,
+        )
+        self.path_cuo_zong = ft.Checkbox(label="错综算一步", value=False)
+        path_row = ft.Row(
+            [
+                ft.Text("路径:", size=14, weight=ft.FontWeight.BOLD),
+                self.path_target,
+                self.path_cuo_zong,
+                ft.Button("演示路径", on_click=self._on_path),
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+        )
+
+        # 按卦序翻页：选择卦序后逐卦前后翻动
+        self.sequence_ordering = ft.Dropdown(
+            label="卦序",
+            width=160,
+            dense=True,
+            value=Ordering.KING_WEN.name,
+            options=[
+                ft.DropdownOption(key=ordering.name, text=ordering.value)
+                for ordering in Ordering
+            ],
+            on_select=lambda e: self._update_sequence_position(),
+        )
+        self.sequence_position = ft.Text("", size=14, width=70)
+        sequence_row = ft.Row(
+            [
+                ft.Text("卦序:", size=14, weight=ft.FontWeight.BOLD),
+                self.sequence_ordering,
+                ft.Button("上一卦", on_click=lambda e: self._on_sequence_step(-1)),
+                self.sequence_position,
+                ft.Button("下一卦", on_click=lambda e: self._on_sequence_step(1)),
+                ft.Button("六十四卦总览", on_click=self._on_overview),
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+        )
+        self._update_sequence_position(update=False)
+
         # 本卦视图（包含卦辞和爻辞，点击爻切换阴阳）
         self.hexagram_view = InteractiveHexagramView(
             original_gua=self.original_gua,
             on_yao_click=self._on_yao_click,
             title="玩索而得 - 点击爻切换阴阳",
             highlighted_positions=self.highlighted_yaos,
+            refresh=self._updates.refresh,
+            canvas=HEXAGRAM_CANVAS,
         )
 
         # 卦象关系
         self.relations_view = GuaRelationsView(
             self.original_gua,
             on_gua_select=self._on_gua_select,
+            refresh=self._updates.refresh,
         )
 
         # 卦辞详解（使用display_gua的信息）
@@ -683,6 +1170,8 @@ class YijingApp:
                                     self.search_results,
                                     number_search_row,
                                     highlight_row,
+                                    path_row,
+                                    sequence_row,
                                 ],
                                 spacing=5,
                             ),
@@ -694,48 +1183,116 @@ class YijingApp:
                 )
             )
 
+    def _show_results(self, items, message: str = "", color=None):
+        """显示搜索结果，复用预先创建的结果行
+
+        Args:
+            items: (卦, 标题, 副标题, 是否选中) 列表，卦为 None 时该行不可点击
+            message: 结果上方的提示文字，为空则隐藏
+            color: 提示文字颜色
+        """
+        self.search_message.value = message
+        self.search_message.color = color
+        self.search_message.visible = bool(message)
+        for i, tile in enumerate(self.result_tiles):
+            if i < len(items):
+                gua, title, subtitle, selected = items[i]
+                tile.data = gua
+                tile.leading.value = gua_glyph(gua) if gua is not None else ""
+                tile.title.value = title
+                tile.subtitle.value = subtitle
+                tile.selected = selected
+                tile.visible = True
+            else:
+                tile.data = None
+                tile.visible = False
+        self._updates.refresh(self.search_results)
+
+    def _gua_result_items(self, guas: List[Gua]):
+        """卦象搜索结果的行内容"""
+        return [
+            (
+                gua,
+                gua_title(gua),
+                gua.chinese_name,
+                False,
+            )
+            for gua in guas[:SEARCH_RESULT_LIMIT]
+        ]
+
+    def _cancel_live_search(self) -> int:
+        """作废尚未完成的边输入边搜索，返回新的代号
+
+        返回后已作废的查询不会再显示结果，之后显示的结果不会被其覆盖。
+        """
+        with self._search_lock:
+            self._search_generation += 1
+            return self._search_generation
+
+    def _on_search_change(self, e):
+        """输入变化时在后台线程中查询（防抖，过期结果丢弃）"""
+        generation = self._cancel_live_search()
+        self.page.run_thread(self._run_live_search, self.search_field.value, generation)
+
+    def _run_live_search(self, query: str, generation: int):
+        """后台线程：等待防抖间隔，输入未再变化时增量查询并显示"""
+        time.sleep(SEARCH_DEBOUNCE)
+        if generation != self._search_generation:
+            return
+        results = self._live_search.update(query)
+        with self._search_lock:
+            if generation != self._search_generation:
+                return
+            self._show_results(self._gua_result_items(results))
+
+    @batched
+    def _on_result_click(self, e):
+        """点击搜索结果行"""
+        if e.control.data is not None:
+            self._on_gua_select(e.control.data)
+
+    @batched
     def _on_search(self, e):
         """处理搜索"""
+        self._cancel_live_search()
         query = self.search_field.value.strip()
         if not query:
             return
 
         results = search_gua(query)
+        message = ""
 
-        # 清空并显示结果
-        self.search_results.controls = []
-
+        # 没有精确结果时给出模糊建议，仍没有则检索经文
         if not results:
-            self.search_results.controls.append(
-                ft.Text("未找到匹配的卦象", color=ft.Colors.RED)
+            results = search_gua(query, fuzzy=True)
+            if results:
+                message = "您是不是要找："
+        if results:
+            self._show_results(
+                self._gua_result_items(results), message, ft.Colors.GREY_600
             )
-        else:
-            for gua in results[:5]:  # 最多显示5个结果
-                trigram_names = {
-                    "qian": "天",
-                    "kun": "地",
-                    "zhen": "雷",
-                    "gen": "山",
-                    "kan": "水",
-                    "li": "火",
-                    "xun": "风",
-                    "dui": "泽",
-                }
-                upper = trigram_names.get(gua.upper_gua, "")
-                lower = trigram_names.get(gua.lower_gua, "")
-
-                def make_click_handler(g):
-                    return lambda e: self._on_gua_select(g)
-
-                result_item = ft.ListTile(
-                    title=ft.Text(f"{gua.name} ({upper}{lower}{gua.name})"),
-                    subtitle=ft.Text(gua.chinese_name),
-                    on_click=make_click_handler(gua),
-                )
-                self.search_results.controls.append(result_item)
+            return
 
-        self.search_results.update()
+        items = []
+        for hit in search_text(query, limit=SEARCH_RESULT_LIMIT):
+            start, end = hit.spans[0] if hit.spans else (0, 0)
+            label = TEXT_FIELD_LABELS[hit.field]
+            if hit.position:
+                label = f"{'初二三四五上'[hit.position - 1]}爻{label}"
+            items.append(
+                (
+                    hit.gua,
+                    f"{hit.gua.name} · {label}",
+                    hit.text[max(0, start - 8) : end + 8],
+                    False,
+                )
+            )
+        if items:
+            self._show_results(items)
+        else:
+            self._show_results([], "未找到匹配的卦象", ft.Colors.RED)
 
+    @batched
     def _on_number_search(self, e):
         """处理数字定位搜索"""
         try:
@@ -743,28 +1300,19 @@ class YijingApp:
             lower = int(self.lower_field.value) if self.lower_field.value else 0
             moving = int(self.moving_field.value) if self.moving_field.value else 0
         except ValueError:
-            self.search_results.controls = [
-                ft.Text("请输入有效的数字", color=ft.Colors.RED)
-            ]
-            self.search_results.update()
+            self._show_results([], "请输入有效的数字", ft.Colors.RED)
             return
 
         # 验证输入范围
         if not (1 <= upper <= 8) or not (1 <= lower <= 8):
-            self.search_results.controls = [
-                ft.Text("上卦和下卦数字必须在1-8之间", color=ft.Colors.RED)
-            ]
-            self.search_results.update()
+            self._show_results([], "上卦和下卦数字必须在1-8之间", ft.Colors.RED)
             return
 
         # 查找卦象
         gua = get_gua_by_numbers(upper, lower)
 
         if not gua:
-            self.search_results.controls = [
-                ft.Text("未找到对应的卦象", color=ft.Colors.RED)
-            ]
-            self.search_results.update()
+            self._show_results([], "未找到对应的卦象", ft.Colors.RED)
             return
 
         # 设置动爻（如果输入了动爻）
@@ -779,34 +1327,134 @@ class YijingApp:
         self.original_gua = gua
         self.hexagram_view.update_gua(gua, self.changing_yaos, [])
         self.relations_view.update_gua(gua)
-        self._update_gua_info(
-            gua.get_changed_gua(self.changing_yaos) if self.changing_yaos else gua
-        )
-
-        # 显示结果提示
-        trigram_names = {
-            "qian": "乾",
-            "kun": "坤",
-            "zhen": "震",
-            "gen": "艮",
-            "kan": "坎",
-            "li": "离",
-            "xun": "巽",
-            "dui": "兑",
-        }
-        upper_name = trigram_names.get(gua.upper_gua, "")
-        lower_name = trigram_names.get(gua.lower_gua, "")
+        self._update_sequence_position()
+        self._update_gua_info(self.hexagram_view.display_gua)
+
+        # 显示结果提示（该行不可点击，以免清掉刚设置的动爻）
+        upper_name = TRIGRAM_NAMES[gua.upper_gua]
+        lower_name = TRIGRAM_NAMES[gua.lower_gua]
 
         moving_text = f" · 动爻：第{moving}爻" if 1 <= moving <= 6 else ""
-        self.search_results.controls = [
-            ft.ListTile(
-                title=ft.Text(f"{gua.name} ({upper_name}{lower_name}{gua.name})"),
-                subtitle=ft.Text(f"数字定位：上卦{upper} · 下卦{lower}{moving_text}"),
-                selected=True,
+        self._show_results(
+            [
+                (
+                    None,
+                    f"{gua.name} ({upper_name}{lower_name}{gua.name})",
+                    f"数字定位：上卦{upper} · 下卦{lower}{moving_text}",
+                    True,
+                )
+            ]
+        )
+
+    @batched
+    def _on_cast(self, e):
+        """摇卦：以所得之卦为本卦，老阴老阳为变爻"""
+        self._cancel_live_search()
+        lines = cast_lines(CastMethod(self.cast_method.value))
+        result = lines_to_cast(lines)
+
+        self.original_gua = result.gua
+        self.changing_yaos = mask_to_positions(result.mask)
+        self.highlighted_yaos = []
+
+        # 更新所有视图
+        self.hexagram_view.update_gua(result.gua, self.changing_yaos, [])
+        self.relations_view.update_gua(result.gua)
+        self._update_sequence_position()
+        self._update_gua_info(self.hexagram_view.display_gua)
+
+        self._show_results(
+            [
+                (
+                    None,
+                    f"{result.gua.name} 之 {result.changed.name}",
+                    "爻值（初至上）：" + " ".join(str(v) for v in lines),
+                    True,
+                )
+            ]
+        )
+
+    def _on_path(self, e):
+        """演示从当前卦到目标卦的最短路径"""
+        self._cancel_live_search()
+        targets = search_gua(self.path_target.value or "", fuzzy=True)
+        if not targets:
+            self._show_results([], "未找到目标卦", ft.Colors.RED)
+            return
+
+        start = self.hexagram_view.display_gua
+        end = targets[0]
+        moves = CUO_ZONG_MOVES if self.path_cuo_zong.value else HYPERCUBE_MOVES
+        steps = get_graph(moves).steps(start, end)
+
+        # 演示结束后停在目标卦上；先合并发送其余面板的更新，再开始演示
+        with self._updates.transaction():
+            self.original_gua = end
+            self.changing_yaos = []
+            self.relations_view.update_gua(end)
+            self._update_sequence_position()
+            self._update_gua_info(end)
+
+            route = " → ".join(f"{step.move.label}得{step.gua.name}" for step in steps)
+            self._show_results(
+                [],
+                f"{start.name} → {end.name}：{len(steps)}步"
+                + (f"（{route}）" if route else ""),
+                ft.Colors.BLUE_GREY_700,
             )
-        ]
-        self.search_results.update()
+        self.page.run_thread(self.hexagram_view.play_path, start, steps)
+
+    def _ordering(self) -> Ordering:
+        """当前选择的卦序"""
+        return Ordering[self.sequence_ordering.value]
 
+    def _update_sequence_position(self, update: bool = True):
+        """显示本卦在当前卦序中的次序"""
+        self.sequence_position.value = (
+            f"{rank(self.original_gua, self._ordering())} / 64"
+        )
+        if update:
+            self._updates.refresh(self.sequence_position)
+
+    @batched
+    def _on_sequence_step(self, step: int):
+        """按当前卦序翻到前一卦或后一卦，并在后台预取再前后一卦的文本"""
+        ordering = self._ordering()
+        gua = next_gua(self.original_gua, ordering, step)
+        self._on_gua_select(gua)
+        self.page.run_thread(self._prefetch_neighbors, gua, ordering)
+
+    def _on_overview(self, e):
+        """打开六十四卦总览（第一次打开时创建，之后复用）"""
+        if self._overview is None:
+            self._overview = ft.AlertDialog(
+                title=ft.Text("六十四卦总览"),
+                content=ft.Container(
+                    GuaOverview(on_gua_select=self._on_overview_select),
+                    width=640,
+                    height=640,
+                ),
+            )
+        self.page.show_dialog(self._overview)
+
+    @batched
+    def _on_overview_select(self, gua: Gua):
+        """在总览中点选一卦：关闭总览，按选卦处理
+
+        不用 page.pop_dialog()（它会单独发送一次），关闭对话框与选卦的改动
+        一并提交，只发送一次。
+        """
+        self._overview.open = False
+        self._updates.refresh(self._overview)
+        self._on_gua_select(gua)
+
+    @staticmethod
+    def _prefetch_neighbors(gua: Gua, ordering: Ordering):
+        """加载前后两卦的文本，翻页时即可直接显示"""
+        for neighbor in (next_gua(gua, ordering), prev_gua(gua, ordering)):
+            neighbor.texts
+
+    @batched
     def _on_yao_click(self, yao: Yao):
         """处理爻点击 - 切换变爻状态"""
         if yao.position in self.changing_yaos:
@@ -819,12 +1467,8 @@ class YijingApp:
             self.original_gua, self.changing_yaos, self.highlighted_yaos
         )
 
-        # 更新卦辞详解
-        if self.changing_yaos:
-            changed_gua = self.original_gua.get_changed_gua(self.changing_yaos)
-            self._update_gua_info(changed_gua)
-        else:
-            self._update_gua_info(self.original_gua)
+        # 更新卦辞详解（直接复用本卦视图已算出的变卦）
+        self._update_gua_info(self.hexagram_view.display_gua)
 
     def _update_gua_info(self, gua: Gua):
         """更新卦辞信息"""
@@ -835,8 +1479,9 @@ class YijingApp:
             ft.Text("象曰", size=16, weight=ft.FontWeight.BOLD),
             ft.Text(gua.xiang, size=14),
         ]
-        self.gua_info.update()
+        self._updates.refresh(self.gua_info)
 
+    @batched
     def _on_gua_select(self, gua: Gua):
         """处理卦象选择"""
         self.original_gua = gua
@@ -849,11 +1494,13 @@ class YijingApp:
 
         # 更新卦辞信息
         self._update_gua_info(gua)
+        self._update_sequence_position()
 
         # 清空搜索结果
-        self.search_results.controls = []
-        self.search_results.update()
+        self._cancel_live_search()
+        self._show_results([])
 
+    @batched
     def _on_highlight_change(self, position: int, is_checked: bool):
         """处理高亮选择变化"""
         if is_checked:
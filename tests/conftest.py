@@ -29,3 +29,11 @@ def sample_gua_qian(gua_data):
 def sample_gua_kun(gua_data):
     """提供坤卦作为示例"""
     return gua_data["gua_map"]["000000"]
+
+
+@pytest.fixture(scope="session")
+def gua_by_name(gua_data):
+    """按卦名取卦的函数，如 gua_by_name("需")"""
+    from gua_data import search_gua
+
+    return lambda name: search_gua(name)[0]
@@ -0,0 +1,100 @@
+"""
+测试 gua_batch.py 批量卦象变换
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import gua_batch  # noqa: E402
+from gua_data import get_registry  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def all_codes():
+    """全部64个位编码"""
+    return np.arange(64, dtype=np.uint8)
+
+
+class TestBatchTransforms:
+    """测试批量变换与逐个调用 Gua 方法的结果一致"""
+
+    def test_relations_match_gua(self, all_codes):
+        """测试错、综、反、互与 Gua 方法一致"""
+        result = gua_batch.transform(all_codes)
+        for gua in get_registry().by_code:
+            assert result.cuo[gua.code] == gua.get_dui_gua().code
+            assert result.zong[gua.code] == gua.get_zong_gua().code
+            assert result.fan[gua.code] == gua.get_fan_gua().code
+            assert result.hu[gua.code] == gua.get_hu_gua().code
+
+    def test_changed_matches_gua(self, all_codes):
+        """测试所有 (卦, 掩码) 组合的变卦"""
+        codes = np.repeat(all_codes, 64)
+        masks = np.tile(all_codes, 64)
+        result = gua_batch.changed(codes, masks)
+        by_code = get_registry().by_code
+        for code, mask, out in zip(codes, masks, result):
+            assert by_code[code].get_changed_gua(int(mask)).code == out
+
+    def test_trigrams(self, all_codes):
+        """测试上下卦拆分"""
+        lower, upper = gua_batch.trigrams(all_codes)
+        for gua in get_registry().by_code:
+            assert lower[gua.code] == gua.lower_code
+            assert upper[gua.code] == gua.upper_code
+
+    def test_dtypes_and_shapes(self):
+        """测试输出为与输入同形状的 uint8 数组"""
+        codes = np.array([[0, 63], [7, 56]])
+        result = gua_batch.transform(codes, masks=1)
+        for array in result:
+            assert array.dtype == np.uint8
+            assert array.shape == codes.shape
+        assert result.changed.tolist() == [[1, 62], [6, 57]]
+
+    def test_no_masks(self, all_codes):
+        """测试省略掩码时变卦即本卦"""
+        assert (gua_batch.transform(all_codes).changed == all_codes).all()
+
+    def test_single_functions(self, all_codes):
+        """测试单项函数与 transform 一致"""
+        result = gua_batch.transform(all_codes)
+        assert (gua_batch.cuo(all_codes) == result.cuo).all()
+        assert (gua_batch.zong(all_codes) == result.zong).all()
+        assert (gua_batch.fan(all_codes) == result.fan).all()
+        assert (gua_batch.hu(all_codes) == result.hu).all()
+
+    @pytest.mark.parametrize("values", [[64], [-1], [0, 100]])
+    def test_out_of_range(self, values):
+        """测试超出范围的编码与掩码"""
+        with pytest.raises(ValueError):
+            gua_batch.transform(values)
+        with pytest.raises(ValueError):
+            gua_batch.changed([0] * len(values), values)
+
+    def test_empty(self):
+        """测试空输入"""
+        assert gua_batch.transform([]).cuo.size == 0
+
+
+class TestKingWen:
+    """测试位编码与卦序互转"""
+
+    def test_round_trip(self, all_codes):
+        """测试互转可还原"""
+        indices = gua_batch.to_kingwen(all_codes)
+        assert sorted(indices.tolist()) == list(range(1, 65))
+        assert (gua_batch.from_kingwen(indices) == all_codes).all()
+
+    def test_matches_registry(self, all_codes):
+        """测试与 Gua.index 一致"""
+        indices = gua_batch.to_kingwen(all_codes)
+        for gua in get_registry().by_code:
+            assert indices[gua.code] == gua.index
+
+    @pytest.mark.parametrize("values", [[0], [65]])
+    def test_invalid_index(self, values):
+        """测试无效卦序"""
+        with pytest.raises(ValueError):
+            gua_batch.from_kingwen(values)
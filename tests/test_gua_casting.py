@@ -0,0 +1,176 @@
+"""
+测试 gua_casting.py 起卦
+"""
+
+import random
+from collections import Counter
+from fractions import Fraction
+
+import pytest
+from gua_casting import (
+    COIN_TABLE,
+    YARROW_TABLE,
+    CastMethod,
+    cast,
+    cast_batch,
+    cast_lines,
+    hour_branch,
+    lines_to_cast,
+    meihua_batch,
+    meihua_numbers,
+    meihua_time,
+    year_branch,
+)
+from gua_data import get_gua_by_index
+
+
+class TestLineTables:
+    """测试爻值表的概率"""
+
+    @staticmethod
+    def _probabilities(table):
+        counts = Counter(table)
+        return {value: Fraction(counts[value], len(table)) for value in (6, 7, 8, 9)}
+
+    def test_coins(self):
+        """测试三枚铜钱 1/8、3/8、3/8、1/8"""
+        assert self._probabilities(COIN_TABLE) == {
+            6: Fraction(1, 8),
+            7: Fraction(3, 8),
+            8: Fraction(3, 8),
+            9: Fraction(1, 8),
+        }
+
+    def test_yarrow(self):
+        """测试蓍草 1/16、5/16、7/16、3/16"""
+        assert self._probabilities(YARROW_TABLE) == {
+            6: Fraction(1, 16),
+            7: Fraction(5, 16),
+            8: Fraction(7, 16),
+            9: Fraction(3, 16),
+        }
+
+
+class TestSingleCast:
+    """测试单次起卦"""
+
+    def test_lines_to_cast(self):
+        """测试爻值转本卦、变爻与之卦"""
+        result = lines_to_cast([9, 7, 7, 7, 7, 7])
+        assert result.gua.name == "乾"
+        assert result.mask == 0b000001
+        assert result.changed.name == "姤"
+
+    def test_old_yin_changes(self):
+        """测试老阴为阴爻且变"""
+        result = lines_to_cast([8, 8, 8, 8, 8, 6])
+        assert result.gua.name == "坤"
+        assert result.changed is result.gua.get_changed_gua([6])
+
+    def test_no_change(self):
+        """测试无变爻时之卦即本卦"""
+        result = lines_to_cast([7, 8, 7, 8, 7, 8])
+        assert result.mask == 0
+        assert result.changed is result.gua
+
+    @pytest.mark.parametrize("values", [[7] * 5, [7] * 7, [5, 7, 7, 7, 7, 7]])
+    def test_invalid_lines(self, values):
+        """测试无效爻值"""
+        with pytest.raises(ValueError):
+            lines_to_cast(values)
+
+    @pytest.mark.parametrize("method", list(CastMethod))
+    def test_seeded(self, method):
+        """测试相同种子结果相同且与爻值一致"""
+        first = cast(method, random.Random(7))
+        assert first == cast(method, random.Random(7))
+        assert first == lines_to_cast(cast_lines(method, random.Random(7)))
+
+
+class TestMeihua:
+    """测试梅花易数"""
+
+    def test_numbers(self):
+        """测试数字起卦：5巽为上，8坤为下，13除6余1动初爻"""
+        result = meihua_numbers(5, 8)
+        assert result.gua.name == "观"
+        assert result.mask == 0b000001
+        assert result.changed.name == "益"
+
+    def test_remainders(self):
+        """测试余0作8、余0作6：16为坤，9为乾，12动上爻"""
+        result = meihua_numbers(16, 9, 12)
+        assert result.gua is get_gua_by_index(11)  # 地天泰
+        assert result.mask == 0b100000
+
+    def test_explicit_moving(self):
+        """测试指定动爻数"""
+        assert meihua_numbers(1, 1, 3).mask == 0b000100
+
+    def test_branches(self):
+        """测试年支与时支"""
+        assert year_branch(1984) == 1  # 甲子
+        assert year_branch(2024) == 5  # 甲辰
+        assert hour_branch(23) == 1  # 子时
+        assert hour_branch(0) == 1
+        assert hour_branch(1) == 2  # 丑时
+        assert hour_branch(22) == 12  # 亥时
+
+    def test_time(self):
+        """测试时间起卦：上卦数为年月日之和，下卦数与动爻数再加时支"""
+        result = meihua_time(5, 3, 15, 6)
+        assert result == meihua_numbers(23, 29, 29)
+
+
+class TestBatchCast:
+    """测试批量起卦"""
+
+    @pytest.fixture(autouse=True)
+    def _numpy(self):
+        pytest.importorskip("numpy")
+
+    @pytest.mark.parametrize("method", list(CastMethod))
+    def test_reproducible(self, method):
+        """测试相同种子结果相同"""
+        first = cast_batch(1000, method, seed=42)
+        second = cast_batch(1000, method, seed=42)
+        for a, b in zip(first, second):
+            assert (a == b).all()
+
+    @pytest.mark.parametrize("method", list(CastMethod))
+    def test_changed_matches_gua(self, method):
+        """测试之卦与 get_changed_gua 一致"""
+        from gua_data import get_registry
+
+        by_code = get_registry().by_code
+        codes, masks, changed = cast_batch(500, method, seed=1)
+        for code, mask, out in zip(codes, masks, changed):
+            assert by_code[code].get_changed_gua(int(mask)).code == out
+
+    def test_yarrow_frequencies(self):
+        """测试蓍草各爻值的频率接近理论值"""
+        codes, masks, _ = cast_batch(200_000, CastMethod.YARROW, seed=3)
+        for line in range(6):
+            yang = (codes >> line) & 1
+            moving = (masks >> line) & 1
+            observed = {
+                6: ((yang == 0) & (moving == 1)).mean(),
+                7: ((yang == 1) & (moving == 0)).mean(),
+                8: ((yang == 0) & (moving == 0)).mean(),
+                9: ((yang == 1) & (moving == 1)).mean(),
+            }
+            for value, expected in zip((6, 7, 8, 9), (1, 5, 7, 3)):
+                assert observed[value] == pytest.approx(expected / 16, abs=0.01)
+
+    def test_meihua_batch_matches_single(self):
+        """测试批量梅花易数与单次结果一致"""
+        uppers = list(range(1, 30))
+        lowers = list(range(7, 36))
+        codes, masks, changed = meihua_batch(uppers, lowers)
+        for i, (upper, lower) in enumerate(zip(uppers, lowers)):
+            result = meihua_numbers(upper, lower)
+            assert (codes[i], masks[i], changed[i]) == (
+                result.gua.code,
+                result.mask,
+                result.changed.code,
+            )
@@ -0,0 +1,164 @@
+"""
+测试 gua_charts.py 纳甲装卦
+"""
+
+import datetime
+
+import pytest
+from gua_charts import (
+    BRANCHES,
+    GENERATION_NAMES,
+    RELATIVES,
+    SPIRITS,
+    STEMS,
+    chart_batch,
+    day_branch,
+    day_stem,
+    get_chart,
+)
+from gua_data import get_registry
+
+
+def _labels(chart):
+    """自上爻至初爻的排盘文字"""
+    return [chart.line_label(position) for position in range(6, 0, -1)]
+
+
+class TestChart:
+    """测试单卦排盘"""
+
+    def test_qian(self, gua_by_name):
+        """测试乾为天（甲日）"""
+        chart = get_chart(gua_by_name("乾"))
+        assert chart.palace_name == "乾宫"
+        assert GENERATION_NAMES[chart.generation] == "本宫"
+        assert (chart.shi, chart.ying) == (6, 3)
+        assert _labels(chart) == [
+            "玄武 父母 壬戌土 世",
+            "白虎 兄弟 壬申金",
+            "螣蛇 官鬼 壬午火",
+            "勾陈 父母 甲辰土 应",
+            "朱雀 妻财 甲寅木",
+            "青龙 子孙 甲子水",
+        ]
+
+    def test_kun(self, gua_by_name):
+        """测试坤为地的纳甲"""
+        chart = get_chart(gua_by_name("坤"))
+        stems_branches = [
+            STEMS[s] + BRANCHES[b] for s, b in zip(chart.stems, chart.branches)
+        ]
+        assert stems_branches == ["乙未", "乙巳", "乙卯", "癸丑", "癸亥", "癸酉"]
+        assert chart.palace_name == "坤宫"
+
+    @pytest.mark.parametrize(
+        "name, palace, generation, shi, ying",
+        [
+            ("姤", "乾宫", "一世", 1, 4),
+            ("屯", "坎宫", "二世", 2, 5),
+            ("否", "乾宫", "三世", 3, 6),
+            ("观", "乾宫", "四世", 4, 1),
+            ("剥", "乾宫", "五世", 5, 2),
+            ("晋", "乾宫", "游魂", 4, 1),
+            ("大有", "乾宫", "归魂", 3, 6),
+            ("明夷", "坎宫", "游魂", 4, 1),
+        ],
+    )
+    def test_palace_and_shi_ying(
+        self, name, palace, generation, shi, ying, gua_by_name
+    ):
+        """测试八宫、世数与世应爻位"""
+        chart = get_chart(gua_by_name(name))
+        assert chart.palace_name == palace
+        assert GENERATION_NAMES[chart.generation] == generation
+        assert (chart.shi, chart.ying) == (shi, ying)
+
+    def test_relatives_follow_palace(self, gua_by_name):
+        """测试六亲以本宫五行为我：屯属坎宫（水），子水为兄弟"""
+        chart = get_chart(gua_by_name("屯"))
+        assert RELATIVES[chart.relatives[0]] == "兄弟"
+        assert RELATIVES[chart.relatives[1]] == "子孙"
+
+    @pytest.mark.parametrize(
+        "stem, first",
+        [(0, "青龙"), (2, "朱雀"), (4, "勾陈"), (5, "螣蛇"), (7, "白虎"), (9, "玄武")],
+    )
+    def test_spirits(self, stem, first, gua_by_name):
+        """测试六神按日干自初爻起"""
+        chart = get_chart(gua_by_name("乾"), stem)
+        assert SPIRITS[chart.spirits[0]] == first
+        assert [SPIRITS[s] for s in chart.spirits] == [
+            SPIRITS[(SPIRITS.index(first) + i) % 6] for i in range(6)
+        ]
+
+    def test_bad_stem(self, gua_by_name):
+        """测试日干越界"""
+        gua = gua_by_name("乾")
+        with pytest.raises(IndexError):
+            get_chart(gua, 10)
+        with pytest.raises(IndexError):
+            get_chart(gua, -1)
+
+    def test_cached(self, gua_by_name):
+        """测试排盘结果预先生成，重复查询返回同一对象"""
+        gua = gua_by_name("乾")
+        assert get_chart(gua, 3) is get_chart(gua, 3)
+
+
+class TestDayCycle:
+    """测试日干支"""
+
+    def test_base_day(self):
+        """测试1949年10月1日为甲子日"""
+        date = datetime.date(1949, 10, 1)
+        assert (day_stem(date), day_branch(date)) == (0, 0)
+
+    def test_known_day(self):
+        """测试2024年2月10日为甲辰日"""
+        date = datetime.date(2024, 2, 10)
+        assert STEMS[day_stem(date)] + BRANCHES[day_branch(date)] == "甲辰"
+
+    def test_sixty_day_cycle(self):
+        """测试干支六十日一周"""
+        date = datetime.date(2000, 1, 1)
+        later = date + datetime.timedelta(days=60)
+        assert (day_stem(date), day_branch(date)) == (
+            day_stem(later),
+            day_branch(later),
+        )
+
+
+class TestChartBatch:
+    """测试批量排盘"""
+
+    @pytest.fixture(autouse=True)
+    def _numpy(self):
+        pytest.importorskip("numpy")
+
+    def test_matches_get_chart(self):
+        """测试批量结果与逐卦查询一致"""
+        import numpy as np
+
+        codes = np.repeat(np.arange(64), 10)
+        stems = np.tile(np.arange(10), 64)
+        result = chart_batch(codes, stems)
+        by_code = get_registry().by_code
+        for row, (code, stem) in enumerate(zip(codes, stems)):
+            chart = get_chart(by_code[code], int(stem))
+            assert result.palace[row] == chart.palace
+            assert result.generation[row] == chart.generation
+            assert (result.shi[row], result.ying[row]) == (chart.shi, chart.ying)
+            assert tuple(result.branches[row]) == chart.branches
+            assert tuple(result.relatives[row]) == chart.relatives
+            assert tuple(result.spirits[row]) == chart.spirits
+
+    def test_broadcast_stem(self):
+        """测试日干可为单个数"""
+        result = chart_batch([63, 0], 4)
+        assert result.stems.shape == (2, 6)
+        assert result.spirits[0][0] == SPIRITS.index("勾陈")
+
+    def test_bad_stem(self):
+        """测试日干越界"""
+        with pytest.raises(ValueError):
+            chart_batch([63], [10])
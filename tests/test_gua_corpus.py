@@ -0,0 +1,112 @@
+"""
+测试 gua_corpus.py 二进制语料的生成与读取
+"""
+
+import mmap
+
+import pytest
+import gua_corpus
+from gua_corpus import (
+    Corpus,
+    YIJING_CORPUS_PATH,
+    YIJING_SLOTS,
+    write_corpus,
+    yijing_records,
+)
+from gua_data import HAS_FULL_DATA, YIJING_DATA
+
+
+class TestCorpusFormat:
+    """测试语料文件格式"""
+
+    def test_round_trip(self, tmp_path):
+        """测试写入后逐段读回"""
+        records = [["乾", "元亨利贞。", ""], ["坤", "元亨，利牝马之贞。", "含章"]]
+        path = tmp_path / "corpus.bin"
+        write_corpus(str(path), records)
+
+        corpus = Corpus(str(path))
+        assert corpus.record_count == 2
+        assert corpus.slot_count == 3
+        assert corpus.get(0, 1) == "元亨利贞。"
+        assert corpus.get(0, 2) == ""
+        assert corpus.get_record(1) == records[1]
+
+    def test_index_out_of_range(self, tmp_path):
+        """测试越界访问"""
+        path = tmp_path / "corpus.bin"
+        write_corpus(str(path), [["a", "b"]])
+        corpus = Corpus(str(path))
+        with pytest.raises(IndexError):
+            corpus.get(1, 0)
+        with pytest.raises(IndexError):
+            corpus.get(0, 2)
+
+    def test_uneven_records_rejected(self, tmp_path):
+        """测试槽数不一致的记录"""
+        with pytest.raises(ValueError):
+            write_corpus(str(tmp_path / "corpus.bin"), [["a", "b"], ["c"]])
+
+    def test_invalid_file_rejected(self, tmp_path):
+        """测试非语料文件"""
+        path = tmp_path / "corpus.bin"
+        path.write_bytes(b"not a corpus file at all")
+        with pytest.raises(ValueError):
+            Corpus(str(path))
+
+    def test_corrupt_file_closes_mapping(self, tmp_path, monkeypatch):
+        """测试过短、文件头不符、偏移表损坏的文件报错时已关闭映射"""
+        path = tmp_path / "corpus.bin"
+        write_corpus(str(path), [["a", "b"]])
+        data = path.read_bytes()
+        # 偏移表损坏：文件头中的文本区偏移（第12-16字节）与偏移表长度不符
+        bad_offset = bytearray(data)
+        bad_offset[12:16] = (len(data) + 1).to_bytes(4, "little")
+        corrupt = [data[:4], b"XXXX" + data[4:], bytes(bad_offset)]
+
+        mapped = []
+        open_mmap = mmap.mmap
+
+        def recording_mmap(*args, **kwargs):
+            mapped.append(open_mmap(*args, **kwargs))
+            return mapped[-1]
+
+        monkeypatch.setattr(gua_corpus.mmap, "mmap", recording_mmap)
+        for content in corrupt:
+            path.write_bytes(content)
+            with pytest.raises(ValueError):
+                Corpus(str(path))
+        assert len(mapped) == len(corrupt)
+        assert all(m.closed for m in mapped)
+
+
+class TestYijingCorpus:
+    """测试随程序发布的周易语料"""
+
+    def test_corpus_matches_full_data(self):
+        """测试语料与 yijing_full_data 一致（修改数据后需重新运行 gua_corpus.py）"""
+        if not HAS_FULL_DATA:
+            pytest.skip("完整数据文件未找到")
+        corpus = Corpus(YIJING_CORPUS_PATH)
+        assert corpus.record_count == 64
+        assert corpus.slot_count == len(YIJING_SLOTS)
+        for index, record in enumerate(yijing_records(YIJING_DATA)):
+            assert corpus.get_record(index) == record
+
+    def test_texts_loaded_by_index(self, gua_data):
+        """测试文本按卦序取自语料（遁卦在完整数据中写作遯）"""
+        dun = gua_data["all_guas"][32]
+        assert dun.name == "遁"
+        assert dun.description == YIJING_DATA["遯"]["description"]
+        assert dun.yaos[0].text == YIJING_DATA["遯"]["yaos"][0]["text"]
+
+    def test_fallback_without_corpus(self, gua_data, monkeypatch):
+        """测试语料不可用时回退到完整数据，遁卦按卦序找到遯的文本"""
+        if not HAS_FULL_DATA:
+            pytest.skip("完整数据文件未找到")
+        import gua_data as module
+
+        monkeypatch.setattr(module, "_corpus", False)
+        monkeypatch.setattr(module, "_TEXT_CACHE", {})
+        dun = gua_data["all_guas"][32]
+        assert dun.description == YIJING_DATA["遯"]["description"]
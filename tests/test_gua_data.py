@@ -2,8 +2,31 @@
 测试 gua_data.py 核心数据结构和算法
 """
 
+import dataclasses
+import os
+import subprocess
+import sys
+
 import pytest
-from gua_data import Yao, Gua, YaoType, binary_to_gua, search_gua, get_gua_by_index
+from gua_data import (
+    Yao,
+    Gua,
+    YaoType,
+    binary_to_gua,
+    binary_to_code,
+    changes_to_mask,
+    code_to_binary,
+    positions_to_mask,
+    search_gua,
+    get_gua_by_index,
+    get_registry,
+    init_data,
+    get_gua_by_numbers,
+    get_gua_by_trigrams,
+    NumberingScheme,
+    NUMBER_TO_TRIGRAM,
+)
+import gua_data
 
 
 class TestYao:
@@ -41,10 +64,39 @@ class TestYao:
         yang_yao = yin_yao.flip()
         assert yang_yao.yao_type == YaoType.YANG
 
+    def test_yao_immutable(self):
+        """测试爻不可修改、可哈希且没有实例 __dict__"""
+        yao = Yao(position=1, yao_type=YaoType.YANG, text="测试", xiang="象曰")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            yao.text = "修改"
+        assert not hasattr(yao, "__dict__")
+        assert hash(yao) == hash(
+            Yao(position=1, yao_type=YaoType.YANG, text="测试", xiang="象曰")
+        )
+
+    def test_yao_flip_shared(self, sample_gua_qian):
+        """测试翻转返回共享实例，翻转两次回到原爻"""
+        yao = sample_gua_qian.yaos[0]
+        assert yao.flip() is yao.flip()
+        assert yao.flip().flip() is yao
+
 
 class TestGua:
     """测试卦类"""
 
+    def test_gua_immutable(self, sample_gua_qian):
+        """测试卦不可修改、可哈希且没有实例 __dict__"""
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            sample_gua_qian.name = "坤"
+        assert not hasattr(sample_gua_qian, "__dict__")
+        assert isinstance(sample_gua_qian.yaos, tuple)
+        assert {sample_gua_qian: 1}[sample_gua_qian] == 1
+
+    def test_relations_are_canonical(self, sample_gua_qian, sample_gua_kun):
+        """测试关系卦与变卦都返回同一个卦实例"""
+        assert sample_gua_qian.get_dui_gua() is sample_gua_kun
+        assert sample_gua_qian.get_changed_gua([1, 2, 3, 4, 5, 6]) is sample_gua_kun
+
     def test_gua_creation(self, sample_gua_qian):
         """测试卦创建"""
         gua = sample_gua_qian
@@ -69,6 +121,132 @@ class TestGua:
         assert "天天" in short_names
 
 
+class TestGuaRegistry:
+    """测试共享的数据注册表"""
+
+    def test_init_data_idempotent(self):
+        """测试重复初始化返回同一注册表"""
+        registry = get_registry()
+        assert init_data() is registry
+        assert init_data() is registry
+
+    def test_module_names_stable(self):
+        """测试 ALL_GUAS、GUA_MAP 不会因重新初始化而失效"""
+        all_guas = gua_data.ALL_GUAS
+        init_data()
+        assert gua_data.ALL_GUAS is all_guas
+        assert gua_data.GUA_MAP["111111"] is all_guas[0]
+
+    def test_registry_immutable(self):
+        """测试注册表不可修改"""
+        registry = get_registry()
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            registry.guas = ()
+        with pytest.raises(TypeError):
+            registry.by_binary["111111"] = None
+
+    def test_concurrent_build(self):
+        """测试多线程并发构建只得到一个注册表"""
+        code = (
+            "import threading, gua_data\n"
+            "results = []\n"
+            "threads = [threading.Thread("
+            "target=lambda: results.append(gua_data.get_registry())) "
+            "for _ in range(16)]\n"
+            "[t.start() for t in threads]\n"
+            "[t.join() for t in threads]\n"
+            "assert len(results) == 16\n"
+            "assert all(r is results[0] for r in results)\n"
+        )
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, "-c", code], cwd=project_dir, check=True)
+
+
+class TestLazyTexts:
+    """测试文本惰性加载"""
+
+    def test_import_does_not_load_full_data(self):
+        """测试导入 gua_data 及读取文本时都不导入完整文本数据（文本来自语料）"""
+        code = (
+            "import sys, gua_data; "
+            "assert len(gua_data.ALL_GUAS) == 64; "
+            "assert 'yijing_full_data' not in sys.modules; "
+            "assert gua_data.ALL_GUAS[0].description == '元亨利贞。'; "
+            "assert 'yijing_full_data' not in sys.modules"
+        )
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, "-c", code], cwd=project_dir, check=True)
+
+    def test_texts_cached(self, sample_gua_qian):
+        """测试文本首次访问后被缓存"""
+        texts = sample_gua_qian.texts
+        assert sample_gua_qian.texts is texts
+        assert sample_gua_qian.yaos is texts.yaos
+        assert sample_gua_qian.description == texts.description
+
+
+class TestGuaCode:
+    """测试卦的位编码"""
+
+    def test_code_matches_binary(self, gua_data):
+        """测试位编码与二进制编码一致"""
+        for gua in gua_data["all_guas"]:
+            assert code_to_binary(gua.code) == gua.binary_code
+            assert binary_to_code(gua.binary_code) == gua.code
+
+    def test_code_matches_yaos(self, gua_data):
+        """测试位编码与六爻阴阳一致（第1爻为最低位）"""
+        for gua in gua_data["all_guas"]:
+            for yao in gua.yaos:
+                assert bool(gua.code >> (yao.position - 1) & 1) == yao.is_yang
+
+    def test_trigram_codes(self, gua_data):
+        """测试上下卦编码拆分"""
+        tai = gua_data["gua_map"]["111000"]  # 地天泰
+        assert tai.lower_code == 0b111
+        assert tai.upper_code == 0b000
+        zhun = gua_data["gua_map"]["100010"]  # 水雷屯
+        assert zhun.lower_code == binary_to_code("100")
+        assert zhun.upper_code == binary_to_code("010")
+
+    def test_positions_to_mask(self):
+        """测试爻位列表转位掩码"""
+        assert positions_to_mask([]) == 0
+        assert positions_to_mask([1]) == 0b000001
+        assert positions_to_mask([6]) == 0b100000
+        assert positions_to_mask([1, 3, 5]) == 0b010101
+
+    @pytest.mark.parametrize("position", [0, 7, -1])
+    def test_positions_out_of_range(self, position, sample_gua_qian):
+        """测试爻位超出 1-6 时报错，而不是算出错误的掩码"""
+        with pytest.raises(ValueError, match="1-6"):
+            positions_to_mask([1, position])
+        with pytest.raises(ValueError):
+            sample_gua_qian.get_changed_gua([position])
+
+    def test_changes_to_mask(self):
+        """测试变爻可用爻位列表或掩码"""
+        assert changes_to_mask([2, 5]) == changes_to_mask(0b010010) == 0b010010
+        assert changes_to_mask(0) == 0
+        assert changes_to_mask(63) == 63
+
+    @pytest.mark.parametrize("mask", [64, -1, 1 << 10])
+    def test_mask_out_of_range(self, mask, sample_gua_qian):
+        """测试掩码超出 0-63 时报错，而不是截去高位"""
+        with pytest.raises(ValueError, match="0-63"):
+            changes_to_mask(mask)
+        with pytest.raises(ValueError):
+            sample_gua_qian.get_changed_gua(mask)
+
+    @pytest.mark.parametrize("mask", [True, False])
+    def test_mask_rejects_bool(self, mask, sample_gua_qian):
+        """测试布尔值不当作掩码"""
+        with pytest.raises(TypeError):
+            changes_to_mask(mask)
+        with pytest.raises(TypeError):
+            sample_gua_qian.get_changed_gua(mask)
+
+
 class TestBinaryToGua:
     """测试二进制编码转卦函数"""
 
@@ -88,6 +266,16 @@ class TestBinaryToGua:
         # 无效编码返回第一个卦（乾卦）
         assert gua.name == "乾"
 
+    def test_binary_to_gua_accepts_code(self):
+        """测试位编码与二进制字符串得到同一卦"""
+        for binary in ["111111", "000000", "100010", "010001"]:
+            assert binary_to_gua(binary_to_code(binary)) is binary_to_gua(binary)
+
+    def test_binary_to_gua_invalid_code(self):
+        """测试超出范围的位编码返回默认卦"""
+        assert binary_to_gua(64).name == "乾"
+        assert binary_to_gua(-1).name == "乾"
+
     @pytest.mark.parametrize(
         "binary,expected_name",
         [
@@ -171,3 +359,47 @@ class TestGetGuaByIndex:
         """测试负索引"""
         gua = get_gua_by_index(-1)
         assert gua is None
+
+
+class TestGetGuaByNumbers:
+    """测试按数字定位卦"""
+
+    def test_xiantian_all_pairs(self):
+        """测试先天数的全部64种组合"""
+        for upper, upper_name in NUMBER_TO_TRIGRAM.items():
+            for lower, lower_name in NUMBER_TO_TRIGRAM.items():
+                gua = get_gua_by_numbers(upper, lower)
+                assert gua.upper_gua == upper_name
+                assert gua.lower_gua == lower_name
+
+    @pytest.mark.parametrize(
+        "upper,lower,scheme,expected_name",
+        [
+            (6, 1, NumberingScheme.XIANTIAN, "需"),  # 坎上乾下
+            (8, 1, NumberingScheme.XIANTIAN, "泰"),
+            (1, 6, NumberingScheme.HOUTIAN, "需"),  # 后天：一坎六乾
+            (9, 1, NumberingScheme.HOUTIAN, "未济"),  # 离上坎下
+            (5, 5, NumberingScheme.HOUTIAN, "坤"),  # 中五寄坤
+            (14, 9, NumberingScheme.MOD8, "需"),  # 14余6坎，9余1乾
+            (16, 8, NumberingScheme.MOD8, "坤"),  # 余0作8
+        ],
+    )
+    def test_schemes(self, upper, lower, scheme, expected_name):
+        """测试各编号方式"""
+        assert get_gua_by_numbers(upper, lower, scheme).name == expected_name
+
+    @pytest.mark.parametrize("upper,lower", [(0, 1), (1, 9), (-1, 1), (1, 100)])
+    def test_invalid_numbers(self, upper, lower):
+        """测试先天数范围外的数字"""
+        assert get_gua_by_numbers(upper, lower) is None
+
+    def test_houtian_range(self):
+        """测试后天数只接受1-9"""
+        assert get_gua_by_numbers(10, 1, NumberingScheme.HOUTIAN) is None
+        assert get_gua_by_numbers(0, 1, NumberingScheme.HOUTIAN) is None
+
+    def test_get_gua_by_trigrams(self, gua_data):
+        """测试按上下卦名称查卦"""
+        for gua in gua_data["all_guas"]:
+            assert get_gua_by_trigrams(gua.upper_gua, gua.lower_gua) is gua
+        assert get_gua_by_trigrams("tian", "qian") is None
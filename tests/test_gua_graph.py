@@ -0,0 +1,102 @@
+"""
+测试 gua_graph.py 卦图与最短路径
+"""
+
+import pytest
+from gua_data import get_registry
+from gua_graph import (
+    CUO_MOVE,
+    CUO_ZONG_MOVES,
+    HYPERCUBE_MOVES,
+    LINE_MOVES,
+    HexagramGraph,
+    get_graph,
+)
+
+
+@pytest.fixture(scope="module")
+def all_guas():
+    return get_registry().by_code
+
+
+class TestHypercube:
+    """测试只用变爻的六维超立方体"""
+
+    def test_shared(self):
+        """测试同一组走法只构建一次"""
+        assert get_graph() is get_graph(HYPERCUBE_MOVES)
+        assert get_graph(CUO_ZONG_MOVES) is not get_graph()
+
+    def test_neighbors(self, all_guas):
+        """测试每卦恰有六个相邻卦，各差一爻"""
+        graph = get_graph()
+        for gua in all_guas:
+            neighbors = [code for _, code in graph.neighbors[gua.code]]
+            assert len(neighbors) == 6
+            assert all(bin(code ^ gua.code).count("1") == 1 for code in neighbors)
+
+    def test_distance_is_hamming(self, all_guas):
+        """测试距离即不同爻的个数"""
+        graph = get_graph()
+        for a in all_guas:
+            for b in all_guas:
+                assert graph.distance(a, b) == bin(a.code ^ b.code).count("1")
+
+    def test_qian_to_weiji(self, gua_by_name):
+        """测试乾到未济：由低到高依次变初、三、五爻"""
+        steps = get_graph().steps(gua_by_name("乾"), gua_by_name("未济"))
+        assert [step.move.label for step in steps] == ["变初爻", "变三爻", "变五爻"]
+        assert [step.gua.name for step in steps] == ["姤", "讼", "未济"]
+
+    def test_paths_valid(self, all_guas):
+        """测试所有路径长度等于距离且每步只差一爻"""
+        graph = get_graph()
+        for a in all_guas:
+            for b in all_guas:
+                path = graph.path(a, b)
+                assert path[0] is a and path[-1] is b
+                assert len(path) - 1 == graph.distance(a, b)
+                for x, y in zip(path, path[1:]):
+                    assert bin(x.code ^ y.code).count("1") == 1
+
+    def test_same_gua(self, gua_by_name):
+        """测试起点即终点"""
+        qian = gua_by_name("乾")
+        assert get_graph().steps(qian, qian) == []
+        assert get_graph().path(qian, qian) == [qian]
+
+
+class TestWeighted:
+    """测试带错综走法的变体"""
+
+    def test_cuo_is_one_step(self, gua_by_name):
+        """测试乾到坤一步（错）"""
+        graph = get_graph(CUO_ZONG_MOVES)
+        steps = graph.steps(gua_by_name("乾"), gua_by_name("坤"))
+        assert [step.move.label for step in steps] == ["错"]
+
+    def test_zong_is_one_step(self, gua_by_name):
+        """测试屯到蒙一步（综）"""
+        graph = get_graph(CUO_ZONG_MOVES)
+        assert graph.distance(gua_by_name("屯"), gua_by_name("蒙")) == 1
+
+    def test_never_longer(self, all_guas):
+        """测试多了走法后距离不会变长，且最大距离变小"""
+        cube, extended = get_graph(), get_graph(CUO_ZONG_MOVES)
+        for a in all_guas:
+            for b in all_guas:
+                assert extended.distance(a, b) <= cube.distance(a, b)
+        assert max(max(row) for row in extended.distances) < 6
+
+    def test_costs(self, gua_by_name):
+        """测试代价为2的错卦与变六爻相比仍更短"""
+        graph = HexagramGraph(LINE_MOVES + (CUO_MOVE._replace(cost=2),))
+        assert graph.distance(gua_by_name("乾"), gua_by_name("坤")) == 2
+        assert [
+            s.move.label for s in graph.steps(gua_by_name("乾"), gua_by_name("坤"))
+        ] == ["错"]
+
+    def test_disconnected(self):
+        """测试走法不足以连通时报错"""
+        with pytest.raises(ValueError):
+            HexagramGraph(LINE_MOVES[:3])
@@ -0,0 +1,141 @@
+"""
+测试 gua_reading.py 占断规则
+"""
+
+import pytest
+from gua_data import get_registry
+from gua_reading import TextKind, TextRef, get_reading, line_name
+
+
+def _labels(reading):
+    return [ref.label for ref in reading.refs]
+
+
+class TestLineName:
+    """测试爻题"""
+
+    def test_qian_kun(self, gua_by_name):
+        """测试乾坤的爻题"""
+        qian, kun = gua_by_name("乾"), gua_by_name("坤")
+        assert [line_name(qian, p) for p in range(1, 7)] == [
+            "初九",
+            "九二",
+            "九三",
+            "九四",
+            "九五",
+            "上九",
+        ]
+        assert [line_name(kun, p) for p in range(1, 7)] == [
+            "初六",
+            "六二",
+            "六三",
+            "六四",
+            "六五",
+            "上六",
+        ]
+
+    def test_mixed(self, gua_by_name):
+        """测试阴阳相杂的卦：屯初九、上六"""
+        zhun = gua_by_name("屯")
+        assert line_name(zhun, 1) == "初九"
+        assert line_name(zhun, 6) == "上六"
+
+
+class TestRules:
+    """测试考变占规则"""
+
+    def test_no_change(self, gua_by_name):
+        """测试六爻不变占本卦卦辞"""
+        reading = get_reading(gua_by_name("乾"))
+        assert reading.refs == (TextRef(gua_by_name("乾"), TextKind.JUDGMENT),)
+        assert reading.changed is gua_by_name("乾")
+        assert reading.refs[0].text == "元亨利贞。"
+
+    def test_one_change(self, gua_by_name):
+        """测试一爻变占本卦变爻"""
+        reading = get_reading(gua_by_name("乾"), [2])
+        assert _labels(reading) == ["乾 九二"]
+        assert reading.refs[0].text == "见龙在田，利见大人。"
+        assert reading.changed is gua_by_name("同人")
+
+    def test_two_changes_upper_first(self, gua_by_name):
+        """测试二爻变以上爻为主"""
+        reading = get_reading(gua_by_name("乾"), [2, 5])
+        assert _labels(reading) == ["乾 九五", "乾 九二"]
+        assert reading.positions == (5, 2)
+
+    def test_three_changes(self, gua_by_name):
+        """测试三爻变占本卦与之卦卦辞，本卦在前"""
+        reading = get_reading(gua_by_name("乾"), [1, 2, 3])
+        assert _labels(reading) == ["乾 卦辞", "否 卦辞"]
+        assert reading.positions == ()
+
+    def test_four_changes_lower_first(self, gua_by_name):
+        """测试四爻变占之卦二不变爻，以下爻为主"""
+        reading = get_reading(gua_by_name("乾"), [1, 2, 3, 4])
+        assert _labels(reading) == ["观 九五", "观 上九"]
+
+    def test_five_changes(self, gua_by_name):
+        """测试五爻变占之卦不变爻"""
+        reading = get_reading(gua_by_name("乾"), [1, 2, 3, 4, 5])
+        assert _labels(reading) == ["剥 上九"]
+        assert reading.refs[0].text == "硕果不食，君子得舆，小人剥庐。"
+
+    def test_qian_all_change(self, gua_by_name):
+        """测试乾六爻全变占用九"""
+        reading = get_reading(gua_by_name("乾"), 63)
+        assert _labels(reading) == ["乾 用九"]
+        assert reading.refs[0].text == "见群龙无首，吉。"
+        assert reading.changed is gua_by_name("坤")
+
+    def test_kun_all_change(self, gua_by_name):
+        """测试坤六爻全变占用六"""
+        reading = get_reading(gua_by_name("坤"), 63)
+        assert _labels(reading) == ["坤 用六"]
+        assert reading.refs[0].text == "利永贞。"
+
+    def test_other_all_change(self, gua_by_name):
+        """测试其余卦六爻全变占之卦卦辞"""
+        reading = get_reading(gua_by_name("屯"), 63)
+        assert _labels(reading) == ["鼎 卦辞"]
+
+
+class TestTable:
+    """测试预先生成的占断表"""
+
+    def test_mask_and_positions_agree(self, gua_by_name):
+        """测试变爻可用位置列表或掩码"""
+        gua = gua_by_name("屯")
+        assert get_reading(gua, [1, 3]) is get_reading(gua, 0b101)
+
+    @pytest.mark.parametrize("changing", [64, -1, True, [0], [7]])
+    def test_invalid_changes(self, changing, gua_by_name):
+        """测试越界的掩码、爻位与布尔值报错"""
+        with pytest.raises((ValueError, TypeError)):
+            get_reading(gua_by_name("屯"), changing)
+
+    @pytest.mark.parametrize("count", range(7))
+    def test_ref_counts(self, count):
+        """测试各变爻数下所占之辞的条数"""
+        expected = {0: 1, 1: 1, 2: 2, 3: 2, 4: 2, 5: 1, 6: 1}[count]
+        for gua in get_registry().guas:
+            for mask in range(64):
+                if bin(mask).count("1") == count:
+                    reading = get_reading(gua, mask)
+                    assert len(reading.refs) == expected
+                    assert reading.changed is gua.get_changed_gua(mask)
+
+    def test_line_refs_point_to_right_gua(self):
+        """测试一二爻变的爻辞出自本卦，四五爻变的出自之卦的不变爻"""
+        for gua in get_registry().guas:
+            for mask in range(64):
+                reading = get_reading(gua, mask)
+                count = bin(mask).count("1")
+                for ref in reading.refs:
+                    if ref.kind is not TextKind.LINE:
+                        continue
+                    moving = bool(mask >> (ref.position - 1) & 1)
+                    if count <= 2:
+                        assert ref.gua is gua and moving
+                    else:
+                        assert ref.gua is reading.changed and not moving
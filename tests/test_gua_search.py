@@ -0,0 +1,250 @@
+"""
+测试 gua_search.py 搜索索引
+"""
+
+import pytest
+from gua_data import search_gua
+from gua_search import (
+    GUA_PINYIN,
+    HOMOPHONE_CHARS,
+    TEXT_FIELDS,
+    BKTree,
+    IncrementalSearch,
+    SearchIndex,
+    edit_distance,
+    get_fulltext_index,
+    get_search_index,
+    normalize_query,
+    search_text,
+)
+
+
+class TestNormalizeQuery:
+    """测试查询词规范化"""
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("  夬卦 ", "夬"),
+            ("第33卦", "33"),
+            ("遯", "遁"),
+            ("風澤中孚", "风泽中孚"),
+            ("Xiao-Xu", "xiaoxu"),
+            ("lü", "lv"),
+            ("卦", ""),
+        ],
+    )
+    def test_normalize(self, query, expected):
+        """测试各类输入的规范化结果"""
+        assert normalize_query(query) == expected
+
+
+class TestSearchIndex:
+    """测试搜索索引"""
+
+    def test_index_shared(self):
+        """测试索引只构建一次"""
+        assert get_search_index() is get_search_index()
+        assert isinstance(get_search_index(), SearchIndex)
+
+    def test_pinyin_table_complete(self):
+        """测试拼音表覆盖64卦"""
+        assert len(GUA_PINYIN) == 64
+        assert all(GUA_PINYIN)
+
+    @pytest.mark.parametrize(
+        "query,expected_first",
+        [
+            ("乾", "乾"),
+            ("水天需", "需"),
+            ("水天", "需"),
+            ("夬卦", "夬"),
+            ("33", "遁"),
+            ("第64卦", "未济"),
+            ("遯", "遁"),
+            ("天山遯", "遁"),
+            ("風天小畜", "小畜"),
+            ("xu", "需"),
+            ("weiji", "未济"),
+        ],
+    )
+    def test_search_first_result(self, query, expected_first):
+        """测试最佳匹配排在首位"""
+        results = search_gua(query)
+        assert results, f"{query}没有搜索结果"
+        assert results[0].name == expected_first
+
+    def test_exact_name_ranked_first(self):
+        """测试卦名完全相同者排在包含该字的卦之前"""
+        results = search_gua("小过")
+        assert results[0].name == "小过"
+        results = search_gua("坎")
+        assert results[0].name == "坎"
+
+    def test_results_ranked_then_by_index(self):
+        """测试同等级结果按卦序排列"""
+        results = search_gua("qian")
+        assert [g.name for g in results] == ["乾", "谦"]
+
+    def test_sequence_number_exact_only(self):
+        """测试卦序只按完整数字匹配"""
+        assert [g.index for g in search_gua("3")] == [3]
+        assert search_gua("65") == []
+
+    def test_empty_query(self):
+        """测试空查询"""
+        assert search_gua("") == []
+        assert search_gua("   ") == []
+
+    def test_variant_and_standard_agree(self):
+        """测试异体字与规范字搜索结果一致"""
+        assert search_gua("遯") == search_gua("遁")
+        assert search_gua("天山遯") == search_gua("天山遁")
+
+
+class TestFullTextSearch:
+    """测试全文检索"""
+
+    def test_index_shared(self):
+        """测试全文索引只构建一次"""
+        assert get_fulltext_index() is get_fulltext_index()
+
+    def test_phrase_ranked_first(self):
+        """测试完整包含查询词的文本排在前面"""
+        hits = search_text("潜龙勿用")
+        assert hits[0].gua.name == "乾"
+        assert hits[0].field == "yao_text"
+        assert hits[0].position == 1
+        assert hits[0].text.startswith("潜龙勿用")
+
+    def test_spans_point_into_text(self):
+        """测试命中偏移指向原文中的查询词"""
+        for hit in search_text("利涉大川"):
+            start, end = hit.spans[0]
+            assert hit.text[start:end] in ("利涉大川", "利涉", "涉大", "大川")
+
+    def test_description_hit(self):
+        """测试卦辞可被检索"""
+        hits = search_text("元亨利贞", limit=64)
+        assert any(h.gua.name == "乾" and h.field == "description" for h in hits)
+        assert all(h.position == 0 for h in hits if h.field == "description")
+
+    def test_single_char(self):
+        """测试单字查询"""
+        hits = search_text("吉")
+        assert hits
+        assert all("吉" in h.text for h in hits)
+
+    def test_scores_descending(self):
+        """测试结果按得分降序"""
+        scores = [h.score for h in search_text("无咎", limit=50)]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_limit_and_fields(self):
+        """测试结果数量上限与字段取值"""
+        hits = search_text("无咎", limit=5)
+        assert len(hits) == 5
+        assert all(h.field in TEXT_FIELDS for h in hits)
+
+    @pytest.mark.parametrize("query", ["", "  ", "，。"])
+    def test_empty_query(self, query):
+        """测试空查询与纯标点"""
+        assert search_text(query) == []
+
+    def test_variant_chars(self):
+        """测试繁体字查询"""
+        assert search_text("無咎", limit=3) == search_text("无咎", limit=3)
+
+
+class TestFuzzySearch:
+    """测试模糊搜索"""
+
+    @pytest.mark.parametrize(
+        "a,b,expected",
+        [("", "", 0), ("qian", "qian", 0), ("qain", "qian", 2), ("噬克", "噬嗑", 1)],
+    )
+    def test_edit_distance(self, a, b, expected):
+        """测试编辑距离"""
+        assert edit_distance(a, b) == expected
+        assert edit_distance(b, a) == expected
+
+    def test_bk_tree(self):
+        """测试BK树与暴力查找结果一致"""
+        words = ["qian", "kun", "jian", "xian", "qin", "dun", "kan"]
+        tree = BKTree(words)
+        for query in ["qian", "kuan", "xan", "zzz"]:
+            expected = sorted(
+                (edit_distance(query, w), w)
+                for w in words
+                if edit_distance(query, w) <= 1
+            )
+            assert tree.search(query, 1) == expected
+
+    def test_homophone_chars_not_in_names(self):
+        """测试纠错表中的字不出现在任何卦名中"""
+        names = "".join(get_search_index()._names)
+        assert not set(HOMOPHONE_CHARS) & set(names)
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("小蓄", "小畜"),
+            ("筮嗑", "噬嗑"),
+            ("風天小蓄", "小畜"),
+            ("噬克", "噬嗑"),
+            ("泽火格", "革"),
+            ("qain", "乾"),
+        ],
+    )
+    def test_typos(self, query, expected):
+        """测试常见错字得到正确的首个建议"""
+        assert search_gua(query) == []
+        assert search_gua(query, fuzzy=True)[0].name == expected
+
+    def test_exact_results_first(self):
+        """测试精确结果排在建议之前且不被截断"""
+        exact = search_gua("火")
+        assert search_gua("火", fuzzy=True)[: len(exact)] == exact
+
+    def test_no_suggestion(self):
+        """测试无关查询与空查询"""
+        assert search_gua("zzzzzz", fuzzy=True) == []
+        assert search_gua("", fuzzy=True) == []
+
+    def test_budget(self):
+        """测试时间预算耗尽时只返回纠错结果"""
+        index = get_search_index()
+        assert [g.name for g in index.fuzzy_search("噬克", budget=-1)] == []
+        assert [g.name for g in index.fuzzy_search("小蓄", budget=-1)] == ["小畜"]
+
+
+class TestIncrementalSearch:
+    """测试边输入边搜索"""
+
+    def test_matches_search(self):
+        """测试逐字输入的每一步都与直接搜索结果相同"""
+        live = IncrementalSearch()
+        for query in ["水", "水天", "水天需", "水天需卦", "q", "qi", "qia", "qian"]:
+            assert live.update(query) == search_gua(query)
+
+    def test_every_key(self):
+        """测试前缀树覆盖索引中的每个键"""
+        index = get_search_index()
+        live = IncrementalSearch(index)
+        for key in index._entries:
+            assert live.update(key) == list(index.lookup(key))
+
+    def test_backspace_and_replace(self):
+        """测试删字与改写后从根重新查找"""
+        live = IncrementalSearch()
+        assert live.update("火雷噬") == search_gua("火雷噬")
+        assert live.update("火雷") == search_gua("火雷")
+        assert live.update("山") == search_gua("山")
+
+    def test_dead_end(self):
+        """测试无结果后继续输入仍无结果，清空后恢复"""
+        live = IncrementalSearch()
+        assert live.update("乾x") == []
+        assert live.update("乾xy") == []
+        assert live.update("") == []
+        assert live.update("乾") == search_gua("乾")
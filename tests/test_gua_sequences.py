@@ -0,0 +1,98 @@
+"""
+测试 gua_sequences.py 卦序排列
+"""
+
+import pytest
+from gua_data import get_gua_by_index, get_registry
+from gua_sequences import (
+    ORDERS,
+    RANKS,
+    Ordering,
+    convert,
+    gua_at,
+    next_gua,
+    prev_gua,
+    rank,
+    sequence,
+)
+
+
+def _names(ordering, count=8, start=0):
+    return [g.name for g in sequence(ordering)[start : start + count]]
+
+
+class TestPermutations:
+    """测试排列表与逆表"""
+
+    @pytest.mark.parametrize("ordering", list(Ordering))
+    def test_is_permutation(self, ordering):
+        """测试每种卦序恰好包含64卦各一次"""
+        assert sorted(ORDERS[ordering]) == list(range(64))
+
+    @pytest.mark.parametrize("ordering", list(Ordering))
+    def test_inverse(self, ordering):
+        """测试逆表"""
+        for position, code in enumerate(ORDERS[ordering]):
+            assert RANKS[ordering][code] == position
+
+    def test_king_wen(self):
+        """测试文王序与卦序号一致"""
+        for gua in get_registry().guas:
+            assert rank(gua) == gua.index
+            assert gua_at(gua.index) is gua
+
+    def test_fu_xi(self):
+        """测试伏羲先天序"""
+        assert _names(Ordering.FU_XI) == [
+            "乾", "夬", "大有", "大壮", "小畜", "需", "大畜", "泰",
+        ]  # fmt: skip
+        assert _names(Ordering.FU_XI, start=56) == [
+            "否", "萃", "晋", "豫", "观", "比", "剥", "坤",
+        ]  # fmt: skip
+
+    def test_palace(self):
+        """测试八宫序：乾宫八卦与兑宫末卦"""
+        assert _names(Ordering.PALACE) == [
+            "乾", "姤", "遁", "否", "观", "剥", "晋", "大有",
+        ]  # fmt: skip
+        assert gua_at(64, Ordering.PALACE).name == "归妹"
+
+    def test_mawangdui(self):
+        """测试帛书序：键宫八卦与末卦"""
+        assert _names(Ordering.MAWANGDUI) == [
+            "乾", "否", "遁", "履", "讼", "同人", "无妄", "姤",
+        ]  # fmt: skip
+        assert gua_at(64, Ordering.MAWANGDUI).name == "益"
+
+
+class TestNavigation:
+    """测试翻页与换算"""
+
+    def test_next_prev(self):
+        """测试前后翻页"""
+        qian = get_gua_by_index(1)
+        assert next_gua(qian) is get_gua_by_index(2)
+        assert prev_gua(get_gua_by_index(2)) is qian
+        assert next_gua(qian, Ordering.FU_XI).name == "夬"
+
+    @pytest.mark.parametrize("ordering", list(Ordering))
+    def test_wraps(self, ordering):
+        """测试首尾相接"""
+        first, last = gua_at(1, ordering), gua_at(64, ordering)
+        assert next_gua(last, ordering) is first
+        assert prev_gua(first, ordering) is last
+        assert next_gua(first, ordering, 64) is first
+
+    def test_convert(self):
+        """测试卦序换算：文王序第44卦姤在伏羲序中第33"""
+        assert convert(44, Ordering.KING_WEN, Ordering.FU_XI) == 33
+        assert convert(33, Ordering.FU_XI, Ordering.KING_WEN) == 44
+        for position in range(1, 65):
+            there = convert(position, Ordering.PALACE, Ordering.MAWANGDUI)
+            assert convert(there, Ordering.MAWANGDUI, Ordering.PALACE) == position
+
+    @pytest.mark.parametrize("position", [0, 65])
+    def test_out_of_range(self, position):
+        """测试无效次序"""
+        with pytest.raises(IndexError):
+            gua_at(position)
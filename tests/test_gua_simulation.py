@@ -0,0 +1,109 @@
+"""
+测试 gua_simulation.py 起卦分布的蒙特卡洛检验
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from gua_casting import CastMethod  # noqa: E402
+from gua_simulation import (  # noqa: E402
+    chi_square,
+    chi_square_sf,
+    gua_probabilities,
+    line_probabilities,
+    simulate,
+)
+
+
+class TestChiSquare:
+    """测试卡方检验"""
+
+    @pytest.mark.parametrize(
+        "statistic,dof,expected",
+        [
+            (3.841, 1, 0.05),
+            (6.635, 1, 0.01),
+            (11.070, 5, 0.05),
+            (7.815, 3, 0.05),
+            (82.529, 63, 0.05),
+            (0.0, 3, 1.0),
+        ],
+    )
+    def test_sf_critical_values(self, statistic, dof, expected):
+        """测试与卡方分布临界值表一致"""
+        assert chi_square_sf(statistic, dof) == pytest.approx(expected, abs=2e-4)
+
+    def test_perfect_fit(self):
+        """测试观测与期望完全一致"""
+        result = chi_square("t", [25, 25, 50], [0.25, 0.25, 0.5])
+        assert result.statistic == 0
+        assert result.dof == 2
+        assert result.p_value == 1.0
+
+
+class TestProbabilities:
+    """测试理论概率"""
+
+    def test_line_probabilities(self):
+        """测试教科书上的爻值概率"""
+        assert line_probabilities(CastMethod.YARROW) == (1 / 16, 5 / 16, 7 / 16, 3 / 16)
+        assert line_probabilities(CastMethod.COINS) == (1 / 8, 3 / 8, 3 / 8, 1 / 8)
+
+    def test_uniform_hexagrams(self):
+        """测试阴阳各半时64卦均匀"""
+        assert np.allclose(gua_probabilities(0.5), 1 / 64)
+
+    def test_sum_to_one(self):
+        """测试概率之和为1"""
+        assert gua_probabilities(6 / 16).sum() == pytest.approx(1)
+
+
+class TestSimulate:
+    """测试模拟"""
+
+    @pytest.mark.parametrize("method", list(CastMethod))
+    def test_counts_and_tests(self, method):
+        """测试直方图总数与各项检验"""
+        report = simulate(200_000, method, workers=1, chunk_size=30_000, seed=1)
+        assert report.gua_counts.sum() == 200_000
+        assert report.changed_counts.sum() == 200_000
+        assert (report.line_counts.sum(axis=1) == 200_000).all()
+        assert [t.name for t in report.tests][:2] == ["本卦", "之卦"]
+        assert len(report.tests) == 8
+        assert all(t.p_value > 1e-6 for t in report.tests)
+
+    def test_line_frequencies(self):
+        """测试爻值频率接近理论值"""
+        report = simulate(200_000, CastMethod.YARROW, workers=1, seed=2)
+        frequencies = report.line_counts / report.line_counts.sum(axis=1, keepdims=True)
+        assert np.allclose(
+            frequencies, line_probabilities(CastMethod.YARROW), atol=0.01
+        )
+
+    def test_independent_of_workers(self):
+        """测试结果与进程数无关"""
+        single = simulate(60_000, workers=1, chunk_size=20_000, seed=3)
+        pooled = simulate(60_000, workers=2, chunk_size=20_000, seed=3)
+        assert (single.gua_counts == pooled.gua_counts).all()
+        assert (single.line_counts == pooled.line_counts).all()
+
+    def test_workers_capped_by_chunks(self):
+        """测试进程数不超过块数，每核吞吐量按实际进程数计算"""
+        report = simulate(50_000, CastMethod.COINS, workers=4, seed=5)
+        assert report.workers == 1
+        assert report.casts_per_second_per_core == report.casts_per_second
+        report = simulate(60_000, workers=8, chunk_size=20_000, seed=5)
+        assert report.workers == 3
+
+    @pytest.mark.parametrize("total", [0, -1])
+    def test_rejects_empty(self, total):
+        """测试起卦次数不大于0时报错"""
+        with pytest.raises(ValueError):
+            simulate(total)
+
+    def test_detects_bias(self):
+        """测试能拒绝错误的理论分布"""
+        report = simulate(200_000, CastMethod.YARROW, workers=1, seed=4)
+        wrong = chi_square("t", report.line_counts[0], [0.25] * 4)
+        assert wrong.p_value < 1e-6
@@ -3,7 +3,17 @@
 """
 
 import pytest
-from gua_data import binary_to_gua
+from gua_data import (
+    binary_to_gua,
+    get_relations,
+    GuaRelations,
+    RelationKind,
+    RELATION_TABLE,
+    PALACE_TABLE,
+    CHANGE_TABLE,
+    positions_to_mask,
+    mask_to_positions,
+)
 
 
 class TestDuiGua:
@@ -134,6 +144,84 @@ class TestHuGua:
             assert xia_hu.binary_code in gua_data["gua_map"], f"{gua.name}的下互卦无效"
 
 
+class TestRelationTable:
+    """测试预先计算的关系表"""
+
+    def test_table_shape(self):
+        """测试关系表覆盖64卦与全部关系种类"""
+        assert len(RELATION_TABLE) == 64
+        assert all(len(row) == len(RelationKind) for row in RELATION_TABLE)
+        assert all(0 <= c < 64 for row in RELATION_TABLE for c in row)
+
+    def test_get_relations_is_precomputed(self, gua_data):
+        """测试 get_relations 返回预先生成的同一对象"""
+        for gua in gua_data["all_guas"]:
+            relations = get_relations(gua)
+            assert isinstance(relations, GuaRelations)
+            assert get_relations(gua) is relations
+
+    def test_relations_match_methods(self, gua_data):
+        """测试关系表与 Gua 的各个方法一致"""
+        for gua in gua_data["all_guas"]:
+            relations = get_relations(gua)
+            assert relations.cuo is gua.get_dui_gua()
+            assert relations.zong is gua.get_zong_gua()
+            assert relations.fan is gua.get_fan_gua()
+            assert relations.hu is gua.get_hu_gua()
+            assert relations.shang_hu is gua.get_shang_hu_gua()
+            assert relations.xia_hu is gua.get_xia_hu_gua()
+            assert relations.fu is gua.get_fu_gua()
+
+    @pytest.mark.parametrize(
+        "binary,expected_hu",
+        [
+            ("111111", "乾"),
+            ("000000", "坤"),
+            ("100010", "剥"),  # 屯互剥
+            ("111010", "睽"),  # 需互睽
+            ("010010", "颐"),  # 坎互颐
+            ("101010", "未济"),  # 既济互未济
+        ],
+    )
+    def test_hu_gua(self, gua_data, binary, expected_hu):
+        """测试互卦为完整的六爻卦"""
+        assert gua_data["gua_map"][binary].get_hu_gua().name == expected_hu
+
+    def test_hu_gua_not_always_qian(self, gua_data):
+        """测试上下互卦不再一律退化为乾卦"""
+        names = {gua.get_shang_hu_gua().name for gua in gua_data["all_guas"]}
+        names |= {gua.get_xia_hu_gua().name for gua in gua_data["all_guas"]}
+        assert names == {"乾", "坤", "震", "巽", "坎", "离", "艮", "兑"}
+
+    def test_shang_xia_hu_trigrams(self, gua_data):
+        """测试上互卦取345爻、下互卦取234爻"""
+        zhun = gua_data["gua_map"]["100010"]  # 水雷屯
+        assert zhun.get_shang_hu_gua().name == "艮"  # 345爻 001
+        assert zhun.get_xia_hu_gua().name == "坤"  # 234爻 000
+
+    def test_palace_table(self, gua_data):
+        """测试八宫归属：每宫八卦，世数0-7各一"""
+        for palace in range(8):
+            generations = sorted(g for p, g in PALACE_TABLE if p == palace)
+            assert generations == list(range(8))
+        gou = gua_data["gua_map"]["011111"]  # 姤，乾宫一世
+        assert PALACE_TABLE[gou.code] == (0b111, 1)
+
+    @pytest.mark.parametrize(
+        "binary,expected_fu",
+        [
+            ("111111", "坤"),  # 八纯卦伏其错卦
+            ("010010", "离"),
+            ("011111", "乾"),  # 姤属乾宫
+            ("100010", "坎"),  # 屯属坎宫
+            ("111010", "坤"),  # 需为坤宫游魂
+        ],
+    )
+    def test_fu_gua(self, gua_data, binary, expected_fu):
+        """测试伏卦"""
+        assert gua_data["gua_map"][binary].get_fu_gua().name == expected_fu
+
+
 class TestChangedGua:
     """测试变卦（爻翻转）"""
 
@@ -169,6 +257,25 @@ class TestChangedGua:
         # 无变化应该得到原卦
         assert changed.binary_code == "111111"
 
+    def test_change_by_mask(self, gua_data):
+        """测试以位掩码指定变爻与以爻位列表结果一致"""
+        for gua in gua_data["all_guas"]:
+            for mask in range(64):
+                positions = mask_to_positions(mask)
+                assert positions_to_mask(positions) == mask
+                assert gua.get_changed_gua(mask) is gua.get_changed_gua(positions)
+
+    def test_change_table(self, gua_data):
+        """测试变卦表"""
+        assert len(CHANGE_TABLE) == 64
+        assert all(len(row) == 64 for row in CHANGE_TABLE)
+        qian = gua_data["gua_map"]["111111"]
+        assert CHANGE_TABLE[qian.code][0] == qian.code
+        assert CHANGE_TABLE[qian.code][0b111111] == 0  # 六爻全变为坤
+        # 每一行都是64卦的一个排列
+        for row in CHANGE_TABLE:
+            assert sorted(row) == list(range(64))
+
     def test_change_involution(self, gua_data):
         """测试两次相同变化回到原卦"""
         for gua in gua_data["all_guas"]:
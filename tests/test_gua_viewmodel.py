@@ -0,0 +1,185 @@
+"""
+测试 gua_viewmodel.py 视图模型
+"""
+
+import pytest
+
+ft = pytest.importorskip("flet")
+
+from gua_data import TRIGRAM_BY_CODE, get_registry  # noqa: E402
+from gua_viewmodel import (  # noqa: E402
+    VIEW_MODEL_CACHE_SIZE,
+    OVERVIEW_TRIGRAMS,
+    FigureLayout,
+    get_view_model,
+    gua_glyph,
+    gua_title,
+    thumbnail,
+    trigram_matrix,
+    view_model_cache_info,
+)
+
+
+class TestTitle:
+    """测试卦名文字"""
+
+    def test_gua_title(self, gua_by_name):
+        """测试卦名与卦象"""
+        assert gua_title(gua_by_name("需")) == "需 (水天需)"
+        assert gua_title(gua_by_name("乾")) == "乾 (天天乾)"
+
+
+class TestViewModel:
+    """测试卦象视图模型"""
+
+    def test_plain(self, gua_by_name):
+        """测试无变爻、无标红"""
+        vm = get_view_model(gua_by_name("乾"))
+        assert vm.display_gua is gua_by_name("乾")
+        assert vm.title == "乾 (天天乾)"
+        assert vm.judgment == "卦辞：元亨利贞。"
+        assert vm.reading == ()
+        assert [line.position for line in vm.lines] == [6, 5, 4, 3, 2, 1]
+        assert [line.label for line in vm.lines][0] == "上爻"
+        assert all(line.is_yang and line.marker == "" for line in vm.lines)
+        assert vm.lines[-1].text == "潜龙勿用。"
+        assert vm.lines[-1].xiang == "象曰：潜龙勿用，阳在下也。"
+
+    def test_changing_shows_changed_gua(self, gua_by_name):
+        """测试有变爻时显示之卦，并列出占断"""
+        vm = get_view_model(gua_by_name("乾"), [2])
+        assert vm.display_gua is gua_by_name("同人")
+        assert vm.title.startswith("同人")
+        assert vm.reading == (
+            "占法：一爻变，以本卦变爻辞占",
+            "乾 九二：见龙在田，利见大人。",
+        )
+        second = vm.lines[4]
+        assert second.position == 2
+        assert not second.is_yang
+        assert second.marker == "变"
+
+    @pytest.mark.parametrize("changing", [[1], [2], [1, 4], [2, 5]])
+    def test_no_operative_mark_on_changed_gua(self, changing, gua_by_name):
+        """测试一二爻变所占为本卦爻辞，显示之卦的各行都不标为所占之爻"""
+        vm = get_view_model(gua_by_name("乾"), changing)
+        assert vm.display_gua is not gua_by_name("乾")
+        assert all(line.label_bgcolor is None for line in vm.lines)
+        assert all(line.label_color == ft.Colors.GREY for line in vm.lines)
+
+    def test_operative_mark_matches_reading(self, gua_by_name):
+        """测试四爻变占之卦不变爻：标出的行正是占断所引的爻辞"""
+        vm = get_view_model(gua_by_name("乾"), [1, 2, 3, 4])
+        marked = [line for line in vm.lines if line.label_bgcolor]
+        assert [line.position for line in marked] == [6, 5]
+        assert all(line.label_bgcolor == ft.Colors.AMBER_100 for line in marked)
+        for line in marked:
+            assert any(line.text in text for text in vm.reading[1:])
+
+    def test_highlight_styles(self, gua_by_name):
+        """测试标红的爻线与文字样式"""
+        vm = get_view_model(gua_by_name("乾"), [5], [5, 1])
+        fifth, first = vm.lines[1], vm.lines[5]
+        assert fifth.marker == "变★"
+        assert first.marker == "★"
+        assert first.line_color == ft.Colors.RED
+        assert first.line_height == 18
+        assert first.text_weight == ft.FontWeight.BOLD
+        assert vm.lines[2].line_color == ft.Colors.BLACK
+        assert vm.lines[2].text_color == ft.Colors.GREY_700
+
+    def test_positions_and_mask_agree(self, gua_by_name):
+        """测试爻位列表与掩码得到同一缓存条目"""
+        gua = gua_by_name("屯")
+        assert get_view_model(gua, [1, 3], [2]) is get_view_model(gua, 0b101, 0b10)
+        assert get_view_model(gua) is get_view_model(gua, [], [])
+
+    @pytest.mark.parametrize("mask", [64, -1, True, [7]])
+    def test_invalid_masks(self, mask, gua_by_name):
+        """测试越界的变爻与标红报错，而不是截去高位"""
+        with pytest.raises((ValueError, TypeError)):
+            get_view_model(gua_by_name("乾"), mask)
+        with pytest.raises((ValueError, TypeError)):
+            get_view_model(gua_by_name("乾"), None, mask)
+
+    def test_cache_hits(self, gua_by_name):
+        """测试重复状态命中缓存"""
+        gua = gua_by_name("蒙")
+        get_view_model(gua, [4], [6])
+        hits = view_model_cache_info().hits
+        get_view_model(gua, [4], [6])
+        assert view_model_cache_info().hits == hits + 1
+        assert view_model_cache_info().maxsize == VIEW_MODEL_CACHE_SIZE
+
+    def test_immutable(self, gua_by_name):
+        """测试视图模型不可修改"""
+        vm = get_view_model(gua_by_name("乾"))
+        with pytest.raises(AttributeError):
+            vm.title = "坤"
+
+
+class TestFigure:
+    """测试缩略符号与画布版式"""
+
+    def test_glyph(self, gua_by_name):
+        """测试 Unicode 卦符按文王卦序"""
+        assert gua_glyph(gua_by_name("乾")) == "䷀"
+        assert gua_glyph(gua_by_name("坤")) == "䷁"
+        assert gua_glyph(gua_by_name("未济")) == "䷿"
+
+    def test_segments(self):
+        """测试阳爻一段、阴爻两段且中间留缝"""
+        layout = FigureLayout()
+        (x, width), (_, rest) = layout.segments(True)
+        assert (x, width, rest) == (layout.line_x, layout.line_width, 0)
+        (left_x, left), (right_x, right) = layout.segments(False)
+        assert left == right
+        assert right_x - (left_x + left) == layout.gap
+
+    def test_row_top(self):
+        """测试上爻在最上"""
+        layout = FigureLayout()
+        assert layout.row_top(6) == 0
+        assert layout.row_top(1) == 5 * layout.row_height
+
+    def test_hit_line(self):
+        """测试按坐标判断所点之爻"""
+        layout = FigureLayout()
+        x = layout.line_x + 10
+        for position in range(1, 7):
+            top = layout.row_top(position)
+            assert layout.hit_line(x, top) == position
+            assert layout.hit_line(x, top + layout.row_height - 1) == position
+        assert layout.hit_line(layout.line_x - 1, 10) is None  # 标签上
+        assert layout.hit_line(layout.width, 10) is None
+        assert layout.hit_line(x, layout.height) is None
+
+
+class TestOverview:
+    """测试总览的矩阵与缩略显示"""
+
+    def test_matrix_covers_all(self):
+        """测试八卦矩阵恰好包含64卦各一次"""
+        matrix = trigram_matrix()
+        assert len(matrix) == 8 and all(len(row) == 8 for row in matrix)
+        assert {gua.code for row in matrix for gua in row} == set(range(64))
+
+    def test_matrix_rows_and_columns(self):
+        """测试行为上卦、列为下卦"""
+        matrix = trigram_matrix()
+        for i, row in enumerate(matrix):
+            for j, gua in enumerate(row):
+                assert TRIGRAM_BY_CODE[gua.upper_code] == OVERVIEW_TRIGRAMS[i]
+                assert TRIGRAM_BY_CODE[gua.lower_code] == OVERVIEW_TRIGRAMS[j]
+        assert matrix[0][0].name == "乾"
+        assert matrix[5][0].name == "需"  # 上坎下乾
+        assert matrix[7][0].name == "泰"
+
+    def test_thumbnail(self):
+        """测试缩略显示的文字并按卦缓存"""
+        gua = get_registry().guas[4]
+        thumb = thumbnail(gua)
+        assert thumb.glyph == "䷄"
+        assert thumb.label == "5. 需 (水天需)"
+        assert thumb.tooltip == "第5卦 需 (水天需)"
+        assert thumbnail(gua) is thumb
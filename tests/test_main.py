@@ -0,0 +1,657 @@
+"""
+测试 main.py 界面组件的控件复用（不连接客户端，刷新改为记录）
+"""
+
+import threading
+
+import pytest
+
+ft = pytest.importorskip("flet")
+
+from gua_data import get_relations  # noqa: E402
+from gua_graph import get_graph  # noqa: E402
+from gua_viewmodel import gua_title  # noqa: E402
+from main import (  # noqa: E402
+    FIGURE_LAYOUT,
+    RELATION_CARD_ROWS,
+    GuaRelationsView,
+    InteractiveHexagramView,
+    UpdateBatch,
+    YijingApp,
+    batched,
+    count_controls,
+    count_shapes,
+)
+
+
+def _row_props(row):
+    """一行中各控件受视图模型控制的属性：(控件名, 属性) -> 值"""
+    yao_line = row.yao_line._yao_line
+    controls = {
+        "label": row._label_text,
+        "label_box": row._label,
+        "text": row._text,
+        "xiang": row._xiang,
+        "marker": row.yao_line._marker_text,
+        "left": yao_line._left,
+        "gap": yao_line._gap,
+        "right": yao_line._right,
+    }
+    attrs = {
+        "label": ("value", "color", "weight"),
+        "label_box": ("bgcolor",),
+        "text": ("value", "color", "weight"),
+        "xiang": ("value", "visible", "color", "weight"),
+        "marker": ("value", "size"),
+        "left": ("width", "height", "bgcolor"),
+        "gap": ("visible",),
+        "right": ("visible", "height", "bgcolor"),
+    }
+    return {
+        (name, attr): getattr(control, attr)
+        for name, control in controls.items()
+        for attr in attrs[name]
+    }
+
+
+def _view_props(view):
+    """卦象视图（逐爻模式）的全部可变属性：(行号或控件名, 控件名, 属性) -> 值"""
+    props = {
+        ("title", "name", "value"): view._name_text.value,
+        ("title", "judgment", "value"): view._judgment_text.value,
+        ("title", "reading", "visible"): view._reading.visible,
+    }
+    for i, row in enumerate(view._rows):
+        for (name, attr), value in _row_props(row).items():
+            props[(i, name, attr)] = value
+    return props
+
+
+def _canvas_props(view):
+    """卦象视图（画布模式）的全部可变属性：(爻位或控件名, 图形名, 属性) -> 值"""
+    props = {
+        ("title", "name", "value"): view._name_text.value,
+        ("title", "judgment", "value"): view._judgment_text.value,
+        ("title", "reading", "visible"): view._reading.visible,
+    }
+    for position, shapes in view._figure._shapes.items():
+        background, label, left, right, marker = shapes
+        props[(position, "background", "color")] = background.paint.color
+        props[(position, "label", "value")] = label.value
+        props[(position, "label", "style")] = label.style
+        for name, segment in (("left", left), ("right", right)):
+            for attr in ("x", "y", "width", "height", "border_radius"):
+                props[(position, name, attr)] = getattr(segment, attr)
+            props[(position, name, "color")] = segment.paint.color
+        props[(position, "marker", "value")] = marker.value
+        props[(position, "marker", "x")] = marker.x
+        props[(position, "marker", "style")] = marker.style
+    for position, (text, xiang) in view._line_spans.items():
+        props[(position, "text", "text")] = text.text
+        props[(position, "text", "style")] = text.style
+        props[(position, "xiang", "text")] = xiang.text
+        props[(position, "xiang", "style")] = xiang.style
+    return props
+
+
+def _canvas_nodes(view):
+    """画布模式下会被复用的控件与图形"""
+    nodes = [view._figure, view._figure.content]
+    for position in range(6, 0, -1):
+        nodes += [*view._figure._shapes[position], *view._line_spans[position]]
+    return nodes
+
+
+def _changed_shapes(before, after):
+    """有改动的图形所在的爻位（不含爻辞）"""
+    return {
+        key[0]
+        for key in _changed(before, after)
+        if isinstance(key[0], int) and key[1] not in ("text", "xiang")
+    }
+
+
+def _tap(view, x, y):
+    """在画布上 (x, y) 处按下"""
+    figure = view._figure
+    figure._on_tap_down(ft.TapEvent("tap_down", figure, local_position=ft.Offset(x, y)))
+
+
+def _changed(before, after):
+    return {key for key in before if before[key] != after[key]}
+
+
+def _view_nodes(view):
+    """视图中会被复用的控件：卦名、六行及每行的文字节点"""
+    nodes = [view._name_text, view._judgment_text, *view._reading_texts]
+    for row in view._rows:
+        nodes += [
+            row,
+            row._label_text,
+            row._text,
+            row._xiang,
+            row.yao_line,
+            row.yao_line._marker_text,
+        ]
+    return nodes
+
+
+class FakePage:
+    """记录整页更新与对话框操作的假页面"""
+
+    def __init__(self):
+        self.updates = []
+        self.dialogs = []
+        self.popped = 0
+
+    def update(self, *controls):
+        self.updates.append(controls)
+
+    def add(self, *controls):
+        pass
+
+    def run_thread(self, handler, *args):
+        pass
+
+    def show_dialog(self, dialog):
+        dialog.open = True
+        self.dialogs.append(dialog)
+
+    def pop_dialog(self):
+        self.popped += 1
+
+
+class FakeControl:
+    """记录 update() 次数的假控件"""
+
+    def __init__(self):
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+class Handlers:
+    """带 _updates 的事件处理对象，与 YijingApp 的用法相同"""
+
+    def __init__(self):
+        self.page = FakePage()
+        self._updates = UpdateBatch(self.page)
+        self.a, self.b = FakeControl(), FakeControl()
+
+    @batched
+    def outer(self):
+        self._updates.refresh(self.a)
+        self.inner()
+
+    @batched
+    def inner(self):
+        self._updates.refresh(self.b)
+
+    @batched
+    def twice(self):
+        self._updates.refresh(self.a)
+        self._updates.refresh(self.a)
+
+    @batched
+    def fail(self):
+        self._updates.refresh(self.a, self.b)
+        raise RuntimeError("处理出错")
+
+
+# 测试换卦的次序
+NAVIGATION = ("坤", "屯", "需", "未济", "乾")
+
+
+def _control_ids(control):
+    """控件树中全部控件的 id()"""
+    children = getattr(control, "controls", None) or []
+    content = getattr(control, "content", None)
+    if isinstance(content, ft.Control):
+        children = [*children, content]
+    ids = {id(control)}
+    for child in children:
+        ids |= _control_ids(child)
+    return ids
+
+
+def _cards(view):
+    """关系面板中的全部 ft.Card"""
+    return [card for row in view.controls[1:] for card in row.controls]
+
+
+class TestGuaRelationsView:
+    """测试关系面板换卦时复用卡片"""
+
+    def test_update_creates_no_controls(self, gua_by_name):
+        """测试多次换卦不新建控件，卡片仍是原来那几张"""
+        refreshed = []
+        view = GuaRelationsView(
+            gua_by_name("乾"), refresh=refreshed.append, track_created=True
+        )
+        cards = _cards(view)
+        assert len(cards) == sum(len(row) for row in RELATION_CARD_ROWS) == 7
+        assert all(isinstance(card, ft.Card) for card in cards)
+        created = view.controls_created
+        assert created == count_controls(view)
+        ids = _control_ids(view)
+
+        for name in NAVIGATION:
+            view.update_gua(gua_by_name(name))
+            assert view.last_created == 0
+            assert all(a is b for a, b in zip(_cards(view), cards, strict=True))
+            assert _control_ids(view) == ids
+        assert view.controls_created == created
+        assert refreshed == [view] * len(NAVIGATION)
+
+    def test_rebuild_vs_reuse(self, gua_by_name):
+        """测试每次换卦都重建面板与复用卡片各新建的控件数"""
+        rebuilt = [
+            GuaRelationsView(gua_by_name(name)).controls_created for name in NAVIGATION
+        ]
+        view = GuaRelationsView(
+            gua_by_name("乾"), refresh=lambda control: None, track_created=True
+        )
+        reused = []
+        for name in NAVIGATION:
+            view.update_gua(gua_by_name(name))
+            reused.append(view.last_created)
+        # 面板自身、标题、每行一个 Row、每张卡片六个控件
+        per_rebuild = 2 + len(RELATION_CARD_ROWS) + 6 * len(_cards(view))
+        assert rebuilt == [per_rebuild] * len(NAVIGATION)
+        assert reused == [0] * len(NAVIGATION)
+
+    def test_last_created_counts_new_controls(self, gua_by_name):
+        """测试换卦中新建的控件计入 last_created 与 controls_created"""
+        view = GuaRelationsView(
+            gua_by_name("乾"), refresh=lambda control: None, track_created=True
+        )
+        created = view.controls_created
+        bind = view._bind
+
+        def rebuild_first_row():
+            bind()
+            row = view.controls[1]
+            row.controls = [ft.Card(content=card.content) for card in row.controls]
+
+        view._bind = rebuild_first_row
+        view.update_gua(gua_by_name("屯"))
+        assert view.last_created == len(RELATION_CARD_ROWS[0])
+        assert view.controls_created == created + view.last_created
+
+    def test_untracked_update_skips_walk(self, gua_by_name, monkeypatch):
+        """测试不测量时换卦不遍历控件树"""
+        import main
+
+        view = GuaRelationsView(gua_by_name("乾"), refresh=lambda control: None)
+        walked = []
+        monkeypatch.setattr(main, "iter_controls", walked.append)
+        for name in NAVIGATION:
+            view.update_gua(gua_by_name(name))
+        assert walked == []
+        assert view.last_created == 0
+
+    def test_cards_follow_gua(self, gua_by_name):
+        """测试换卦后卡片指向新卦的关系卦"""
+        view = GuaRelationsView(gua_by_name("乾"), refresh=lambda control: None)
+        gua = gua_by_name("屯")
+        view.update_gua(gua)
+        relations = get_relations(gua)
+        assert set(view._cards) == set(relations._fields)  # 每种关系一张卡片
+        for field, (card, gua_text) in view._cards.items():
+            related = getattr(relations, field)
+            assert card.data is related
+            assert gua_text.value.endswith(gua_title(related))
+
+
+class TestInteractiveHexagramView:
+    """测试卦象视图就地修改控件，只改有变化的属性"""
+
+    def _view(self, gua):
+        refreshed = []
+        view = InteractiveHexagramView(gua, refresh=refreshed.append)
+        return view, refreshed
+
+    def test_highlight_changes_one_row(self, gua_by_name):
+        """测试标红一爻只改该行的颜色与标记，其余不动"""
+        view, refreshed = self._view(gua_by_name("乾"))
+        nodes, before = _view_nodes(view), _view_props(view)
+        view._show(gua_by_name("乾"), [], [3])
+        assert all(a is b for a, b in zip(_view_nodes(view), nodes, strict=True))
+        row = 3  # 自上爻数起，三爻为第4行
+        assert _changed(before, _view_props(view)) == {
+            (row, "text", "color"),
+            (row, "text", "weight"),
+            (row, "xiang", "color"),
+            (row, "xiang", "weight"),
+            (row, "marker", "value"),
+            (row, "marker", "size"),
+            (row, "left", "height"),
+            (row, "left", "bgcolor"),
+            (row, "right", "height"),
+            (row, "right", "bgcolor"),
+        }
+        assert refreshed == [view]
+
+    def test_changing_line(self, gua_by_name):
+        """测试变一爻：卦名与各行爻辞换为之卦，变爻一行改阴阳与标记，不标底色"""
+        view, refreshed = self._view(gua_by_name("乾"))
+        nodes, before = _view_nodes(view), _view_props(view)
+        view.update_gua(gua_by_name("乾"), [2])
+        assert all(a is b for a, b in zip(_view_nodes(view), nodes, strict=True))
+        row = 4  # 二爻
+        expected = {
+            ("title", "name", "value"),
+            ("title", "judgment", "value"),
+            ("title", "reading", "visible"),
+            (row, "marker", "value"),
+            (row, "left", "width"),
+            (row, "gap", "visible"),
+            (row, "right", "visible"),
+        }
+        # 同人与乾六爻的爻辞、小象都不同
+        expected |= {(i, name, "value") for i in range(6) for name in ("text", "xiang")}
+        assert _changed(before, _view_props(view)) == expected
+        assert view._name_text.value.startswith("同人")
+        assert refreshed == [view]
+
+    def test_new_gua(self, gua_by_name):
+        """测试换卦：控件不变，卦名与阴阳不同的各爻随之改变"""
+        view, refreshed = self._view(gua_by_name("乾"))
+        nodes, before = _view_nodes(view), _view_props(view)
+        view.update_gua(gua_by_name("需"))  # 水天需：四、六爻为阴
+        assert all(a is b for a, b in zip(_view_nodes(view), nodes, strict=True))
+        expected = {("title", "name", "value"), ("title", "judgment", "value")}
+        for row in (0, 2):  # 上爻、四爻
+            expected |= {
+                (row, "left", "width"),
+                (row, "gap", "visible"),
+                (row, "right", "visible"),
+            }
+        expected |= {(i, name, "value") for i in range(6) for name in ("text", "xiang")}
+        assert _changed(before, _view_props(view)) == expected
+        assert [row.yao_line.original_yao for row in view._rows] == list(
+            reversed(gua_by_name("需").yaos)
+        )
+        assert refreshed == [view]
+
+    def test_same_state_not_sent(self, gua_by_name):
+        """测试状态未变时不提交更新"""
+        view, refreshed = self._view(gua_by_name("乾"))
+        view._show(gua_by_name("乾"), [])
+        assert refreshed == []
+
+    def test_update_during_path(self, gua_by_name, monkeypatch):
+        """测试路径演示换卦的途中点选别的卦：演示中止，视图停在所点之卦"""
+        import main
+
+        in_frame, go = threading.Event(), threading.Event()
+        view_model = main.get_view_model
+        frames, path = [], None
+
+        def paused_view_model(*args):
+            # 演示的第一步换卦做到一半时停下，等点选发生
+            if threading.current_thread() is path:
+                frames.append(args)
+                if len(frames) == 2:
+                    in_frame.set()
+                    go.wait(5)
+            return view_model(*args)
+
+        monkeypatch.setattr(main, "get_view_model", paused_view_model)
+        view = InteractiveHexagramView(gua_by_name("乾"), refresh=lambda control: None)
+        steps = get_graph().steps(gua_by_name("乾"), gua_by_name("坤"))
+        path = threading.Thread(
+            target=view.play_path, args=(gua_by_name("乾"), steps, 0)
+        )
+        path.start()
+        assert in_frame.wait(5)
+
+        clicked = gua_by_name("需")
+        click = threading.Thread(target=view.update_gua, args=(clicked, [2]))
+        click.start()
+        click.join(0.2)
+        go.set()
+        for thread in (click, path):
+            thread.join(5)
+            assert not thread.is_alive()
+
+        expected = InteractiveHexagramView(
+            clicked, changing_positions=[2], refresh=lambda control: None
+        )
+        assert view.view_model is expected.view_model
+        assert _view_props(view) == _view_props(expected)
+        assert [row.yao_line.original_yao for row in view._rows] == list(
+            reversed(clicked.yaos)
+        )
+
+
+class TestHexagramCanvas:
+    """测试画布模式的卦象视图就地修改图形，点击按坐标找到所点之爻"""
+
+    def _view(self, gua, **kwargs):
+        refreshed = []
+        view = InteractiveHexagramView(
+            gua, refresh=refreshed.append, canvas=True, **kwargs
+        )
+        return view, refreshed
+
+    def _expected(self, gua, **kwargs):
+        """同一状态下新建的画布视图的属性"""
+        return _canvas_props(self._view(gua, **kwargs)[0])
+
+    def test_highlight_changes_one_line(self, gua_by_name):
+        """测试标红一爻只改该爻的图形与爻辞样式"""
+        view, refreshed = self._view(gua_by_name("乾"))
+        nodes, before = _canvas_nodes(view), _canvas_props(view)
+        view._show(gua_by_name("乾"), [], [3])
+        assert all(a is b for a, b in zip(_canvas_nodes(view), nodes, strict=True))
+        after = _canvas_props(view)
+        assert _changed_shapes(before, after) == {3}
+        assert {key[0] for key in _changed(before, after)} == {3}
+        assert after == self._expected(gua_by_name("乾"), highlighted_positions=[3])
+        assert refreshed == [view]
+
+    def test_changing_line(self, gua_by_name):
+        """测试变一爻：只有变爻的图形改为阴爻并标出，爻辞换为之卦"""
+        view, refreshed = self._view(gua_by_name("乾"))
+        nodes, before = _canvas_nodes(view), _canvas_props(view)
+        view.update_gua(gua_by_name("乾"), [2])
+        assert all(a is b for a, b in zip(_canvas_nodes(view), nodes, strict=True))
+        after = _canvas_props(view)
+        assert _changed_shapes(before, after) == {2}
+        assert after[(2, "left", "width")] < FIGURE_LAYOUT.line_width
+        assert after[(2, "marker", "value")]
+        assert after == self._expected(gua_by_name("乾"), changing_positions=[2])
+        assert view._name_text.value.startswith("同人")
+        assert refreshed == [view]
+
+    def test_new_gua(self, gua_by_name):
+        """测试换卦：图形不变，只改阴阳不同的各爻"""
+        view, refreshed = self._view(gua_by_name("乾"))
+        nodes, before = _canvas_nodes(view), _canvas_props(view)
+        view.update_gua(gua_by_name("需"))  # 水天需：四、六爻为阴
+        assert all(a is b for a, b in zip(_canvas_nodes(view), nodes, strict=True))
+        after = _canvas_props(view)
+        assert _changed_shapes(before, after) == {4, 6}
+        assert after == self._expected(gua_by_name("需"))
+        assert refreshed == [view]
+
+    def test_tap_passes_line(self, gua_by_name):
+        """测试点中某爻（爻线或标记处）传回本卦的该爻"""
+        clicked = []
+        view, _ = self._view(gua_by_name("需"), on_yao_click=clicked.append)
+        layout = FIGURE_LAYOUT
+        for position in range(1, 7):
+            y = layout.row_top(position) + layout.row_height / 2
+            _tap(view, layout.line_x + 1, y)
+            _tap(view, layout.width - 1, y)
+        assert clicked == [yao for yao in gua_by_name("需").yaos for _ in range(2)]
+
+    def test_tap_outside_lines_ignored(self, gua_by_name):
+        """测试点在标签、画布之外或没有位置的点击不传回任何爻"""
+        clicked = []
+        view, _ = self._view(gua_by_name("乾"), on_yao_click=clicked.append)
+        layout = FIGURE_LAYOUT
+        _tap(view, layout.label_width / 2, layout.row_height / 2)
+        _tap(view, layout.width, layout.row_height / 2)
+        _tap(view, layout.line_x + 1, layout.height)
+        _tap(view, layout.line_x + 1, -1)
+        view._figure._on_tap_down(ft.TapEvent("tap_down", view._figure))
+        assert clicked == []
+
+    def test_control_count(self, gua_by_name):
+        """测试画布模式的控件数远少于逐爻模式，六爻改由画布上的图形绘出"""
+        rows = InteractiveHexagramView(gua_by_name("乾"))
+        view, _ = self._view(gua_by_name("乾"))
+        assert count_shapes(rows) == 0
+        assert count_shapes(view) == 5 * 6
+        assert count_controls(view) + count_shapes(view) < count_controls(rows)
+
+
+class TestUpdateBatch:
+    """测试一次操作中的界面更新合并为一次发送"""
+
+    def test_nested_handlers_send_once(self):
+        """测试嵌套的 @batched 处理方法只发送一次（多个控件时整页更新）"""
+        handlers = Handlers()
+        handlers.outer()
+        assert handlers._updates.sent == 1
+        assert handlers.page.updates == [()]
+        assert handlers.a.updates == handlers.b.updates == 0
+
+    def test_same_control_sent_once(self):
+        """测试同一控件刷新两次只发送一次，且只更新该控件"""
+        handlers = Handlers()
+        handlers.twice()
+        assert handlers._updates.sent == 1
+        assert handlers.a.updates == 1
+        assert handlers.page.updates == []
+
+    def test_nothing_to_send(self):
+        """测试事务中没有提交控件时不发送"""
+        updates = UpdateBatch(FakePage())
+        with updates.transaction():
+            pass
+        assert updates.sent == 0
+
+    def test_outside_transaction_sends_immediately(self):
+        """测试事务之外 refresh() 立即发送"""
+        updates = UpdateBatch(FakePage())
+        control = FakeControl()
+        updates.refresh(control)
+        updates.refresh(control)
+        assert updates.sent == control.updates == 2
+
+    def test_exception_resets_state(self):
+        """测试处理方法抛出异常后线程上的事务状态已清空"""
+        handlers = Handlers()
+        with pytest.raises(RuntimeError):
+            handlers.fail()
+        local = handlers._updates._local
+        assert local.depth == 0
+        assert local.pending == []
+        assert handlers._updates.sent == 1  # 已提交的改动照常发出
+        # 之后的 refresh() 不再被当作事务中而积压
+        handlers._updates.refresh(handlers.a)
+        assert handlers.a.updates == 1
+        assert handlers._updates.sent == 2
+
+    def test_transactions_are_per_thread(self):
+        """测试其它线程的 refresh() 不并入本线程的事务"""
+        updates = UpdateBatch(FakePage())
+        control = FakeControl()
+        with updates.transaction():
+            thread = threading.Thread(target=updates.refresh, args=(control,))
+            thread.start()
+            thread.join()
+            assert control.updates == 1
+        assert updates.sent == 1
+
+
+class TestYijingApp:
+    """测试应用的事件处理只发送一次更新"""
+
+    def _app(self):
+        app = YijingApp()
+        app.page = app._updates.page = FakePage()
+        app._build_ui()
+        app.page.updates.clear()
+        return app
+
+    def test_overview_select_sends_once(self, gua_by_name):
+        """测试在总览中选卦：关闭对话框与换卦合并为一次发送"""
+        app = self._app()
+        app._on_overview(None)
+        dialog = app._overview
+        assert app.page.dialogs == [dialog] and dialog.open
+
+        sent = app._updates.sent
+        app._on_overview_select(gua_by_name("需"))
+        assert app._updates.sent == sent + 1
+        assert app.page.updates == [()]
+        assert app.page.popped == 0
+        assert not dialog.open
+        assert app.original_gua is gua_by_name("需")
+
+    def test_tap_toggles_changing_line(self, gua_by_name):
+        """测试在本卦画布上点中某爻切换其变爻，再点一次取消"""
+        app = self._app()
+        view = app.hexagram_view
+        assert view.canvas
+        gua = app.original_gua
+        layout = FIGURE_LAYOUT
+        y = layout.row_top(2) + layout.row_height / 2
+        _tap(view, layout.line_x + 1, y)
+        assert app.changing_yaos == [2]
+        assert view.changing_positions == [2]
+        assert view._figure.lines[2].marker
+        _tap(view, layout.line_x + 1, y)
+        assert app.changing_yaos == []
+        assert view.view_model is InteractiveHexagramView(gua).view_model
+        assert not view._figure.lines[2].marker
+
+    def test_stale_live_search_dropped(self, gua_by_name, monkeypatch):
+        """测试后台查询显示结果的途中选卦：过期结果不覆盖选卦后的结果"""
+        import main
+
+        monkeypatch.setattr(main, "SEARCH_DEBOUNCE", 0)
+        app = self._app()
+        # 假页面上的控件不能 update()，后台线程的发送改为记录
+        sent = []
+        monkeypatch.setattr(app._updates, "_send", sent.append)
+        in_show, go = threading.Event(), threading.Event()
+        result_items = app._gua_result_items
+
+        def paused_result_items(guas):
+            # 代号检查已通过、结果尚未显示时停下，等选卦发生
+            in_show.set()
+            go.wait(5)
+            return result_items(guas)
+
+        app._gua_result_items = paused_result_items
+        search = threading.Thread(
+            target=app._run_live_search, args=("需", app._cancel_live_search())
+        )
+        search.start()
+        assert in_show.wait(5)
+
+        select = threading.Thread(target=app._on_gua_select, args=(gua_by_name("屯"),))
+        select.start()
+        select.join(0.2)
+        go.set()
+        for thread in (select, search):
+            thread.join(5)
+            assert not thread.is_alive()
+
+        assert not any(tile.visible for tile in app.result_tiles)
+        assert app.original_gua is gua_by_name("屯")
+
+    def test_overview_reused(self, gua_by_name):
+        """测试总览对话框只创建一次"""
+        app = self._app()
+        app._on_overview(None)
+        dialog = app._overview
+        app._on_overview_select(gua_by_name("屯"))
+        app._on_overview(None)
+        assert app._overview is dialog